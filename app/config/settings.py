@@ -1,9 +1,138 @@
 import os
+from dotenv import load_dotenv
+
+load_dotenv()
 
 class Settings:
     LOG_FOLDER = "logs"
     INSTANCE_FOLDER = "instances"
 
+    # Shared YOLO inference engine
+    YOLO_WEIGHTS = os.getenv("YOLO_WEIGHTS", "yolo11n.pt")
+    INFERENCE_POOL_SIZE = int(os.getenv("INFERENCE_POOL_SIZE", 1))
+    INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", 8))
+    INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", 10))
+    # Detector input (per device override: imgsz / roi / roi_margin). DETECTION_ROI: full | auto
+    INFERENCE_IMGSZ = int(os.getenv("INFERENCE_IMGSZ", 640))
+    DETECTION_CLASSES = [int(value) for value in os.getenv("DETECTION_CLASSES", "2,3,4,5,6,7,8").split(",")]
+    DETECTION_ROI = os.getenv("DETECTION_ROI", "full")
+    DETECTION_ROI_MARGIN = float(os.getenv("DETECTION_ROI_MARGIN", 0.15))
+
+    # Model runtime: pytorch | onnx | openvino, exported once into MODEL_CACHE_FOLDER
+    DETECTOR_BACKEND = os.getenv("DETECTOR_BACKEND", "pytorch")
+    REID_BACKEND = os.getenv("REID_BACKEND", "pytorch")
+    MODEL_INT8 = os.getenv("MODEL_INT8", "false").lower() == "true"
+    MODEL_INT8_DATA = os.getenv("MODEL_INT8_DATA", "coco8.yaml")  # calibration set for OpenVINO INT8 detector
+    MODEL_CACHE_FOLDER = os.getenv("MODEL_CACHE_FOLDER", os.path.join(INSTANCE_FOLDER, "models"))
+    # Exported models must match PyTorch on PARITY_IMAGE_FOLDER (default: Ultralytics sample images)
+    MODEL_PARITY_CHECK = os.getenv("MODEL_PARITY_CHECK", "true").lower() == "true"
+    PARITY_IMAGE_FOLDER = os.getenv("PARITY_IMAGE_FOLDER", "")
+    DETECTOR_PARITY_MIN_RECALL = float(os.getenv("DETECTOR_PARITY_MIN_RECALL", 0.9))
+    REID_PARITY_MIN_SIMILARITY = float(os.getenv("REID_PARITY_MIN_SIMILARITY", 0.98))
+
+    # Shared ReID feature service (BotSort appearance embeddings)
+    REID_WEIGHTS = os.getenv("REID_WEIGHTS", "osnet_x0_25_msmt17.pt")
+    REID_MAX_BATCH_SIZE = int(os.getenv("REID_MAX_BATCH_SIZE", 64))
+    REID_MAX_WAIT_MS = float(os.getenv("REID_MAX_WAIT_MS", 5))
+    REID_CACHE_IOU = float(os.getenv("REID_CACHE_IOU", 0.9))  # reuse embeddings of boxes that did not move
+    REID_CACHE_MAX_AGE = int(os.getenv("REID_CACHE_MAX_AGE", 30))
+
+    # Tracker backend: botsort | bytetrack | ocsort | iou (per device override: tracker)
+    TRACKER_BACKEND = os.getenv("TRACKER_BACKEND", "botsort")
+    IOU_TRACKER_THRESHOLD = float(os.getenv("IOU_TRACKER_THRESHOLD", 0.3))
+    IOU_TRACKER_MAX_DISTANCE = float(os.getenv("IOU_TRACKER_MAX_DISTANCE", 0.75))
+    IOU_TRACKER_MAX_AGE = int(os.getenv("IOU_TRACKER_MAX_AGE", 30))
+
+    # Per-session detection rate (per device override: detect_every / analytics_fps / adaptive_inference)
+    INFERENCE_DETECT_EVERY = int(os.getenv("INFERENCE_DETECT_EVERY", 1))
+    ANALYTICS_FPS = float(os.getenv("ANALYTICS_FPS", 0))  # 0 = every frame that is due
+    ADAPTIVE_INFERENCE = os.getenv("ADAPTIVE_INFERENCE", "false").lower() == "true"
+    ADAPTIVE_MAX_INTERVAL = int(os.getenv("ADAPTIVE_MAX_INTERVAL", 6))
+    ADAPTIVE_MOTION_THRESHOLD = float(os.getenv("ADAPTIVE_MOTION_THRESHOLD", 2.0))
+    ADAPTIVE_MAX_LOAD = float(os.getenv("ADAPTIVE_MAX_LOAD", 0.85))
+
+    # Motion gate before detection: off | diff | mog2 (per device override: motion_gate)
+    MOTION_GATE = os.getenv("MOTION_GATE", "off")
+    MOTION_GATE_WIDTH = int(os.getenv("MOTION_GATE_WIDTH", 160))
+    MOTION_PIXEL_THRESHOLD = int(os.getenv("MOTION_PIXEL_THRESHOLD", 25))
+    MOTION_MIN_AREA = float(os.getenv("MOTION_MIN_AREA", 0.002))  # moving share of the zone area
+    MOTION_LINE_BAND = float(os.getenv("MOTION_LINE_BAND", 0.08))  # half-height of the band watched around lines
+    MOTION_IDLE_INTERVAL = float(os.getenv("MOTION_IDLE_INTERVAL", 2.0))  # seconds between detections while idle
+
+    # Decode thread -> analytics ring buffer (per device override: frame_buffer_size / frame_drop_policy)
+    STREAM_BUFFER_SIZE = int(os.getenv("STREAM_BUFFER_SIZE", 8))
+    STREAM_DROP_POLICY = os.getenv("STREAM_DROP_POLICY", "drop_oldest")
+    # Preallocated decode buffers per stream, recycled once every stage released the frame
+    FRAME_POOL_SIZE = int(os.getenv("FRAME_POOL_SIZE", 16))
+    # Reconnect dropped/stalled/ended streams inside the decode thread (per device override: reconnect)
+    STREAM_RECONNECT = os.getenv("STREAM_RECONNECT", "true").lower() == "true"
+    STREAM_RECONNECT_BASE_DELAY = float(os.getenv("STREAM_RECONNECT_BASE_DELAY", 0.5))
+    STREAM_RECONNECT_MAX_DELAY = float(os.getenv("STREAM_RECONNECT_MAX_DELAY", 30))
+    STREAM_RECONNECT_MAX_ATTEMPTS = int(os.getenv("STREAM_RECONNECT_MAX_ATTEMPTS", 0))  # 0 = retry forever
+    STREAM_OPEN_TIMEOUT = float(os.getenv("STREAM_OPEN_TIMEOUT", 10))
+    STREAM_READ_TIMEOUT = float(os.getenv("STREAM_READ_TIMEOUT", 10))  # no packet for this long = stalled
+    # Decode cost per camera (per device override: decode_threads / decode_thread_count / decode_skip / decode_every / decode_width / decode_height)
+    DECODE_THREAD_TYPE = os.getenv("DECODE_THREAD_TYPE", "AUTO")  # NONE | SLICE | FRAME | AUTO
+    DECODE_THREAD_COUNT = int(os.getenv("DECODE_THREAD_COUNT", 0))  # 0 = one per core
+    DECODE_SKIP_FRAME = os.getenv("DECODE_SKIP_FRAME", "NONE")  # NONE | NONREF | NONKEY (keyframes only)
+    DECODE_EVERY = int(os.getenv("DECODE_EVERY", 1))  # hand on every Nth decoded frame
+    DECODE_WIDTH = int(os.getenv("DECODE_WIDTH", 0))  # 0 = native; e.g. INFERENCE_IMGSZ to decode at detector size
+    DECODE_HEIGHT = int(os.getenv("DECODE_HEIGHT", 0))  # 0 = keep aspect ratio
+
+    # Shared preview stream (per device override: preview_width)
+    PREVIEW_WIDTH = int(os.getenv("PREVIEW_WIDTH", 640))
+    PREVIEW_QUALITY = int(os.getenv("PREVIEW_QUALITY", 70))
+    PREVIEW_FPS = float(os.getenv("PREVIEW_FPS", 10))
+
+    # Single-frame snapshots served from memory (ETag / If-None-Match)
+    SNAPSHOT_WIDTH = int(os.getenv("SNAPSHOT_WIDTH", 0))  # 0 = native resolution
+    SNAPSHOT_QUALITY = int(os.getenv("SNAPSHOT_QUALITY", 80))
+    SNAPSHOT_MAX_AGE = float(os.getenv("SNAPSHOT_MAX_AGE", 2))  # running sessions: re-encode the latest frame after this
+    SNAPSHOT_IDLE_MAX_AGE = float(os.getenv("SNAPSHOT_IDLE_MAX_AGE", 900))  # stopped sessions: open the stream on request after this
+    SNAPSHOT_REFRESH_INTERVAL = float(os.getenv("SNAPSHOT_REFRESH_INTERVAL", 300))  # stopped sessions: background refresh (0 = off)
+    SNAPSHOT_REFRESH_CONCURRENCY = int(os.getenv("SNAPSHOT_REFRESH_CONCURRENCY", 2))
+
+    # Evidence crops (best sample of each track) uploaded to MinIO for tracks that crossed a line
+    EVIDENCE_UPLOAD_WORKERS = int(os.getenv("EVIDENCE_UPLOAD_WORKERS", 4))
+    EVIDENCE_QUEUE_SIZE = int(os.getenv("EVIDENCE_QUEUE_SIZE", 64))
+    EVIDENCE_IMAGE_FORMAT = os.getenv("EVIDENCE_IMAGE_FORMAT", "webp")  # webp | jpg | avif
+    EVIDENCE_IMAGE_QUALITY = int(os.getenv("EVIDENCE_IMAGE_QUALITY", 80))
+    EVIDENCE_MAX_WIDTH = int(os.getenv("EVIDENCE_MAX_WIDTH", 1280))
+    EVIDENCE_CROP_MARGIN = float(os.getenv("EVIDENCE_CROP_MARGIN", 0.25))  # context around the box, fraction of its size
+
+    # Dashboard websockets: per-client send queue (oldest dropped when full) and send timeout
+    WEBSOCKET_QUEUE_SIZE = int(os.getenv("WEBSOCKET_QUEUE_SIZE", 64))
+    WEBSOCKET_SEND_TIMEOUT = float(os.getenv("WEBSOCKET_SEND_TIMEOUT", 5))
+
+    # Buffered crossing event writer (MongoDB insert_many + on-disk journal)
+    EVENT_FLUSH_SIZE = int(os.getenv("EVENT_FLUSH_SIZE", 100))
+    EVENT_FLUSH_INTERVAL = float(os.getenv("EVENT_FLUSH_INTERVAL", 2))
+    EVENT_BUFFER_MAX = int(os.getenv("EVENT_BUFFER_MAX", 5000))
+    EVENT_WRITE_TIMEOUT = float(os.getenv("EVENT_WRITE_TIMEOUT", 5))
+    EVENT_HISTORY_POINTS = int(os.getenv("EVENT_HISTORY_POINTS", 0))  # track path centroids stored per event (0 = none)
+    EVENT_PAGE_SIZE_MAX = int(os.getenv("EVENT_PAGE_SIZE_MAX", 1000))
+
+    # Crossing counters rolled up into 1m / 15m / 1h buckets (idempotent per-writer upserts)
+    ROLLUP_COLLECTION = os.getenv("ROLLUP_COLLECTION", "crossing_rollups")
+    ROLLUP_FLUSH_INTERVAL = float(os.getenv("ROLLUP_FLUSH_INTERVAL", 10))
+    ROLLUP_WRITE_TIMEOUT = float(os.getenv("ROLLUP_WRITE_TIMEOUT", 5))
+
+    # Per-session track state (frames are analytics frames)
+    TRACK_HISTORY_SIZE = int(os.getenv("TRACK_HISTORY_SIZE", 32))
+    TRACK_MAX_AGE_FRAMES = int(os.getenv("TRACK_MAX_AGE_FRAMES", 150))
+    TRACK_CROSSED_TTL_FRAMES = int(os.getenv("TRACK_CROSSED_TTL_FRAMES", 900))
+
+    # Rasterized polygon zone masks are stored at 1/ZONE_MASK_SCALE resolution
+    ZONE_MASK_SCALE = int(os.getenv("ZONE_MASK_SCALE", 4))
+
+    # Session execution: "inline" (API process) or "process" (sharded worker processes)
+    SESSION_EXECUTION_MODE = os.getenv("SESSION_EXECUTION_MODE", "inline")
+    SESSION_WORKER_PROCESSES = int(os.getenv("SESSION_WORKER_PROCESSES", os.cpu_count() or 1))
+    SESSION_STATUS_INTERVAL = float(os.getenv("SESSION_STATUS_INTERVAL", 1))
+    SESSION_WORKER_RESTART_DELAY = float(os.getenv("SESSION_WORKER_RESTART_DELAY", 1))  # crashed shard, doubles per crash
+    SESSION_WORKER_RESTART_MAX_DELAY = float(os.getenv("SESSION_WORKER_RESTART_MAX_DELAY", 60))
+    SHARED_FRAME_FPS = float(os.getenv("SHARED_FRAME_FPS", 15))
+
     os.makedirs(LOG_FOLDER, exist_ok=True)
     os.makedirs(INSTANCE_FOLDER, exist_ok=True)
 
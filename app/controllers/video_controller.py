@@ -3,8 +3,8 @@ import cv2
 import asyncio
 import os
 from datetime import datetime
-from ultralytics import YOLO
 from app.config.settings import settings
+from app.helpers.model_backends import load_detector
 # from app.helpers.video_sessions import VideoSession
 
 class VideoProcess:
@@ -75,7 +75,14 @@ class VideoProcessor:
     """Manajemen banyak proses PyAV."""
     def __init__(self):
         self.processes = {}
-        self.model = YOLO("yolo11n.pt")
+        self._model = None
+
+    @property
+    def model(self):
+        """Detector, loaded on first use: importing the controller must not export models."""
+        if self._model is None:
+            self._model = load_detector()
+        return self._model
 
     def start(self, process_id: str, video_path: str):
         """Memulai proses baru."""
@@ -2,18 +2,19 @@ import asyncio
 from datetime import datetime, timezone
 import cv2
 import numpy as np
-from boxmot import BotSort
-import torch
-from pathlib import Path
-from app.helpers.mongodb_manager import MongoDBManager
-from app.helpers.websocket_manager import websocket_manager
+from app.config.settings import settings
+from app.helpers.crossing_aggregator import crossing_aggregator
+from app.helpers.event_sink import compact_event, crossing_sink
+from app.helpers.evidence_uploader import capture_evidence
+from app.helpers.tracker_backends import create_tracker
+from app.helpers.websocket_manager import RECENT_CAPTURED_DATA, websocket_manager
 
 class BoxmotTracking:
     def get_max_confidence(data):
         return max(data, key=lambda x: x.get("confidence", float('-inf')))
     
     async def report_crossing(data):
-        high_confidence = BoxmotTracking.get_max_confidence(data["history"])
+        high_confidence = data["best"]
         data_recent = {
             "device_name":data["device_name"],
             "device_id":data["device_id"],
@@ -23,105 +24,94 @@ class BoxmotTracking:
             "confidence":high_confidence["confidence"],
             "frame_id":high_confidence["frame_id"]
         }
-        print(data)
-        await MongoDBManager().insert(data)
-        await websocket_manager.send_personal_message(data_recent, "recent-captured-data")
+        crossing_sink.submit(compact_event(data, settings.EVENT_HISTORY_POINTS))
+        crossing_aggregator.record(data)
+        await websocket_manager.send_personal_message(data_recent, RECENT_CAPTURED_DATA)
         await asyncio.sleep(0)
     
     def process_detections(frame, model, confidence):
-        detections = []
-        results = model.predict(frame, conf=confidence, verbose=False)  # Set confidence threshold
-        boxes = results[0].boxes.xyxy.cpu().numpy()  # Bounding boxes [x1, y1, x2, y2]
-        confidences = results[0].boxes.conf.cpu().numpy()  # Confidence scores
-        class_ids = results[0].boxes.cls.cpu().numpy().astype(int)  # Class IDs
+        results = model.predict(frame, conf=confidence, classes=settings.DETECTION_CLASSES, verbose=False)  # Set confidence threshold
+        return BoxmotTracking.filter_detections(results[0], confidence)
 
-        for box, confiden, class_id in zip(boxes, confidences, class_ids):
-            if class_id in [2, 3, 4, 5, 6, 7, 8]:
-                x1, y1, x2, y2 = box
-                w, h = x2 - x1, y2 - y1
-                detections.append([x1, y1, x2, y2, confiden, class_id])
-        return np.array(detections)
-    
-    async def update_track_crossing(confidence,class_id,track_id,x1, y1, x2, y2,cx, cy,vertical_line_points, horizontal_line_points,track_histories,frame,crossed,model,device_name,device_id):
-        vertical_x1, vertical_y1 = vertical_line_points[0]
-        vertical_x2, vertical_y2 = vertical_line_points[1]
+    def filter_detections(result, confidence):
+        """Convert one YOLO result (already limited to DETECTION_CLASSES) into the (x1, y1, x2, y2, conf, cls) tracker input."""
+        boxes = result.boxes
+        if not len(boxes):
+            return BoxmotTracking.no_detections()
+        detections = np.column_stack([
+            boxes.xyxy.cpu().numpy(),  # Bounding boxes [x1, y1, x2, y2]
+            boxes.conf.cpu().numpy(),  # Confidence scores
+            boxes.cls.cpu().numpy(),  # Class IDs
+        ])
+        return detections[detections[:, 4] >= confidence]
 
-        horizontal_x1, horizontal_y1 = horizontal_line_points[0]
-        horizontal_x2, horizontal_y2 = horizontal_line_points[1]
+    def no_detections():
+        """Empty (0, 6) detection array; feeding it to the tracker runs only its motion prediction."""
+        return np.empty((0, 6), dtype=np.float32)
+    
+    async def evaluate_crossings(tracks, zone_set, track_store, frame, frame_index, model, device_name, device_id, report=None, image=None, uploader=None):
+        """
+        Update track states from the tracker output and report every line crossing,
+        evaluated for all tracks in one vectorized pass; a track counts once on each line
+        it crosses. Returns the IDs of tracks that just crossed.
 
-        # Pastikan track_histories memiliki entri untuk track_id
-        if (track_id not in track_histories) and (track_id not in crossed):
-            track_histories[track_id] = []
+        With ``image``, tracks whose best-confidence sample is in this frame get
+        a new evidence crop (taken off the event loop). With ``uploader``, a
+        crossing track's crop is uploaded first and the event is reported once
+        that finished, with ``frame_id`` only if the upload succeeded.
+        """
+        report = report or BoxmotTracking.report_crossing
+        if not len(tracks):
+            return []
+        centroids = (tracks[:, 0:2] + tracks[:, 2:4]) // 2  # Center of each bounding box
 
-        # Ambil posisi sebelumnya dari track_histories jika ada
-        if track_histories[track_id]:
-            previous_cx, previous_cy = track_histories[track_id][-1]["centroid"]
-        else:
-            previous_cx, previous_cy = cx, cy  # Jika belum ada, gunakan posisi saat ini
+        previous, improved = [], []
+        for index, track in enumerate(tracks):
+            track_id = int(track[4])
+            previous.append(track_store.update(track_id, frame_index, track[0:4], centroids[index], track[5], track[6], frame))
+            state = track_store.tracks[track_id]
+            if state.best_frame_id == frame:
+                improved.append(state)
+        if image is not None and improved:
+            await asyncio.to_thread(capture_evidence, image, improved, settings.EVIDENCE_CROP_MARGIN, settings.EVIDENCE_MAX_WIDTH)
 
-        # Append history data yang dipastikan belum melintas jika sudah maka akan di lewati saja
-        if track_id not in crossed:
-            track_histories[track_id].append({
-                "class_id":class_id,
-                "confidence":confidence,
-                "bounding_box": (x1, y1, x2, y2),
-                "centroid": (cx, cy),
-                "label":model.names[int(class_id)],
-                "frame_id":frame
-            })
-        
-        # Check crossing for horizontal line
-        if previous_cy < horizontal_y1 <= cy:
-            await BoxmotTracking.report_crossing({
-                "device_name":device_name,
-                "device_id":device_id,
-                "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),  # GMT+0 Timestamp
-                "direction":"crossed UP to DOWN.",
-                "history":track_histories[track_id]
-            })
-            del track_histories[track_id]
-            crossed.add(track_id)
-            # print(f"Track ID {track_id} crossed UP to DOWN.")
-        elif previous_cy > horizontal_y1 >= cy:
-            await BoxmotTracking.report_crossing({
+        crossed = []
+        for track_index, line_index, sign in zone_set.engine.crossings(np.array(previous), centroids):
+            track_id = int(tracks[track_index, 4])
+            if track_store.is_crossed(track_id, line_index):
+                continue  # each track counts once per line
+            state = track_store.mark_crossed(track_id, line_index, frame_index)
+            best = state.best_sample(model.names)
+            zone, direction = zone_set.record_crossing(line_index, sign, best["label"])
+            event = {
                 "device_name":device_name,
                 "device_id":device_id,
                 "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),  # GMT+0 Timestamp
-                "direction":"crossed DOWN to UP.",
-                "history":track_histories[track_id]
-            })
-            del track_histories[track_id]
-            crossed.add(track_id)
-            # print(f"Track ID {track_id} crossed DOWN to UP.")
+                "zone":zone,
+                "direction":direction,
+                "best":best,
+                "history":[{"centroid": centroid} for centroid in state.recent_centroids()]
+            }
+            best["frame_id"] = None
+            if uploader is not None and state.best_evidence is not None:
+                evidence_id = f"{state.best_frame_id}_{track_id}"
+                if uploader.submit(evidence_id, state.best_evidence, BoxmotTracking._after_upload(report, event, evidence_id)):
+                    crossed.append(track_id)
+                    continue
+            await report(event)
+            crossed.append(track_id)
+        return crossed
 
-        # Check crossing for vertical line
-        if previous_cx < vertical_x1 <= cx:
-            await BoxmotTracking.report_crossing({
-                "device_name":device_name,
-                "device_id":device_id,
-                "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),  # GMT+0 Timestamp
-                "direction":"crossed LEFT to RIGHT.",
-                "history":track_histories[track_id]
-            })
-            del track_histories[track_id]
-            crossed.add(track_id)
-            # print(f"Track ID {track_id} crossed LEFT to RIGHT.")
-        elif previous_cx > vertical_x1 >= cx:
-            await BoxmotTracking.report_crossing({
-                "device_name":device_name,
-                "device_id":device_id,
-                "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),  # GMT+0 Timestamp
-                "direction":"crossed RIGHT to LEFT.",
-                "history":track_histories[track_id]
-            })
-            del track_histories[track_id]
-            crossed.add(track_id)
-            # print(f"Track ID {track_id} crossed RIGHT to LEFT.")
+    def _after_upload(report, event, evidence_id):
+        async def then(uploaded):
+            if uploaded:
+                event["best"]["frame_id"] = evidence_id
+            await report(event)
+        return then
 
-    def initial_tracker():
-        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        print(f"Using device: {device}")
-        return BotSort(reid_weights=Path('osnet_x0_25_msmt17.pt'), device=device, half=False)
+    def initial_tracker(backend=None):
+        """Tracker for one session; ``backend`` is one of ``TRACKER_BACKENDS`` (default TRACKER_BACKEND)."""
+        return create_tracker(backend)
     
     def draw_virtual_lines(frame, vertical_line_points, horizontal_line_points):
         """Draw virtual lines for multi-directional crossing."""
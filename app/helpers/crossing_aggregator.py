@@ -0,0 +1,229 @@
+import asyncio
+import itertools
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.config.settings import settings
+from app.helpers.event_sink import TIMESTAMP_FORMAT
+from app.helpers.mongodb_manager import MongoDBClient
+from app.helpers.pipeline_metrics import Histogram
+
+# -------------------------------------
+# 🧮 Crossing Counters and Rollups
+# -------------------------------------
+
+# Bucket resolutions (name -> seconds)
+RESOLUTIONS = {"1m": 60, "15m": 900, "1h": 3600}
+KEY_FIELDS = ("device_id", "zone", "direction", "label")
+# Written buckets are forgotten this long after they close (late events start a new writer field)
+BUCKET_RETENTION = max(RESOLUTIONS.values())
+
+def bucket_start(timestamp: float, seconds: int) -> datetime:
+    return datetime.fromtimestamp(timestamp // seconds * seconds, timezone.utc)
+
+def event_time(event: dict) -> float:
+    """Epoch seconds of a crossing event (its UTC ``timestamp`` string, or now)."""
+    value = event.get("timestamp")
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=value.tzinfo or timezone.utc).timestamp()
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+class CrossingAggregator:
+    """
+    Counts crossings per device, zone, direction and class as they happen.
+
+    ``totals`` holds the counters since startup; every event also increments
+    one 1m, 15m and 1h bucket in ``buckets``. Every ``flush_interval``
+    seconds the buckets that changed are written in one ``bulk_write`` into
+    the rollup collection, one document per bucket and key.
+
+    Writes are idempotent: each process owns one field under ``writers`` in
+    a bucket document and ``$set``s its absolute count there, then ``count``
+    is recomputed as the sum of all writers (an update pipeline, MongoDB
+    4.2+). A timed-out write that did land is simply repeated, and
+    restarts or several API processes never overwrite each other. Failed
+    writes stay dirty for the next flush, and queries add the counts not
+    written yet, so counts never need the raw event collection.
+    """
+    def __init__(self, collection_name: str, flush_interval: float, write_timeout: float):
+        self.collection_name = collection_name
+        self.flush_interval = flush_interval
+        self.write_timeout = write_timeout
+        self.writer_id = uuid.uuid4().hex
+        self.totals = defaultdict(int)  # (device_id, zone, direction, label) -> count
+        self.buckets = {}  # (resolution, bucket, device_id, zone, direction, label) -> [writer field, count, written]
+        self.task = None
+        self.flushed = 0
+        self.failures = 0
+        self.latency = Histogram()  # bulk_write round trips
+        self._fields = itertools.count()
+        self._flush_lock = asyncio.Lock()
+
+    @property
+    def collection(self):
+        return MongoDBClient().get_database()[self.collection_name]
+
+    @property
+    def pending(self):
+        """Bucket keys counted since their last successful write."""
+        return {key: entry[1] - entry[2] for key, entry in self.buckets.items() if entry[1] != entry[2]}
+
+    async def ensure_indexes(self):
+        await self.collection.create_index(
+            [("resolution", ASCENDING), ("bucket", ASCENDING), *((field, ASCENDING) for field in KEY_FIELDS)],
+            unique=True, name="rollup_key",
+        )
+        await self.collection.create_index(
+            [("resolution", ASCENDING), ("device_id", ASCENDING), ("bucket", ASCENDING)],
+            name="rollup_device_bucket",
+        )
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def shutdown(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        await self.flush()
+
+    def record(self, event: dict):
+        """Count one crossing event (as passed to ``report_crossing``)."""
+        key = (
+            str(event.get("device_id")),
+            event.get("zone") or "",
+            event.get("direction") or "",
+            (event.get("best") or {}).get("label") or event.get("label") or "",
+        )
+        self.totals[key] += 1
+        timestamp = event_time(event)
+        for resolution, seconds in RESOLUTIONS.items():
+            bucket_key = (resolution, bucket_start(timestamp, seconds), *key)
+            entry = self.buckets.get(bucket_key)
+            if entry is None:
+                # A fresh field per entry: a bucket forgotten and counted again adds to its old count
+                entry = self.buckets[bucket_key] = [f"{self.writer_id}_{next(self._fields)}", 0, 0]
+            entry[1] += 1
+
+    def _operation(self, key, field, count):
+        return UpdateOne(
+            {"resolution": key[0], "bucket": key[1], **dict(zip(KEY_FIELDS, key[2:]))},
+            [
+                # Documents from before per-writer counts keep their count as one writer
+                {"$set": {"writers": {"$ifNull": ["$writers", {"legacy": {"$ifNull": ["$count", 0]}}]}}},
+                {"$set": {f"writers.{field}": count}},
+                {"$set": {"count": {"$sum": {"$map": {"input": {"$objectToArray": "$writers"}, "in": "$$this.v"}}}}},
+            ],
+            upsert=True,
+        )
+
+    async def flush(self):
+        async with self._flush_lock:
+            dirty = [(key, entry[0], entry[1]) for key, entry in self.buckets.items() if entry[1] != entry[2]]
+            if not dirty:
+                self._forget_closed()
+                return
+            operations = [self._operation(key, field, count) for key, field, count in dirty]
+            started = time.perf_counter()
+            failed = set()
+            try:
+                await asyncio.wait_for(self.collection.bulk_write(operations, ordered=False), self.write_timeout)
+            except BulkWriteError as e:
+                # The other upserts were applied: only the rejected ones stay dirty
+                errors = e.details.get("writeErrors", [])
+                failed = {error["index"] for error in errors}
+                self.failures += 1
+                print(f"⚠️ {len(errors)} crossing rollup upserts rejected, retrying later: {errors[0].get('errmsg') if errors else e}")
+            except Exception as e:
+                # Nothing is marked written; the retry sets the same absolute counts again
+                self.failures += 1
+                print(f"⚠️ Crossing rollup flush failed, retrying later: {e!r}")
+                return
+            else:
+                self.latency.observe(time.perf_counter() - started)
+            for index, (key, _, count) in enumerate(dirty):
+                entry = self.buckets.get(key)
+                if index not in failed and entry is not None:
+                    entry[2] = max(entry[2], count)
+            self.flushed += len(operations) - len(failed)
+            self._forget_closed()
+
+    def _forget_closed(self):
+        horizon = time.time() - BUCKET_RETENTION
+        for key, entry in list(self.buckets.items()):
+            if entry[1] == entry[2] and key[1].timestamp() + RESOLUTIONS[key[0]] < horizon:
+                del self.buckets[key]
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def live_counts(self, device_id: str = None):
+        """Counters since startup, optionally for one device."""
+        return [
+            {**dict(zip(KEY_FIELDS, key)), "count": count}
+            for key, count in sorted(self.totals.items())
+            if device_id is None or key[0] == device_id
+        ]
+
+    async def query(self, resolution: str, start: datetime, end: datetime, device_id: str = None, group_by=KEY_FIELDS):
+        """
+        Bucketed counts in [start, end) at ``resolution``, summed over the key
+        fields not in ``group_by``; unflushed increments are included.
+        """
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution {resolution!r}, expected one of {', '.join(RESOLUTIONS)}")
+        group_by = [field for field in KEY_FIELDS if field in group_by]
+        match = {"resolution": resolution, "bucket": {"$gte": start, "$lt": end}}
+        if device_id is not None:
+            match["device_id"] = device_id
+        pipeline = [
+            {"$match": match},
+            {"$group": {"_id": {"bucket": "$bucket", **{field: f"${field}" for field in group_by}}, "count": {"$sum": "$count"}}},
+        ]
+        counts = defaultdict(int)
+        async for row in self.collection.aggregate(pipeline):
+            bucket = row["_id"]["bucket"].replace(tzinfo=timezone.utc)  # Mongo returns naive UTC datetimes
+            counts[(bucket, *(row["_id"].get(field) for field in group_by))] += row["count"]
+
+        for key, count in self.pending.items():
+            fields = dict(zip(KEY_FIELDS, key[2:]))
+            if key[0] == resolution and start <= key[1] < end and (device_id is None or fields["device_id"] == device_id):
+                counts[(key[1], *(fields[field] for field in group_by))] += count
+
+        return [
+            {"bucket": key[0].isoformat(), **dict(zip(group_by, key[1:])), "count": count}
+            for key, count in sorted(counts.items(), key=lambda item: (item[0][0], *map(str, item[0][1:])))
+        ]
+
+    def metrics(self):
+        return {
+            "pending": len(self.pending),
+            "flushed": self.flushed,
+            "failures": self.failures,
+            "write": self.latency.snapshot(),
+        }
+
+def parse_time(value: str) -> datetime:
+    """UTC datetime from an ISO timestamp (naive values are taken as UTC)."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def parse_range(start: str = None, end: str = None, default_hours: float = 24):
+    """(start, end) UTC datetimes from ISO strings; defaults to the last ``default_hours``."""
+    end_time = parse_time(end) if end else datetime.now(timezone.utc)
+    start_time = parse_time(start) if start else end_time - timedelta(hours=default_hours)
+    return start_time, end_time
+
+crossing_aggregator = CrossingAggregator(settings.ROLLUP_COLLECTION, settings.ROLLUP_FLUSH_INTERVAL, settings.ROLLUP_WRITE_TIMEOUT)
@@ -0,0 +1,230 @@
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timezone
+import numpy as np
+from bson import ObjectId, json_util
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
+from app.config.settings import settings
+from app.helpers.mongodb_manager import MongoDBClient
+from app.helpers.pipeline_metrics import Histogram
+
+# -------------------------------------
+# 🗃️ Buffered Crossing Event Sink
+# -------------------------------------
+
+DUPLICATE_KEY = 11000
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"  # crossing event timestamps, UTC
+
+def to_document(value):
+    """Convert numpy scalars/arrays and tuples into BSON/JSON friendly values."""
+    if isinstance(value, dict):
+        return {key: to_document(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_document(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def _sample(points, count):
+    """``count`` points evenly spread over ``points`` (first and last kept)."""
+    if len(points) <= count:
+        return points
+    return points[np.linspace(0, len(points) - 1, count).round().astype(int)]
+
+def compact_event(data: dict, history_points: int = 0) -> dict:
+    """
+    Stored form of a crossing event (as passed to ``report_crossing``): summary
+    fields, the best-confidence detection and its evidence ``frame_id`` (None
+    unless the crop was uploaded), and with ``history_points`` > 0 that many
+    centroids of the track's path.
+
+        {device_id, device_name, timestamp (UTC date), zone, direction,
+         label, class_id, confidence, bbox [x1, y1, x2, y2], frame_id, history?}
+    """
+    best = data["best"]
+    timestamp = data["timestamp"]
+    if isinstance(timestamp, str):
+        timestamp = datetime.strptime(timestamp, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+    document = {
+        "device_id": data["device_id"],
+        "device_name": data["device_name"],
+        "timestamp": timestamp,
+        "zone": data.get("zone"),
+        "direction": data["direction"],
+        "label": best["label"],
+        "class_id": int(best["class_id"]),
+        "confidence": round(float(best["confidence"]), 4),
+        "bbox": np.asarray(best["bounding_box"], dtype=np.float64).round().astype(int).tolist(),
+        "frame_id": best["frame_id"],
+    }
+    history = data.get("history")
+    if history_points > 0 and history:
+        centroids = np.asarray([point["centroid"] for point in history], dtype=np.float64).reshape(-1, 2)
+        document["history"] = _sample(centroids, history_points).round().astype(int).tolist()
+    return document
+
+class CrossingEventSink:
+    """
+    Shared writer for crossing events.
+
+    Events are buffered in memory and written with ``insert_many(ordered=False)``
+    whenever ``flush_size`` events are pending or ``flush_interval`` seconds
+    pass. Batches that cannot be written (Mongo slow or unreachable) are spilled
+    to an on-disk JSON-lines journal and replayed once writes succeed again.
+    Documents get their ``_id`` before the first attempt, so a replay of a batch
+    that was in fact written only produces ignored duplicate-key errors. Journal
+    writes happen in worker threads, serialized by one lock.
+    """
+    def __init__(self, collection_name: str, flush_size: int, flush_interval: float, max_buffer: int, write_timeout: float, journal_path: str):
+        self.collection_name = collection_name
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval
+        self.max_buffer = max(self.flush_size, max_buffer)
+        self.write_timeout = write_timeout
+        self.journal_path = journal_path
+        self.buffer = []
+        self.task = None
+        self.written = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.latency = Histogram()  # insert_many round trips
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._journal_lock = threading.Lock()
+        self._spills = set()  # overflow spills still running
+
+    @property
+    def collection(self):
+        return MongoDBClient().get_database()[self.collection_name]
+
+    async def ensure_indexes(self):
+        """Indexes behind the keyset-paginated range queries (newest first, ``_id`` breaks ties)."""
+        await self.collection.create_index(
+            [("device_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)], name="device_timestamp",
+        )
+        await self.collection.create_index([("timestamp", DESCENDING), ("_id", DESCENDING)], name="timestamp")
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def shutdown(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        await self.flush()
+        if self._spills:
+            await asyncio.gather(*self._spills, return_exceptions=True)
+
+    def submit(self, event: dict):
+        """Queue one event; never waits on the database."""
+        self.buffer.append(to_document(event))
+        if len(self.buffer) >= self.flush_size:
+            self._wakeup.set()
+        if len(self.buffer) > self.max_buffer:
+            # Mongo is not keeping up: move the oldest events to disk.
+            overflow, self.buffer = self.buffer[:self.flush_size], self.buffer[self.flush_size:]
+            spill = asyncio.get_running_loop().create_task(asyncio.to_thread(self._spill, overflow))
+            self._spills.add(spill)
+            spill.add_done_callback(self._spills.discard)
+
+    def metrics(self):
+        return {
+            "buffered": len(self.buffer),
+            "written": self.written,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "journal_bytes": os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0,
+            "write": self.latency.snapshot(),
+        }
+
+    async def flush(self):
+        async with self._flush_lock:
+            while self.buffer:
+                batch, self.buffer = self.buffer[:self.flush_size], self.buffer[self.flush_size:]
+                if not await self._insert(batch):
+                    # Take everything now: events submitted during the spill stay buffered
+                    pending, self.buffer = batch + self.buffer, []
+                    await asyncio.to_thread(self._spill, pending)
+                    return
+                self.written += len(batch)
+            if os.path.exists(self.journal_path):
+                await self._replay()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ Crossing event flush failed: {e}")
+
+    async def _insert(self, batch) -> bool:
+        for document in batch:
+            document.setdefault("_id", ObjectId())
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.collection.insert_many(batch, ordered=False), self.write_timeout)
+            self.latency.observe(time.perf_counter() - started)
+            return True
+        except BulkWriteError as e:
+            # The server answered: duplicates come from a replay, anything else
+            # would fail again on retry, so the batch is not spilled.
+            errors = [error for error in e.details.get("writeErrors", []) if error.get("code") != DUPLICATE_KEY]
+            if errors:
+                print(f"⚠️ {len(errors)} crossing events rejected by MongoDB: {errors[0].get('errmsg')}")
+            return True
+        except Exception as e:
+            print(f"⚠️ Crossing event write failed, spilling to journal: {e}")
+            return False
+
+    def _spill(self, batch):
+        lines = [json_util.dumps(document) + "\n" for document in batch]
+        with self._journal_lock:
+            with open(self.journal_path, "a") as journal:
+                journal.writelines(lines)
+            self.spilled += len(batch)
+
+    def _take_journal(self, replaying):
+        """Move the journal aside for replay (unless a previous replay was interrupted)."""
+        with self._journal_lock:
+            if not os.path.exists(replaying):
+                os.replace(self.journal_path, replaying)
+
+    def _read_journal(self, path):
+        with open(path) as journal:
+            return [json_util.loads(line) for line in journal if line.strip()]
+
+    async def _replay(self):
+        replaying = self.journal_path + ".replay"
+        await asyncio.to_thread(self._take_journal, replaying)
+        documents = await asyncio.to_thread(self._read_journal, replaying)
+
+        for start in range(0, len(documents), self.flush_size):
+            batch = documents[start:start + self.flush_size]
+            if not await self._insert(batch):
+                await asyncio.to_thread(self._spill, documents[start:])
+                with self._journal_lock:
+                    self.spilled -= len(documents) - start  # not new spills, just put back
+                break
+            self.replayed += len(batch)
+        os.remove(replaying)
+
+crossing_sink = CrossingEventSink(
+    "data",
+    settings.EVENT_FLUSH_SIZE,
+    settings.EVENT_FLUSH_INTERVAL,
+    settings.EVENT_BUFFER_MAX,
+    settings.EVENT_WRITE_TIMEOUT,
+    os.path.join(settings.INSTANCE_FOLDER, "crossing_events.journal"),
+)
@@ -0,0 +1,143 @@
+import asyncio
+import time
+import cv2
+from app.config.settings import settings
+from app.helpers.minio_manager import MinioManager, IMAGE_FORMATS
+from app.helpers.pipeline_metrics import Histogram
+
+# -------------------------------------
+# 📤 Evidence Crops & Uploader
+# -------------------------------------
+
+def crop_evidence(image, bbox, margin: float = 0.25, max_width: int = 0):
+    """
+    Copy of the ``bbox`` region of ``image`` grown by ``margin`` of the box size
+    on each side, downscaled to ``max_width``; never a view of a pooled frame.
+    """
+    height, width = image.shape[:2]
+    x1, y1, x2, y2 = bbox
+    pad_x, pad_y = (x2 - x1) * margin, (y2 - y1) * margin
+    x1, y1 = max(0, int(x1 - pad_x)), max(0, int(y1 - pad_y))
+    x2, y2 = min(width, int(x2 + pad_x + 1)), min(height, int(y2 + pad_y + 1))
+    if x2 <= x1 or y2 <= y1:
+        return None
+    crop = image[y1:y2, x1:x2]
+    if max_width and crop.shape[1] > max_width:
+        size = (max_width, max(1, round(crop.shape[0] * max_width / crop.shape[1])))
+        return cv2.resize(crop, size, interpolation=cv2.INTER_AREA)
+    return crop.copy()
+
+def capture_evidence(image, states, margin: float = 0.25, max_width: int = 0):
+    """Store a crop of each track's new best sample on its ``TrackState``."""
+    for state in states:
+        state.best_evidence = crop_evidence(image, state.best_bbox, margin, max_width)
+
+class EvidenceUploader:
+    """
+    Background MinIO upload pipeline: a bounded queue drained by a pool of
+    workers. ``submit`` never waits; when the queue is full the frame is dropped
+    and counted, so object storage can never block the inference loop.
+
+    ``then`` is awaited with whether the upload succeeded once the item is
+    done (also for items still queued at shutdown), so crossing events only
+    reference evidence that exists in object storage.
+    """
+    def __init__(self, workers: int, queue_size: int, image_format: str, quality: int, max_width: int):
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported evidence image format: {image_format}")
+        self.worker_count = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.image_format = image_format
+        self.quality = quality
+        self.max_width = max_width
+        self.queue = None
+        self.workers = []
+        self.submitted = 0
+        self.uploaded = 0
+        self.dropped = 0
+        self.failed = 0
+        self.latency = Histogram()  # encode + MinIO put
+
+    def start(self):
+        if self.workers:
+            return
+        self.queue = asyncio.Queue(self.queue_size)
+        loop = asyncio.get_running_loop()
+        self.workers = [loop.create_task(self._worker()) for _ in range(self.worker_count)]
+
+    async def shutdown(self, timeout: float = 10.0):
+        """Give queued uploads a chance to finish, then stop the workers."""
+        if not self.workers:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Evidence uploader stopped with {self.queue.qsize()} frames pending.")
+            while not self.queue.empty():
+                frame_id, _, then = self.queue.get_nowait()
+                await self._notify(then, frame_id, False)
+                self.queue.task_done()
+        workers, self.workers = self.workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    def submit(self, frame_id, image, then=None) -> bool:
+        """Queue an upload; False (and ``then`` is never called) when the queue is full."""
+        if not self.workers:
+            self.start()
+        try:
+            self.queue.put_nowait((frame_id, image, then))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        return True
+
+    def metrics(self):
+        return {
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "queue_capacity": self.queue_size,
+            "submitted": self.submitted,
+            "uploaded": self.uploaded,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "upload": self.latency.snapshot(),
+        }
+
+    def _upload(self, frame_id, image):
+        data, extension, content_type = MinioManager.encode_frame(image, self.image_format, self.quality, self.max_width)
+        return MinioManager.put_frame(frame_id, data, extension, content_type)
+
+    async def _notify(self, then, frame_id, uploaded: bool):
+        if then is None:
+            return
+        try:
+            await then(uploaded)
+        except Exception as e:
+            print(f"❌ Evidence callback for {frame_id} failed: {e}")
+
+    async def _worker(self):
+        while True:
+            frame_id, image, then = await self.queue.get()
+            started = time.perf_counter()
+            uploaded = False
+            try:
+                await asyncio.to_thread(self._upload, frame_id, image)
+                uploaded = True
+                self.uploaded += 1
+                self.latency.observe(time.perf_counter() - started)
+            except Exception as e:
+                self.failed += 1
+                print(f"❌ Failed to upload evidence frame {frame_id}: {e}")
+            finally:
+                await self._notify(then, frame_id, uploaded)
+                self.queue.task_done()
+
+evidence_uploader = EvidenceUploader(
+    settings.EVIDENCE_UPLOAD_WORKERS,
+    settings.EVIDENCE_QUEUE_SIZE,
+    settings.EVIDENCE_IMAGE_FORMAT,
+    settings.EVIDENCE_IMAGE_QUALITY,
+    settings.EVIDENCE_MAX_WIDTH,
+)
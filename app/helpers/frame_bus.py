@@ -0,0 +1,101 @@
+import threading
+from app.helpers.stream_reader import DROP_OLDEST, FrameBuffer, StreamReader
+
+# -------------------------------------
+# 📡 Per-session Frame Bus
+# -------------------------------------
+
+class FrameBus:
+    """
+    One decoder per session, fanned out to any number of subscribers.
+
+    The decode thread is started by the first subscriber and stopped when the
+    last one leaves, so upstream connections and decode CPU stay constant no
+    matter how many viewers, snapshots and analytics pipelines are attached.
+    """
+    def __init__(self, stream_url: str, name: str = None, pool_size: int = 0, metrics=None):
+        self.stream_url = stream_url
+        self.name = name or stream_url
+        self.pool_size = pool_size
+        self.metrics = metrics  # decode/convert timings of the StreamReader
+        # Decode into shared-memory buffers (set when frames are published to another process)
+        self.shared = False
+        # ReconnectPolicy for the decoder (None: the bus closes when the stream ends)
+        self.reconnect = None
+        # DecodeOptions for the decoder (threading, frame skipping, decode-time scaling)
+        self.decode = None
+        self.subscribers = set()
+        self.latest = None
+        self.reader = None
+        # Optional callable(sink) -> reader; replaces the PyAV decoder, e.g. when
+        # the session runs in a worker process and shares frames through memory.
+        self.source_factory = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_live(self):
+        return self.reader is not None and self.reader.is_alive
+
+    def subscribe(self, maxsize: int = 1, policy: str = DROP_OLDEST) -> FrameBuffer:
+        """Attach a new bounded buffer; starts the decoder if it is not running."""
+        buffer = FrameBuffer(maxsize, policy)
+        with self._lock:
+            self.subscribers.add(buffer)
+            if not self.is_live:
+                self.latest = None
+                if self.source_factory is not None:
+                    self.reader = self.source_factory(self)
+                else:
+                    self.reader = StreamReader(self.stream_url, self, self.name, self.pool_size, self.shared, self.metrics, self.reconnect, self.decode)
+                self.reader.start()
+        return buffer
+
+    def stats(self):
+        """Connection state of the current decoder; totals come from the "reconnect" stage."""
+        reader = self.reader
+        outages = self.metrics.stages.get("reconnect") if self.metrics is not None else None
+        error = getattr(reader, "error", None)
+        return {
+            "live": self.is_live,
+            "connected": bool(getattr(reader, "connected", self.is_live)),
+            "attempt": getattr(reader, "attempt", 0),
+            "down_for": round(getattr(reader, "down_for", 0.0), 3),
+            "reconnects": outages.count if outages else 0,
+            "downtime": round(outages.sum, 3) if outages else 0.0,
+            "last_error": str(error) if error else None,
+        }
+
+    async def unsubscribe(self, buffer: FrameBuffer):
+        """Detach a buffer; stops the decoder once nobody is listening."""
+        buffer.close()
+        with self._lock:
+            self.subscribers.discard(buffer)
+            reader = self.reader if not self.subscribers else None
+            if reader is not None:
+                self.reader = None
+        if reader is not None:
+            await reader.stop()
+
+    # --- sink interface used by the StreamReader thread ---
+
+    def put(self, frame):
+        with self._lock:
+            if not self._is_current_reader():
+                return
+            self.latest = frame
+            subscribers = list(self.subscribers)
+        for buffer in subscribers:
+            buffer.put(frame)
+
+    def close(self):
+        with self._lock:
+            if not self._is_current_reader():
+                return
+            subscribers, self.subscribers = self.subscribers, set()
+            self.reader = None
+        for buffer in subscribers:
+            buffer.close()
+
+    def _is_current_reader(self):
+        # Ignore a previous decode thread that is still winding down.
+        return self.reader is not None and threading.current_thread() is self.reader.thread
@@ -0,0 +1,147 @@
+import os
+import threading
+import weakref
+from collections import deque
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+# -------------------------------------
+# ♻️ Reusable Frame Buffer Pool
+# -------------------------------------
+
+HEADER_FIELDS = 2  # latest published slot + 1 (0 = none), latest published stamp
+ALIGNMENT = 64
+
+def _layout(shape, capacity):
+    frame_bytes = int(np.prod(shape))
+    header_bytes = (HEADER_FIELDS + capacity) * 8
+    offset = -(-header_bytes // ALIGNMENT) * ALIGNMENT
+    return frame_bytes, offset, offset + frame_bytes * capacity
+
+def attach_shared_memory(name: str) -> SharedMemory:
+    """
+    Attach to a segment owned by another process. Before Python 3.13 attaching
+    also registers the segment with this process' resource tracker, which would
+    warn about it (or unlink it) when this process exits.
+    """
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = SharedMemory(name=name)
+        if os.name == "posix":
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+class FramePool:
+    """
+    Fixed set of preallocated BGR frame buffers recycled by the decode thread.
+
+    ``acquire`` hands out a fresh view of a free buffer; the buffer goes back to
+    the pool automatically once that view object is garbage collected, so every
+    stage (frame bus, analytics, preview, evidence) just keeps a reference to
+    the frame's ``image`` for as long as it needs it. Stages must not keep only
+    a slice of it: slices do not pin the buffer.
+
+    With ``shared=True`` the buffers live in one ``SharedMemory`` segment so a
+    worker process can publish frames to the API process by slot index.
+    """
+    def __init__(self, shape, capacity: int, shared: bool = False):
+        self.shape = tuple(shape)
+        self.capacity = max(1, capacity)
+        frame_bytes, offset, size = _layout(self.shape, self.capacity)
+        self.shm = SharedMemory(create=True, size=size) if shared else None
+        memory = self.shm.buf if shared else bytearray(size)
+        header = np.ndarray((HEADER_FIELDS + self.capacity,), dtype=np.uint64, buffer=memory)
+        header[:] = 0
+        self.header = header[:HEADER_FIELDS]
+        self.stamps = header[HEADER_FIELDS:]
+        self.buffers = np.ndarray((self.capacity,) + self.shape, dtype=np.uint8, buffer=memory, offset=offset)
+        self.free = deque(range(self.capacity))
+        self.pinned = deque(maxlen=2)
+        self.misses = 0
+        self.retired = False
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return self.shm.name if self.shm else None
+
+    @property
+    def in_use(self):
+        return self.capacity - len(self.free)
+
+    def acquire(self):
+        """Return (slot, image view), or (None, None) when every buffer is still in use."""
+        with self._lock:
+            if not self.free:
+                self.misses += 1
+                return None, None
+            slot = self.free.popleft()
+        self.stamps[slot] = 0  # contents about to change
+        image = self.buffers[slot].view()
+        weakref.finalize(image, self._release, slot)
+        return slot, image
+
+    def stamp(self, slot: int, index: int):
+        """Mark a filled buffer with its (non-zero) frame index."""
+        self.stamps[slot] = index
+
+    def publish(self, frame):
+        """Expose ``frame`` as the latest frame for readers in another process."""
+        self.pinned.append(frame.image)  # keep the last published buffers from being recycled
+        self.header[1] = int(self.stamps[frame.slot])
+        self.header[0] = frame.slot + 1
+
+    def retire(self):
+        """Stop using the pool; shared memory is released once all frames are returned."""
+        with self._lock:
+            self.retired = True
+            pinned = list(self.pinned)
+            self.pinned.clear()
+            idle = not self.in_use
+        if self.shm is not None:
+            self.shm.unlink()
+        if idle:
+            self._close()
+        # Dropping the last published views runs ``_release``, which takes the lock
+        del pinned
+
+    def _release(self, slot):
+        with self._lock:
+            self.free.append(slot)
+            closing = self.retired and not self.in_use
+        if closing:
+            self._close()
+
+    def _close(self):
+        if self.shm is not None and self.buffers is not None:
+            self.header = self.stamps = self.buffers = None
+            self.shm.close()
+
+class SharedFramePoolReader:
+    """Read-only view of a worker's shared ``FramePool`` in the API process."""
+    def __init__(self, name: str, shape, capacity: int):
+        self.name = name
+        self.shape = tuple(shape)
+        frame_bytes, offset, size = _layout(self.shape, capacity)
+        self.shm = attach_shared_memory(name)
+        header = np.ndarray((HEADER_FIELDS + capacity,), dtype=np.uint64, buffer=self.shm.buf)
+        self.header = header[:HEADER_FIELDS]
+        self.stamps = header[HEADER_FIELDS:]
+        self.buffers = np.ndarray((capacity,) + self.shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset)
+
+    def read_latest(self, last_stamp: int = 0):
+        """Copy out the latest published frame as (stamp, image), or None if nothing new/consistent."""
+        slot = int(self.header[0]) - 1
+        stamp = int(self.header[1])
+        if slot < 0 or stamp == last_stamp or int(self.stamps[slot]) != stamp:
+            return None
+        image = self.buffers[slot].copy()
+        if int(self.stamps[slot]) != stamp:
+            return None  # buffer was recycled while copying
+        return stamp, image
+
+    def close(self):
+        self.header = self.stamps = self.buffers = None
+        self.shm.close()
@@ -0,0 +1,157 @@
+import asyncio
+import time
+from ultralytics import YOLO
+from app.config.settings import settings
+from app.helpers.boxmot_tracking import BoxmotTracking
+from app.helpers.model_backends import resolve_detector_weights
+from app.helpers.pipeline_metrics import Histogram
+
+# -------------------------------------
+# 🧠 Shared YOLO Inference Engine
+# -------------------------------------
+
+class InferenceEngine:
+    """
+    Process-wide detector shared by every VideoSession.
+
+    Frames submitted by all running sessions are collected into micro-batches
+    (up to ``max_batch_size`` frames or ``max_wait_ms`` of waiting) and run
+    through a small pool of YOLO instances, one worker task per instance.
+    Each session may restrict detection to a region of interest and choose its
+    own input size; a batch runs one forward pass per distinct size.
+    """
+    def __init__(self, weights: str, pool_size: int, max_batch_size: int, max_wait_ms: float):
+        self.weights = weights
+        self.pool_size = max(1, pool_size)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.models = []
+        self.names = {}
+        self.queue = None
+        self.workers = []
+        self.batch_count = 0
+        self.frame_count = 0
+        self.latency = Histogram()  # one micro-batch forward pass
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_running(self):
+        return bool(self.workers)
+
+    async def start(self):
+        """Load the model pool once and spawn one batching worker per model."""
+        async with self._lock:
+            if self.workers:
+                return
+            if not self.models:
+                # Export/verify once (DETECTOR_BACKEND), then load the pool from the cached model
+                weights = await asyncio.to_thread(resolve_detector_weights, self.weights)
+                for _ in range(self.pool_size):
+                    self.models.append(await asyncio.to_thread(YOLO, weights, "detect"))
+                self.names = self.models[0].names
+                print(f"✅ Inference engine loaded {len(self.models)} x {weights}")
+            self.queue = asyncio.Queue()
+            loop = asyncio.get_running_loop()
+            self.workers = [loop.create_task(self._worker(model)) for model in self.models]
+
+    async def shutdown(self):
+        """Cancel batching workers, keeping the loaded models for a later start."""
+        workers, self.workers = self.workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    def metrics(self):
+        return {
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "batches": self.batch_count,
+            "frames": self.frame_count,
+            "avg_batch_size": round(self.frame_count / self.batch_count, 2) if self.batch_count else 0,
+            "predict": self.latency.snapshot(),
+        }
+
+    async def detect(self, frame, confidence: float, roi=None, imgsz: int = None):
+        """
+        Queue one frame for detection and wait for its own result.
+        Only the ``roi`` (x1, y1, x2, y2) window is letterboxed to ``imgsz``;
+        boxes are returned in full-frame coordinates, in the same array
+        format as ``BoxmotTracking.process_detections``.
+
+        The queued item keeps ``frame`` itself next to the ROI view: a slice
+        does not pin a pooled buffer, and the batch may still be reading it
+        after this coroutine was cancelled.
+        """
+        if not self.workers:
+            await self.start()
+        image = frame if roi is None else frame[roi[1]:roi[3], roi[0]:roi[2]]
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((image, confidence, future, imgsz or settings.INFERENCE_IMGSZ, frame))
+        detection = await future
+        if roi is not None and len(detection):
+            detection[:, [0, 2]] += roi[0]
+            detection[:, [1, 3]] += roi[1]
+        return detection
+
+    async def _collect_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return [item for item in batch if not item[2].cancelled()]
+
+    async def _worker(self, model):
+        while True:
+            batch = await self._collect_batch()
+            if not batch:
+                continue
+            started = time.perf_counter()
+            try:
+                detections = await asyncio.to_thread(self._predict, model, batch)
+                self.latency.observe(time.perf_counter() - started)
+            except Exception as e:
+                for _, _, future, _, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batch_count += 1
+            self.frame_count += len(batch)
+            for (_, _, future, _, _), detection in zip(batch, detections):
+                if not future.done():
+                    future.set_result(detection)
+
+    def _predict(self, model, batch):
+        # One forward pass per input size at the lowest requested threshold,
+        # then each session's own threshold is applied when filtering its result.
+        groups = {}
+        for index, item in enumerate(batch):
+            groups.setdefault(item[3], []).append(index)
+        detections = [None] * len(batch)
+        for imgsz, indices in groups.items():
+            results = model.predict(
+                [batch[index][0] for index in indices],
+                conf=min(batch[index][1] for index in indices),
+                imgsz=imgsz,
+                classes=settings.DETECTION_CLASSES,
+                verbose=False,
+            )
+            for index, result in zip(indices, results):
+                detections[index] = BoxmotTracking.filter_detections(result, batch[index][1])
+        return detections
+
+inference_engine = InferenceEngine(
+    settings.YOLO_WEIGHTS,
+    settings.INFERENCE_POOL_SIZE,
+    settings.INFERENCE_MAX_BATCH_SIZE,
+    settings.INFERENCE_MAX_WAIT_MS,
+)
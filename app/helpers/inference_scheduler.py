@@ -0,0 +1,150 @@
+import asyncio
+import os
+import time
+import cv2
+import numpy as np
+from app.config.settings import settings
+from app.helpers.motion_gate import MOTION_METHODS, OFF, MotionGate
+
+# -------------------------------------
+# ⏱️ Per-session Inference Scheduler
+# -------------------------------------
+
+MOTION_SIZE = (64, 36)  # tiny grayscale thumbnail used for motion energy
+
+class InferenceScheduler:
+    """
+    Decide, frame by frame, whether a session runs the detector or only the
+    tracker's motion prediction.
+
+    Detection runs every ``detect_every`` frames and at most ``target_fps``
+    times per second. In adaptive mode the interval is stretched (up to
+    ``max_interval``) when the scene is still or the machine is overloaded.
+
+    With a ``motion_gate``, a due detection is skipped while nothing moves in
+    the counting zones and no track is active, except once every
+    ``idle_interval`` seconds as a safety net.
+    """
+    def __init__(self, detect_every: int = 1, target_fps: float = 0, adaptive: bool = False,
+                 max_interval: int = 6, motion_threshold: float = 2.0, max_load: float = 0.85,
+                 motion_gate: MotionGate = None, idle_interval: float = 2.0):
+        self.detect_every = max(1, detect_every)
+        self.target_fps = target_fps or 0
+        self.adaptive = adaptive
+        self.max_interval = max(self.detect_every, max_interval)
+        self.motion_threshold = motion_threshold
+        self.max_load = max_load
+        self.motion_gate = motion_gate
+        self.idle_interval = idle_interval
+        self.interval = self.detect_every
+        self.since_detection = None
+        self.last_detection_time = None
+        self.motion_energy = 0.0
+        self.detected = 0
+        self.predicted = 0
+        self.motion_skipped = 0
+        self._previous_thumbnail = None
+        self._load = 0.0
+        self._load_checked = 0.0
+
+    @classmethod
+    def from_device(cls, device: dict, zone_set=None):
+        method = (device.get("motion_gate") or settings.MOTION_GATE).lower()
+        if method not in MOTION_METHODS:
+            print(f"⚠️ Unknown motion gate {method!r} for device {device.get('device_id')}, disabled")
+            method = OFF
+        motion_gate = None if method == OFF else MotionGate(
+            method,
+            settings.MOTION_GATE_WIDTH,
+            settings.MOTION_PIXEL_THRESHOLD,
+            settings.MOTION_MIN_AREA,
+            settings.MOTION_LINE_BAND,
+            zone_set,
+        )
+        adaptive = device.get("adaptive_inference")
+        return cls(
+            int(device.get("detect_every") or settings.INFERENCE_DETECT_EVERY),
+            float(device.get("analytics_fps") or settings.ANALYTICS_FPS),
+            str(settings.ADAPTIVE_INFERENCE if adaptive is None else adaptive).lower() not in ("false", "0", "no"),
+            settings.ADAPTIVE_MAX_INTERVAL,
+            settings.ADAPTIVE_MOTION_THRESHOLD,
+            settings.ADAPTIVE_MAX_LOAD,
+            motion_gate,
+            settings.MOTION_IDLE_INTERVAL,
+        )
+
+    async def should_detect(self, image, timestamp: float, active_tracks: int = 0) -> bool:
+        still = False
+        if self.adaptive or self.motion_gate is not None:
+            # Thumbnail diff and motion gate run off the event loop (resize, blur, absdiff/MOG2 per frame)
+            still = await asyncio.to_thread(self._analyse, image)
+
+        due = self.since_detection is None or self.since_detection + 1 >= self.interval
+        if due and self.target_fps and self.last_detection_time is not None:
+            # small tolerance so a 30 fps feed at target 10 fps detects exactly every 3rd frame
+            due = timestamp - self.last_detection_time >= 0.999 / self.target_fps
+        if due and still and not active_tracks and self.last_detection_time is not None \
+                and timestamp - self.last_detection_time < self.idle_interval:
+            due = False
+            self.motion_skipped += 1
+
+        if due:
+            self.since_detection = 0
+            self.last_detection_time = timestamp
+            self.detected += 1
+        else:
+            self.since_detection += 1
+            self.predicted += 1
+        return due
+
+    def stats(self):
+        total = self.detected + self.predicted
+        return {
+            "detect_every": self.detect_every,
+            "target_fps": self.target_fps,
+            "adaptive": self.adaptive,
+            "interval": self.interval,
+            "motion_energy": round(self.motion_energy, 2),
+            "detected": self.detected,
+            "predicted": self.predicted,
+            "detect_ratio": round(self.detected / total, 3) if total else 0,
+            "motion_gate": self.motion_gate.method if self.motion_gate else OFF,
+            "motion": round(self.motion_gate.motion, 4) if self.motion_gate else None,
+            "inferences_saved": self.motion_skipped,
+        }
+
+    def reset(self):
+        self.interval = self.detect_every
+        self.since_detection = None
+        self.last_detection_time = None
+        self._previous_thumbnail = None
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+
+    def _analyse(self, image) -> bool:
+        """Update the adaptive interval and the motion gate; True when the gate saw no motion."""
+        if self.adaptive:
+            self.interval = self._adaptive_interval(image)
+        # The background model sees every frame, even when no detection is due
+        return self.motion_gate is not None and not self.motion_gate.update(image)
+
+    def _adaptive_interval(self, image):
+        thumbnail = cv2.cvtColor(cv2.resize(image, MOTION_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        if self._previous_thumbnail is not None:
+            self.motion_energy = float(np.mean(cv2.absdiff(thumbnail, self._previous_thumbnail)))
+        self._previous_thumbnail = thumbnail
+
+        interval = self.detect_every
+        if self.motion_energy < self.motion_threshold:
+            interval *= 2
+        if self._cpu_load() > self.max_load:
+            interval *= 2
+        return min(interval, self.max_interval)
+
+    def _cpu_load(self):
+        # 1-minute load average per core, refreshed at most once per second.
+        now = time.monotonic()
+        if now - self._load_checked >= 1 and hasattr(os, "getloadavg"):
+            self._load = os.getloadavg()[0] / (os.cpu_count() or 1)
+            self._load_checked = now
+        return self._load
@@ -12,6 +12,14 @@ ACCESS_KEY = os.getenv("ACCESS_KEY")
 SECRET_KEY = os.getenv("SECRET_KEY")
 BUCKET_NAME = os.getenv("BUCKET_NAME")
 
+# format -> (extension, OpenCV quality flag, content type)
+IMAGE_FORMATS = {
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY, "image/webp"),
+    "jpg": (".jpg", cv2.IMWRITE_JPEG_QUALITY, "image/jpeg"),
+}
+if hasattr(cv2, "IMWRITE_AVIF_QUALITY"):  # OpenCV >= 4.11 built with libavif
+    IMAGE_FORMATS["avif"] = (".avif", cv2.IMWRITE_AVIF_QUALITY, "image/avif")
+
 # 📦 MinIO Client Singleton Class
 class MinIOClient:
     _instance = None
@@ -42,24 +50,38 @@ class MinioManager:
         else:
             print(f"✅ Bucket '{BUCKET_NAME}' already exists.")
     
-    async def save_frame_to_minio(frame, frame_id):
+    def encode_frame(frame, image_format="webp", quality=90, max_width=None):
         """
-        Saves a video frame to MinIO as WEBP format.
+        Encode a frame for storage, optionally downscaled to ``max_width``.
+        Returns (bytes, extension, content_type).
         """
-        _, buffer = cv2.imencode('.webp', frame, [cv2.IMWRITE_WEBP_QUALITY, 90])  # Convert frame to WEBP
-        image_bytes = io.BytesIO(buffer.tobytes())  # Convert to bytes
-        object_name = f"{frame_id}.webp"  # Unique file name
-
-        minio_client = MinIOClient().get_client()  # Get MinIO client instance
+        extension, quality_flag, content_type = IMAGE_FORMATS[image_format]
+        if max_width and frame.shape[1] > max_width:
+            height = max(1, round(frame.shape[0] * max_width / frame.shape[1]))
+            frame = cv2.resize(frame, (max_width, height), interpolation=cv2.INTER_AREA)
+        _, buffer = cv2.imencode(extension, frame, [quality_flag, quality])
+        return buffer.tobytes(), extension, content_type
 
-        # Upload to MinIO asynchronously
-        await asyncio.to_thread(
-            minio_client.put_object,
+    def put_frame(frame_id, data: bytes, extension: str, content_type: str):
+        """Blocking upload of already-encoded bytes; run it off the event loop."""
+        object_name = f"{frame_id}{extension}"
+        minio_client = MinIOClient().get_client()
+        minio_client.put_object(
             BUCKET_NAME,
             object_name,
-            image_bytes,
-            length=image_bytes.getbuffer().nbytes,
-            content_type="image/webp"
+            io.BytesIO(data),
+            length=len(data),
+            content_type=content_type
         )
+        return object_name
+
+    async def save_frame_to_minio(frame, frame_id):
+        """
+        Saves a video frame to MinIO as WEBP format.
+        """
+        data, extension, content_type = MinioManager.encode_frame(frame, "webp", 90)
+
+        # Upload to MinIO asynchronously
+        object_name = await asyncio.to_thread(MinioManager.put_frame, frame_id, data, extension, content_type)
 
-        print(f"✅ Frame {object_name} saved to MinIO.")
\ No newline at end of file
+        print(f"✅ Frame {object_name} saved to MinIO.")
@@ -0,0 +1,254 @@
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+import cv2
+import numpy as np
+import torch
+from ultralytics import YOLO
+from app.config.settings import settings
+from app.helpers.line_crossing import box_iou
+
+try:
+    from boxmot.appearance.reid_auto_backend import ReidAutoBackend
+except ImportError:  # boxmot >= 11 moved the ReID backends
+    from boxmot.appearance.reid.auto_backend import ReidAutoBackend
+
+# -------------------------------------
+# 🚀 Exported Model Backends (ONNX / OpenVINO)
+# -------------------------------------
+#
+# The detector and the ReID network are exported once per (weights, backend,
+# precision), cached under MODEL_CACHE_FOLDER and checked against the PyTorch
+# model. Ultralytics and boxmot pick their runtime from the file suffix, so the
+# rest of the pipeline just loads the returned path.
+#
+#   python -m app.helpers.model_backends   # export + verify ahead of deployment
+
+PYTORCH = "pytorch"
+ONNX = "onnx"
+OPENVINO = "openvino"
+BACKENDS = (PYTORCH, ONNX, OPENVINO)
+
+def _device():
+    return torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+def _cache_path(weights, backend: str, int8: bool) -> Path:
+    name = f"{Path(weights).stem}{'-int8' if int8 else ''}"
+    if backend == ONNX:
+        return Path(settings.MODEL_CACHE_FOLDER) / f"{name}.onnx"
+    return Path(settings.MODEL_CACHE_FOLDER) / f"{name}_openvino_model"
+
+def _report_path(path: Path) -> Path:
+    return path.with_name(path.name + ".parity.json")
+
+def _publish(source, target: Path):
+    """Move a finished export into the cache; another process may have won the race."""
+    try:
+        os.replace(source, target)
+    except OSError:
+        if not target.exists():
+            raise
+        if Path(source).is_dir():
+            shutil.rmtree(source, ignore_errors=True)
+        else:
+            os.remove(source)
+
+@contextmanager
+def _export_lock(target: Path):
+    """Exclusive lock on ``target`` across processes: worker shards resolve models concurrently."""
+    os.makedirs(target.parent, exist_ok=True)
+    with open(target.with_name(target.name + ".lock"), "a+") as handle:
+        if os.name == "nt":
+            import msvcrt
+
+            while True:
+                try:
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK gives up after ~10 s; keep waiting for the other export
+            try:
+                yield
+            finally:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+def _write_report(path: Path, report: dict):
+    scratch = path.with_name(path.name + f".{os.getpid()}.tmp")
+    scratch.write_text(json.dumps(report, indent=2))
+    os.replace(scratch, path)
+
+def _quantize_onnx(source: Path, target: Path):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(str(source), str(target), weight_type=QuantType.QUInt8)
+
+def _sample_images():
+    """Parity images: PARITY_IMAGE_FOLDER if set, otherwise the Ultralytics sample assets."""
+    folder = settings.PARITY_IMAGE_FOLDER
+    if not folder:
+        from ultralytics.utils import ASSETS
+        folder = ASSETS
+    paths = sorted(p for p in Path(folder).iterdir() if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+    images = [cv2.imread(str(p)) for p in paths[:16]]
+    return [image for image in images if image is not None]
+
+def _resolve(weights, backend, kind, export, verify):
+    backend = (backend or PYTORCH).lower()
+    if backend not in BACKENDS:
+        print(f"⚠️ Unknown {kind} backend {backend!r}, using {PYTORCH}")
+        return weights
+    if backend == PYTORCH:
+        return weights
+    target = _cache_path(weights, backend, settings.MODEL_INT8)
+    report_path = _report_path(target)
+    if not (target.exists() and report_path.exists()):
+        with _export_lock(target):
+            # Another process may have finished the export while we waited for the lock
+            if not (target.exists() and report_path.exists()):
+                try:
+                    export(weights, backend, settings.MODEL_INT8, target)
+                    report = verify(weights, target) if settings.MODEL_PARITY_CHECK else {"passed": True, "skipped": True}
+                except Exception as e:
+                    print(f"❌ Failed to export {kind} {weights} as {backend}: {e}")
+                    return weights
+                _write_report(report_path, report)
+    report = json.loads(report_path.read_text())
+    if not report.get("passed"):
+        print(f"⚠️ {kind} {target} failed the parity check ({report}), using {weights}")
+        return weights
+    return str(target)
+
+# --- detector ---
+
+def export_detector(weights, backend: str, int8: bool, target: Path):
+    """Export YOLO weights with Ultralytics (dynamic batch/size) in a scratch folder and move the result to ``target``."""
+    os.makedirs(target.parent, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=target.parent) as scratch:
+        source = Path(weights)
+        if source.exists():
+            source = Path(shutil.copy(source, scratch))  # Ultralytics writes the export next to the weights
+        model = YOLO(str(source))
+        if backend == OPENVINO:
+            options = {"int8": True, "data": settings.MODEL_INT8_DATA} if int8 else {}
+            _publish(model.export(format="openvino", dynamic=True, **options), target)
+            return
+        exported = model.export(format="onnx", dynamic=True)
+        if int8:
+            quantized = Path(scratch) / f"quantized-{target.name}"
+            _quantize_onnx(Path(exported), quantized)
+            exported = quantized
+        _publish(exported, target)
+
+def verify_detector(reference_weights, exported, confidence: float = 0.25):
+    """
+    Share of PyTorch detections the exported model reproduces (same class,
+    IoU >= 0.5) on the parity images, and the mean confidence drift.
+    """
+    reference, candidate = YOLO(reference_weights), YOLO(str(exported), task="detect")
+    matched = total = 0
+    drift = []
+    for image in _sample_images():
+        expected = reference.predict(image, conf=confidence, verbose=False)[0].boxes
+        actual = candidate.predict(image, conf=confidence, verbose=False)[0].boxes
+        total += len(expected)
+        if not len(expected) or not len(actual):
+            continue
+        overlap = box_iou(expected.xyxy.cpu().numpy(), actual.xyxy.cpu().numpy())
+        same_class = expected.cls.cpu().numpy()[:, None] == actual.cls.cpu().numpy()[None, :]
+        overlap = np.where(same_class, overlap, 0)
+        best = overlap.argmax(axis=1)
+        hits = overlap[np.arange(len(best)), best] >= 0.5
+        matched += int(hits.sum())
+        drift.extend(np.abs(expected.conf.cpu().numpy()[hits] - actual.conf.cpu().numpy()[best[hits]]).tolist())
+    recall = matched / total if total else 1.0
+    return {
+        "detections": total,
+        "recall": round(recall, 4),
+        "confidence_drift": round(float(np.mean(drift)), 4) if drift else 0.0,
+        "passed": recall >= settings.DETECTOR_PARITY_MIN_RECALL,
+    }
+
+def resolve_detector_weights(weights=None):
+    """Weights path for the configured DETECTOR_BACKEND, exporting and verifying it on first use."""
+    return _resolve(weights or settings.YOLO_WEIGHTS, settings.DETECTOR_BACKEND, "detector", export_detector, verify_detector)
+
+def load_detector(weights=None):
+    return YOLO(resolve_detector_weights(weights), task="detect")
+
+# --- ReID ---
+
+def export_reid(weights, backend: str, int8: bool, target: Path):
+    """Export the OSNet ReID network to ONNX (dynamic batch) and optionally on to OpenVINO IR."""
+    os.makedirs(target.parent, exist_ok=True)
+    backend_model = ReidAutoBackend(weights=Path(weights), device=torch.device("cpu"), half=False).get_backend()
+    network = backend_model.model.eval()
+    with tempfile.TemporaryDirectory(dir=target.parent) as scratch:
+        onnx_path = Path(scratch) / f"{Path(weights).stem}.onnx"
+        torch.onnx.export(
+            network, torch.zeros(1, 3, *backend_model.input_shape), str(onnx_path),
+            input_names=["images"], output_names=["output"],
+            dynamic_axes={"images": {0: "batch"}, "output": {0: "batch"}}, opset_version=17,
+        )
+        if backend == ONNX:
+            if int8:
+                quantized = onnx_path.with_name("quantized.onnx")
+                _quantize_onnx(onnx_path, quantized)
+                onnx_path = quantized
+            _publish(onnx_path, target)
+            return
+
+        import openvino as ov
+
+        ir_model = ov.convert_model(str(onnx_path))
+        if int8:
+            import nncf  # INT8 weight compression; activations stay in floating point
+
+            ir_model = nncf.compress_weights(ir_model)
+        ir_folder = Path(scratch) / target.name
+        ir_folder.mkdir()
+        ov.save_model(ir_model, str(ir_folder / f"{Path(weights).stem}.xml"))
+        _publish(ir_folder, target)
+
+def verify_reid(reference_weights, exported):
+    """Mean cosine similarity between PyTorch and exported embeddings of crops from the parity images."""
+    device = _device()
+    reference = ReidAutoBackend(weights=Path(reference_weights), device=device, half=False).get_backend()
+    candidate = ReidAutoBackend(weights=Path(exported), device=device, half=False).get_backend()
+    similarities = []
+    for image in _sample_images():
+        height, width = image.shape[:2]
+        boxes = np.array([
+            [0, 0, width // 2, height // 2],
+            [width // 4, height // 4, width * 3 // 4, height * 3 // 4],
+            [width // 2, height // 3, width, height],
+        ], dtype=float)
+        expected, actual = reference.get_features(boxes, image), candidate.get_features(boxes, image)
+        similarities.extend(np.sum(expected * actual, axis=1).tolist())
+    similarity = float(np.mean(similarities)) if similarities else 1.0
+    return {
+        "crops": len(similarities),
+        "cosine_similarity": round(similarity, 4),
+        "passed": similarity >= settings.REID_PARITY_MIN_SIMILARITY,
+    }
+
+def resolve_reid_weights(weights=None):
+    """Weights path for the configured REID_BACKEND, exporting and verifying it on first use."""
+    return _resolve(weights or settings.REID_WEIGHTS, settings.REID_BACKEND, "ReID", export_reid, verify_reid)
+
+if __name__ == "__main__":
+    for kind, resolve in (("detector", resolve_detector_weights), ("ReID", resolve_reid_weights)):
+        path = resolve()
+        report = _report_path(Path(path))
+        print(f"{kind}: {path}" + (f" {report.read_text()}" if report.exists() else ""))
@@ -1,7 +1,9 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+from datetime import datetime, timezone
 from bson import ObjectId
-from typing import List
+from pymongo import DESCENDING
+from typing import List, Optional, Tuple
 
 MONGO_URI = os.getenv("MONGO_URI")
 DATABASE_NAME = os.getenv("DATABASE_NAME")
@@ -23,9 +25,9 @@ class MongoDBClient:
 class MongoDBManager:
     def __init__(self):
         """
-        Initializes MongoDB connection.
+        Reuses the shared MongoDB connection.
         """
-        self.client = AsyncIOMotorClient(MONGO_URI)
+        self.client = MongoDBClient().client
         self.db = MongoDBClient().get_database()
         self.collection = self.db["data"]
 
@@ -36,33 +38,83 @@ class MongoDBManager:
         result = await self.collection.insert_one(data)
         return str(result.inserted_id)
 
-    async def find_all(self, user_id: str, skip: int, limit: int) -> List[dict]:
+    async def find_all(self, device_id: str = None, limit: int = 100, cursor: str = None) -> Tuple[List[dict], Optional[str]]:
         """
-        Fetches all documents for a user with pagination.
+        Fetches crossing events, newest first, one keyset page at a time.
         """
-        cursor = self.collection.find({"user_id": user_id}).skip(skip).limit(limit)
-        return [{**doc, "_id": str(doc["_id"])} async for doc in cursor]
+        return await self.find_events(device_id=device_id, limit=limit, cursor=cursor)
 
-    async def find_one(self, item_id: str, user_id: str) -> dict:
+    async def find_events(self, device_id: str = None, start: datetime = None, end: datetime = None, limit: int = 100, cursor: str = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        Crossing events in [start, end), newest first. Pages continue after the
+        (timestamp, _id) of the previous page's last event, encoded in the
+        returned cursor, so every page is an index range scan instead of a
+        ``skip()`` over all earlier rows. The cursor is None on the last page.
+        """
+        conditions = []
+        if device_id is not None:
+            conditions.append({"device_id": device_id})
+        if start is not None or end is not None:
+            conditions.append({"timestamp": {
+                **({"$gte": start} if start is not None else {}),
+                **({"$lt": end} if end is not None else {}),
+            }})
+        if cursor:
+            timestamp, last_id = decode_cursor(cursor)
+            conditions.append({"$or": [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "_id": {"$lt": last_id}},
+            ]})
+        query = {"$and": conditions} if conditions else {}
+        documents = await self.collection.find(query).sort([("timestamp", DESCENDING), ("_id", DESCENDING)]).limit(limit + 1).to_list(limit + 1)
+        next_cursor = encode_cursor(documents[limit - 1]) if len(documents) > limit else None
+        return [serialize(document) for document in documents[:limit]], next_cursor
+
+    async def find_one(self, item_id: str, user_id: str = None) -> dict:
         """
         Fetches a single document by ID.
         """
-        document = await self.collection.find_one({"_id": ObjectId(item_id), "user_id": user_id})
+        document = await self.collection.find_one(self._by_id(item_id, user_id))
         if document:
-            document["_id"] = str(document["_id"])
-            return document
+            return serialize(document)
         return None
 
-    async def update(self, item_id: str, user_id: str, update_data: dict) -> bool:
+    async def update(self, item_id: str, user_id: str = None, update_data: dict = None) -> bool:
         """
         Updates a document in MongoDB.
         """
-        result = await self.collection.update_one({"_id": ObjectId(item_id), "user_id": user_id}, {"$set": update_data})
+        result = await self.collection.update_one(self._by_id(item_id, user_id), {"$set": update_data or {}})
         return result.modified_count > 0
 
-    async def delete(self, item_id: str, user_id: str) -> bool:
+    async def delete(self, item_id: str, user_id: str = None) -> bool:
         """
         Deletes a document from MongoDB.
         """
-        result = await self.collection.delete_one({"_id": ObjectId(item_id), "user_id": user_id})
-        return result.deleted_count > 0
\ No newline at end of file
+        result = await self.collection.delete_one(self._by_id(item_id, user_id))
+        return result.deleted_count > 0
+
+    def _by_id(self, item_id: str, user_id: str = None) -> dict:
+        query = {"_id": ObjectId(item_id)}
+        if user_id is not None:
+            query["user_id"] = user_id
+        return query
+
+def encode_cursor(document: dict) -> str:
+    """Opaque page cursor: epoch milliseconds of the event and its ObjectId."""
+    timestamp = document["timestamp"].replace(tzinfo=document["timestamp"].tzinfo or timezone.utc)
+    return f"{round(timestamp.timestamp() * 1000)}_{document['_id']}"
+
+def decode_cursor(cursor: str):
+    try:
+        milliseconds, object_id = cursor.split("_", 1)
+        return datetime.fromtimestamp(int(milliseconds) / 1000, timezone.utc), ObjectId(object_id)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+def serialize(document: dict) -> dict:
+    """JSON friendly event: string ``_id`` and ISO (UTC) timestamps."""
+    document = {**document, "_id": str(document["_id"])}
+    timestamp = document.get("timestamp")
+    if isinstance(timestamp, datetime):
+        document["timestamp"] = timestamp.replace(tzinfo=timestamp.tzinfo or timezone.utc).isoformat()
+    return document
\ No newline at end of file
@@ -0,0 +1,90 @@
+import cv2
+import numpy as np
+from app.helpers.zone_geometry import LINE
+
+# -------------------------------------
+# 🌙 Zone-restricted Motion Gate
+# -------------------------------------
+
+OFF = "off"
+FRAME_DIFF = "diff"
+MOG2 = "mog2"
+MOTION_METHODS = (OFF, FRAME_DIFF, MOG2)
+
+class MotionGate:
+    """
+    Cheap "is anything moving near the counting zones?" test on a small
+    grayscale copy of each frame, using frame differencing or a MOG2
+    background model.
+
+    Motion is only measured inside the device's zones: polygons as drawn and
+    lines as a band of ``line_band`` (fraction of the frame height) around
+    them. Devices without zones use the whole frame.
+    """
+    def __init__(self, method: str = FRAME_DIFF, width: int = 160, pixel_threshold: int = 25,
+                 min_area: float = 0.002, line_band: float = 0.08, zone_set=None):
+        if method not in (FRAME_DIFF, MOG2):
+            raise ValueError(f"Unknown motion gate method: {method}")
+        self.method = method
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.min_area = min_area
+        self.line_band = line_band
+        self.zone_set = zone_set
+        self.motion = 0.0
+        self.mask = None
+        self.mask_area = 0
+        self.shape = None
+        self._previous = None
+        self._subtractor = None
+
+    def update(self, image) -> bool:
+        """Feed one frame; True when the moving share of the zone area reaches ``min_area``."""
+        height, width = image.shape[:2]
+        size = (self.width, max(1, round(height * self.width / width))) if width > self.width else (width, height)
+        small = cv2.cvtColor(cv2.resize(image, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        small = cv2.GaussianBlur(small, (5, 5), 0)
+        if self.shape != image.shape[:2]:
+            self._build_mask(image.shape[:2], small.shape)
+            self._previous, self._subtractor = None, None
+
+        if self.method == MOG2:
+            if self._subtractor is None:
+                self._subtractor = cv2.createBackgroundSubtractorMOG2(history=300, varThreshold=self.pixel_threshold, detectShadows=True)
+            moving = self._subtractor.apply(small) == 255  # shadows are marked 127
+        else:
+            if self._previous is None:
+                self._previous = small
+                self.motion = 1.0  # nothing to compare with yet: assume motion
+                return True
+            moving = cv2.absdiff(small, self._previous) > self.pixel_threshold
+            self._previous = small
+
+        if self.mask is not None:
+            moving &= self.mask
+        self.motion = float(np.count_nonzero(moving)) / self.mask_area
+        return self.motion >= self.min_area
+
+    def reset(self):
+        self.motion = 0.0
+        self.shape = None  # rebuild the mask, the zones may have been rescaled
+        self._previous = None
+        self._subtractor = None
+
+    def _build_mask(self, frame_shape, small_shape):
+        self.shape = frame_shape
+        zones = self.zone_set.zones if self.zone_set else []
+        if not zones:
+            self.mask, self.mask_area = None, small_shape[0] * small_shape[1]
+            return
+        scale = small_shape[1] / frame_shape[1]
+        mask = np.zeros(small_shape, dtype=np.uint8)
+        band = max(1, round(self.line_band * small_shape[0]))
+        for zone in zones:
+            points = (np.asarray(zone.points, dtype=np.float32) * scale).round().astype(np.int32)
+            if zone.kind == LINE:
+                cv2.line(mask, tuple(points[0]), tuple(points[1]), 1, band * 2)
+            else:
+                cv2.fillPoly(mask, [points], 1)
+        self.mask = mask.astype(bool)
+        self.mask_area = max(1, int(np.count_nonzero(self.mask)))
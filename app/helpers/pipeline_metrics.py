@@ -0,0 +1,176 @@
+import math
+import numbers
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# -------------------------------------
+# 📈 Pipeline Stage Metrics
+# -------------------------------------
+
+# Latency bucket upper bounds in seconds (Prometheus ``le`` labels)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _percentile(counts, count, q):
+    if not count:
+        return 0.0
+    rank, seen = q * count, 0
+    for bound, bucket in zip(BUCKETS, counts):
+        seen += bucket
+        if seen >= rank:
+            return bound
+    return BUCKETS[-1]
+
+class Histogram:
+    """Fixed-bucket latency histogram; safe to observe from decode/worker threads."""
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot: +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.counts[bisect_left(BUCKETS, seconds)] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile (seconds)."""
+        with self._lock:
+            counts, count = list(self.counts), self.count
+        return _percentile(counts, count, q)
+
+    def snapshot(self):
+        with self._lock:
+            counts, count, total = list(self.counts), self.count, self.sum
+        cumulative, seen = [], 0
+        for value in counts:
+            seen += value
+            cumulative.append(seen)
+        return {
+            "count": count,
+            "sum": round(total, 6),
+            "mean_ms": round(total / count * 1000, 3) if count else 0,
+            # from the same copy as ``buckets``: observe() may run meanwhile
+            "p50_ms": _percentile(counts, count, 0.5) * 1000,
+            "p95_ms": _percentile(counts, count, 0.95) * 1000,
+            "p99_ms": _percentile(counts, count, 0.99) * 1000,
+            "buckets": cumulative,
+        }
+
+class StageMetrics:
+    """
+    Per-stage latency histograms plus a frame rate over the last ``window``
+    seconds, for one session (or one shared service).
+    """
+    def __init__(self, window: float = 10.0):
+        self.window = window
+        self.stages = {}
+        self.frames = 0
+        self._window_start = time.monotonic()
+        self._window_frames = 0
+        self.fps = 0.0
+
+    def observe(self, stage: str, seconds: float):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages.setdefault(stage, Histogram())
+        histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def frame(self):
+        """Count one processed frame and refresh the windowed FPS."""
+        self.frames += 1
+        self._window_frames += 1
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed >= self.window:
+            self.fps = self._window_frames / elapsed
+            self._window_start, self._window_frames = now, 0
+
+    def snapshot(self):
+        return {
+            "frames": self.frames,
+            "fps": round(self.fps, 2),
+            "stages": {stage: histogram.snapshot() for stage, histogram in list(self.stages.items())},
+        }
+
+    def reset(self):
+        self.stages = {}
+        self.frames = 0
+        self.fps = 0.0
+        self._window_start = time.monotonic()
+        self._window_frames = 0
+
+# --- Prometheus text exposition ---
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _value(value):
+    """Sample value at full precision (``:g`` would turn large counters into 1.23457e+06)."""
+    if isinstance(value, numbers.Integral):
+        return str(int(value))
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+def _labels(labels: dict):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+class PrometheusWriter:
+    """Collects samples and renders them in the Prometheus text format (0.0.4)."""
+    def __init__(self, prefix: str = "cv"):
+        self.prefix = prefix
+        self.families = {}  # name -> (type, help, [lines])
+
+    def _family(self, name, kind, help_text):
+        name = f"{self.prefix}_{name}"
+        if name not in self.families:
+            self.families[name] = (kind, help_text, [])
+        return name, self.families[name][2]
+
+    def gauge(self, name, value, labels=None, help_text="", kind="gauge"):
+        if value is None:
+            return
+        name, lines = self._family(name, kind, help_text)
+        lines.append(f"{name}{_labels(labels)} {_value(value)}")
+
+    def counter(self, name, value, labels=None, help_text=""):
+        self.gauge(name, value, labels, help_text, "counter")
+
+    def histogram(self, name, snapshot, labels=None, help_text=""):
+        name, lines = self._family(name, "histogram", help_text)
+        labels = labels or {}
+        for bound, count in zip(BUCKETS, snapshot["buckets"]):
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': f'{bound:g}'})} {count}")
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {snapshot['count']}")
+        lines.append(f"{name}_sum{_labels(labels)} {_value(snapshot['sum'])}")
+        lines.append(f"{name}_count{_labels(labels)} {snapshot['count']}")
+
+    def stages(self, snapshot, labels=None):
+        for stage, histogram in snapshot.get("stages", {}).items():
+            self.histogram("stage_seconds", histogram, {**(labels or {}), "stage": stage}, "Pipeline stage latency")
+
+    def render(self) -> str:
+        output = []
+        for name, (kind, help_text, lines) in self.families.items():
+            if help_text:
+                output.append(f"# HELP {name} {help_text}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(lines)
+        return "\n".join(output) + "\n"
@@ -0,0 +1,102 @@
+import asyncio
+import cv2
+
+# -------------------------------------
+# 🖼️ Shared Preview Encoder
+# -------------------------------------
+
+def encode_webp(image, width: int, quality: int) -> bytes:
+    """Downscale to ``width`` (never upscale, 0 = native) and encode as WEBP."""
+    height, native_width = image.shape[:2]
+    if width and native_width > width:
+        size = (width, max(1, round(height * width / native_width)))
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    _, buffer = cv2.imencode('.webp', image, [cv2.IMWRITE_WEBP_QUALITY, quality])
+    return buffer.tobytes()
+
+class PreviewEncoder:
+    """
+    Encode each frame of a session's frame bus once, at preview resolution,
+    and share the encoded bytes with every connected HTTP viewer.
+
+    Viewers always receive the most recent encoded frame, so a slow client
+    (or one with a low FPS cap) skips frames instead of buffering them. Frames
+    are only encoded at the highest rate any connected viewer asked for.
+    """
+    def __init__(self, frame_bus, width: int, quality: int):
+        self.frame_bus = frame_bus
+        self.width = width
+        self.quality = quality
+        self.viewers = 0
+        self.caps = []  # FPS cap of each connected viewer (0 = uncapped)
+        self.encoded = None
+        self.sequence = 0
+        self.task = None
+        self._condition = asyncio.Condition()
+
+    @property
+    def max_fps(self) -> float:
+        """Highest FPS cap among the viewers (0 = at least one is uncapped)."""
+        if not self.caps or 0 in self.caps:
+            return 0
+        return max(self.caps)
+
+    def encode(self, image):
+        return encode_webp(image, self.width, self.quality)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        buffer = self.frame_bus.subscribe(1)
+        next_at = 0.0
+        try:
+            while True:
+                frame = await buffer.get()
+                if frame is None:
+                    break
+                fps = self.max_fps
+                if fps:
+                    now = loop.time()
+                    if now < next_at:
+                        continue  # no viewer wants this frame
+                    next_at = max(next_at + 1 / fps, now)
+                encoded = await asyncio.to_thread(self.encode, frame.image)
+                async with self._condition:
+                    self.encoded = encoded
+                    self.sequence += 1
+                    self._condition.notify_all()
+        finally:
+            await self.frame_bus.unsubscribe(buffer)
+            async with self._condition:
+                if self.task is asyncio.current_task():
+                    self.task = None
+                self._condition.notify_all()
+
+    async def stream(self, fps: float):
+        """Yield encoded frames for one viewer, capped at ``fps`` (0 = uncapped)."""
+        loop = asyncio.get_running_loop()
+        cap = fps if fps and fps > 0 else 0
+        interval = 1 / cap if cap else 0
+        last_sequence = self.sequence
+        self.viewers += 1
+        self.caps.append(cap)
+        if self.task is None:
+            self.task = loop.create_task(self._run())
+        try:
+            while True:
+                async with self._condition:
+                    await self._condition.wait_for(lambda: self.sequence != last_sequence or self.task is None)
+                    if self.sequence == last_sequence:
+                        break  # encoder stopped (stream ended)
+                    last_sequence = self.sequence
+                    encoded = self.encoded
+
+                sent_at = loop.time()
+                yield encoded
+                if interval:
+                    await asyncio.sleep(max(0, sent_at + interval - loop.time()))
+        finally:
+            self.viewers -= 1
+            self.caps.remove(cap)
+            if self.viewers == 0 and self.task is not None:
+                task, self.task = self.task, None
+                task.cancel()
@@ -0,0 +1,171 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+import numpy as np
+import torch
+from app.config.settings import settings
+from app.helpers.line_crossing import box_iou
+from app.helpers.model_backends import ReidAutoBackend, resolve_reid_weights
+
+# -------------------------------------
+# 🧬 Shared ReID Feature Service
+# -------------------------------------
+
+class ReidService:
+    """
+    Process-wide appearance-feature extractor shared by every session's tracker.
+
+    Trackers call ``get_features`` from their own threads; crops are cut in the
+    calling thread, then a single batching thread concatenates the crops of all
+    waiting callers (up to ``max_batch_size`` crops or ``max_wait_ms``) into one
+    forward pass of one ReID network.
+    """
+    def __init__(self, weights: str, max_batch_size: int, max_wait_ms: float, cache_iou: float, cache_max_age: int):
+        self.weights = Path(weights)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.cache_iou = cache_iou
+        self.cache_max_age = cache_max_age
+        self.backend = None
+        self.requests = queue.Queue()
+        self.thread = None
+        self.batch_count = 0
+        self.crop_count = 0
+        self.cache_hits = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Load the ReID network once and start the batching thread."""
+        with self._lock:
+            if self.backend is None:
+                device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+                weights = Path(resolve_reid_weights(str(self.weights)))
+                self.backend = ReidAutoBackend(weights=weights, device=device, half=False).get_backend()
+                print(f"✅ ReID service loaded {weights} on {device}")
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="reid-batcher", daemon=True)
+                self.thread.start()
+
+    def shutdown(self):
+        """Stop the batching thread, keeping the loaded network for a later start."""
+        thread, self.thread = self.thread, None
+        if thread is not None:
+            self.requests.put(None)
+            thread.join(5)
+
+    def extractor(self):
+        """Per-tracker feature extractor with its own stationary-box cache."""
+        self.start()
+        return ReidExtractor(self)
+
+    def get_features(self, xyxys, img):
+        """Blocking: L2-normalized embeddings for ``xyxys`` boxes cut from ``img``."""
+        if not len(xyxys):
+            return np.array([])
+        if self.thread is None:
+            self.start()
+        crops = self.backend.get_crops(xyxys, img)
+        future = Future()
+        self.requests.put((crops, future))
+        return future.result()
+
+    def metrics(self):
+        return {
+            "batches": self.batch_count,
+            "crops": self.crop_count,
+            "cache_hits": self.cache_hits,
+            "avg_batch_size": round(self.crop_count / self.batch_count, 2) if self.batch_count else 0,
+        }
+
+    def _collect_batch(self, first):
+        batch, size = [first], len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            try:
+                item = self.requests.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                self.requests.put(None)  # let the run loop see the shutdown
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            first = self.requests.get()
+            if first is None:
+                return
+            batch = self._collect_batch(first)
+            try:
+                features = self._embed(torch.cat([crops for crops, _ in batch]))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batch_count += 1
+            start = 0
+            for crops, future in batch:
+                future.set_result(features[start:start + len(crops)])
+                start += len(crops)
+            self.crop_count += start
+
+    @torch.no_grad()
+    def _embed(self, crops):
+        crops = self.backend.inference_preprocess(crops)
+        features = self.backend.inference_postprocess(self.backend.forward(crops))
+        return features / np.linalg.norm(features, axis=-1, keepdims=True)
+
+class ReidExtractor:
+    """
+    Drop-in for a tracker's ReID model (``get_features(xyxys, img)``).
+
+    A box that overlaps the same camera's box from the previous detection by at
+    least ``cache_iou`` belongs to a stationary object, so its embedding is
+    reused instead of recomputed — for at most ``cache_max_age`` detections in
+    a row before it is refreshed.
+    """
+    def __init__(self, service: ReidService):
+        self.service = service
+        self.boxes = np.empty((0, 4))
+        self.features = None
+        self.ages = np.empty(0, dtype=int)
+
+    def get_features(self, xyxys, img):
+        xyxys = np.asarray(xyxys, dtype=float).reshape(-1, 4)
+        if not len(xyxys):
+            return np.array([])  # prediction-only frame; keep the cache for the next detection
+
+        cached = np.full(len(xyxys), -1)
+        if self.features is not None and len(self.boxes) and self.service.cache_iou < 1:
+            overlap = box_iou(xyxys, self.boxes)
+            best = overlap.argmax(axis=1)
+            hits = (overlap[np.arange(len(xyxys)), best] >= self.service.cache_iou) & (self.ages[best] < self.service.cache_max_age)
+            cached[hits] = best[hits]
+
+        missing = np.flatnonzero(cached < 0)
+        fresh = self.service.get_features(xyxys[missing], img) if len(missing) else None
+        reused = len(xyxys) - len(missing)
+        self.service.cache_hits += reused
+
+        dimension = fresh.shape[1] if fresh is not None else self.features.shape[1]
+        features = np.empty((len(xyxys), dimension), dtype=np.float32)
+        ages = np.zeros(len(xyxys), dtype=int)
+        if reused:
+            features[cached >= 0] = self.features[cached[cached >= 0]]
+            ages[cached >= 0] = self.ages[cached[cached >= 0]] + 1
+        if fresh is not None:
+            features[missing] = fresh
+        self.boxes, self.features, self.ages = xyxys, features, ages
+        return features
+
+reid_service = ReidService(
+    settings.REID_WEIGHTS,
+    settings.REID_MAX_BATCH_SIZE,
+    settings.REID_MAX_WAIT_MS,
+    settings.REID_CACHE_IOU,
+    settings.REID_CACHE_MAX_AGE,
+)
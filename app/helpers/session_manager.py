@@ -2,9 +2,12 @@
 # 🛠️ SessionManager for All Sessions
 # -------------------------------------
 
-import json
 from fastapi.responses import JSONResponse
+from app.config.settings import settings
 from app.helpers.video_sessions import VideoSession
+from app.helpers.session_workers import session_workers
+from app.helpers.snapshot_cache import snapshot_cache
+from app.helpers.zone_geometry import parse_points
 
 class SessionManager:
     def __init__(self):
@@ -18,14 +21,12 @@ class SessionManager:
         # vertical_line_points = ((640, 0), (640, 720))  # Define vertical line points
         # horizontal_line_points = ((0, 360), (1280, 360))  # Define horizontal line points
         for source in sources:
-            data_horizontal_line_points = json.loads(source['horizontal_line_points'])
-            data_vertical_line_points = json.loads(source['vertical_line_points'])
-            result_vertical = tuple((item["x"], item["y"]) for item in data_vertical_line_points)
-            result_horizontal = tuple((item["x"], item["y"]) for item in data_horizontal_line_points)
+            result_vertical = tuple(parse_points(source.get('vertical_line_points')))
+            result_horizontal = tuple(parse_points(source.get('horizontal_line_points')))
             if self.get_session_by_device_id(source["device_id"]):
                 """already initialized. Skipping."""
                 continue
-            session = VideoSession(source["source"],source["device_id"],source["device_name"],result_horizontal,result_vertical)
+            session = VideoSession(source["source"],source["device_id"],source["device_name"],result_horizontal,result_vertical,source)
             self.sessions[session.session_id] = session
         print(f"Initialized {len(self.sessions)} sessions.")
 
@@ -36,19 +37,24 @@ class SessionManager:
         return None
     
     def list_sessions(self):
-        return [
-            {
+        sessions = []
+        for session in self.sessions.values():
+            stats = session.stats()
+            sessions.append({
                 "session_id": session.session_id,
                 "device_id": session.device_id,
                 "device_name": session.device_name,
                 "stream_url": session.stream_url,
                 "frame_count": session.frame_count,
+                "inference": stats.get("inference"),
+                "metrics": stats.get("pipeline"),
+                "queues": stats.get("queues"),
+                "worker": session.worker_status.get("shard") if session.worker_status else None,
                 "status": session.is_running
-            }
-            for session in self.sessions.values()
-        ]
+            })
+        return sessions
 
-    async def video_feed(self, session_id):
+    async def video_feed(self, session_id, fps=None):
         """
         Start a specific session by session_id.
         """
@@ -56,38 +62,49 @@ class SessionManager:
 
         if not session:
             return "Session not found"
-        return VideoSession.video_feed(session)
+        return VideoSession.video_feed(session, fps)
     
     async def single_video_feed(self, session_id):
         """
-        Start a specific session by session_id.
+        Latest snapshot of a session from the snapshot cache (None if the session does not exist).
         """
         session = self.sessions.get(session_id)
 
         if not session:
-            return "Session not found"
-        return await VideoSession.get_single_frame(session)
+            return None
+        return await snapshot_cache.get(session)
     
+    def zone_counts(self, session_id):
+        """
+        In-memory per-zone counters of a session (no MongoDB query).
+        """
+        session = self.sessions.get(session_id)
+
+        if not session:
+            return None
+        return {
+            "session_id": session.session_id,
+            "device_id": session.device_id,
+            "zones": session.stats().get("zones", {})
+        }
+
     async def start_session(self, session_id):
         """
         Start a specific session by session_id.
         """
         session = self.sessions.get(session_id)
         
-        if not session.horizontal_line_points:
-            return JSONResponse({"error": "horizontal_line_points is invalid, please fill it in first in the settings menu"},status_code=400)
-        
-        if not session.vertical_line_points:
-            return JSONResponse({"error": "vertical_line_points is invalid, please fill it in first in the settings menu"},status_code=400)
-        
         if not session:
             return JSONResponse({"error": "Session not found"},status_code=404)
         
+        if not session.zone_set:
+            return JSONResponse({"error": "No counting lines or zones configured, please fill in horizontal_line_points, vertical_line_points or zones first in the settings menu"},status_code=400)
+        
         if session.is_running:
             return JSONResponse({"error": "Session is already running"},status_code=302)
         
         if session and not session.is_running:
-            await session.start()
+            await self._start(session)
             return JSONResponse({"session_id": session_id, "status": "Started", "messages":"Started"},status_code=200)
         
         return JSONResponse({"error": "Session not found or already running"},status_code=302)
@@ -102,7 +119,7 @@ class SessionManager:
             return {"error": "Session is already Stopped"}
         
         if session and session.is_running:
-            await session.stop()
+            await self._stop(session)
             return {"session_id": session_id, "status": "Stopped"}
         
         return {"error": "Session not found or already running"}
@@ -110,7 +127,19 @@ class SessionManager:
     async def clear_sesions(self):
         for session in self.sessions.values():
             if session.is_running:
-                await session.stop()
+                await self._stop(session)
+
+    async def _start(self, session):
+        if settings.SESSION_EXECUTION_MODE == "process":
+            await session_workers.start(session)
+        else:
+            await session.start()
+
+    async def _stop(self, session):
+        if session.session_id in session_workers.sessions:
+            await session_workers.stop(session)
+        else:
+            await session.stop()
                 
 # Initialize SessionManager
 session_manager = SessionManager()
\ No newline at end of file
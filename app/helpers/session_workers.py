@@ -0,0 +1,312 @@
+import asyncio
+import multiprocessing
+import queue
+import time
+from app.config.settings import settings
+from app.helpers.boxmot_tracking import BoxmotTracking
+from app.helpers.event_sink import to_document
+from app.helpers.evidence_uploader import evidence_uploader
+from app.helpers.inference_engine import inference_engine
+from app.helpers.reid_service import reid_service
+from app.helpers.shared_frames import SharedFrameSource
+from app.helpers.stream_reader import ReconnectPolicy
+from app.helpers.websocket_manager import websocket_manager
+
+# -------------------------------------
+# 🏭 Multi-process Session Workers
+# -------------------------------------
+#
+# Each shard is its own process hosting any number of sessions with their own
+# decode, YOLO and tracker. The API process sends start/stop commands per
+# shard and receives status, crossing events, the shard's shared-service
+# metrics and the shared-memory frame pool of each session on one result
+# queue. Frames are published by slot index, never copied between processes
+# by the worker.
+
+# --- worker process side ---
+
+def run_shard(shard_index, commands, results):
+    """Process entry point: host a shard of sessions until told to shut down."""
+    asyncio.run(_serve_shard(shard_index, commands, results))
+
+def _crossing_forwarder(session_id, results):
+    async def report(data):
+        results.put(("crossing", session_id, to_document(data)))
+    return report
+
+def _frame_publisher(session_id, pools, results):
+    def publish(frame):
+        pool = frame.pool
+        if pool is None or pool.name is None:
+            return  # pool exhausted, frame was allocated outside shared memory
+        if pools.get(session_id) is not pool:
+            pools[session_id] = pool
+            results.put(("frame_pool", session_id, pool.name, pool.shape, pool.capacity))
+        pool.publish(frame)
+    return publish
+
+def service_metrics():
+    """Metrics of the process-wide services shared by a process' sessions."""
+    return {
+        "inference": inference_engine.metrics(),
+        "reid": reid_service.metrics(),
+        "evidence": evidence_uploader.metrics(),
+    }
+
+async def _report_status(shard_index, sessions, pools, results):
+    while True:
+        await asyncio.sleep(settings.SESSION_STATUS_INTERVAL)
+        results.put(("metrics", shard_index, to_document(service_metrics())))
+        for session_id, session in list(sessions.items()):
+            results.put(("status", session_id, to_document(session.stats())))
+            if not session.is_running:
+                # Stream ended or pipeline failed inside the worker
+                sessions.pop(session_id, None)
+                pools.pop(session_id, None)
+                results.put(("stopped", session_id))
+
+async def _serve_shard(shard_index, commands, results):
+    from app.helpers.video_sessions import VideoSession
+
+    sessions, pools = {}, {}
+    status_task = asyncio.get_running_loop().create_task(_report_status(shard_index, sessions, pools, results))
+    print(f"🏭 Session worker shard {shard_index} ready.")
+    try:
+        while True:
+            command = await asyncio.to_thread(commands.get)
+            action, session_id = command[0], command[1] if len(command) > 1 else None
+            if action == "start":
+                config = command[2]
+                session = VideoSession(
+                    config["stream_url"], config["device_id"], config["device_name"],
+                    config["horizontal_line_points"], config["vertical_line_points"], config["options"],
+                )
+                session.session_id = session_id
+                session.report_crossing = _crossing_forwarder(session_id, results)
+                session.frame_publisher = _frame_publisher(session_id, pools, results)
+                session.frame_bus.shared = True
+                sessions[session_id] = session
+                await session.start()
+            elif action == "stop":
+                session = sessions.pop(session_id, None)
+                if session is not None:
+                    await session.stop()
+                pools.pop(session_id, None)
+            elif action == "shutdown":
+                break
+    finally:
+        status_task.cancel()
+        for session in sessions.values():
+            await session.stop()
+        await evidence_uploader.shutdown()  # queued uploads still report their crossings
+
+# --- API process side ---
+
+class SessionWorkerPool:
+    """
+    Run VideoSessions in worker processes and mirror their state on the API side.
+
+    Every shard is a separate process watched by a supervisor task: when one
+    exits unexpectedly (e.g. a decoder or model crash) only its sessions are
+    interrupted. The shard is restarted after a ``restart`` backoff delay
+    (reset once it stayed up for ``max_delay``) and its sessions are started
+    on it again, while the other shards keep running.
+    """
+    def __init__(self, processes: int, restart: ReconnectPolicy = None):
+        self.processes = max(1, processes)
+        self.restart = restart or ReconnectPolicy(1, 60)
+        self.context = multiprocessing.get_context("spawn")
+        self.manager = None
+        self.results = None
+        self.shards = {}  # shard index -> {"process", "commands", "sessions", "started", "crashes", "restarts"}
+        self.sessions = {}  # session_id -> (VideoSession, shard index)
+        self.shard_metrics = {}  # shard index -> last service_metrics() of the shard
+        self.pump_task = None
+        self.supervisor_task = None
+        self.closing = False
+
+    def _ensure_started(self):
+        if self.manager is None:
+            self.manager = self.context.Manager()
+            self.results = self.manager.Queue()
+        loop = asyncio.get_running_loop()
+        if self.pump_task is None:
+            self.pump_task = loop.create_task(self._pump())
+        if self.supervisor_task is None:
+            self.supervisor_task = loop.create_task(self._supervise())
+
+    def _spawn(self, index):
+        shard = self.shards.setdefault(index, {"sessions": set(), "crashes": 0, "restarts": 0})
+        shard["commands"] = self.manager.Queue()  # fresh queue: a dead shard's commands are not replayed
+        shard["process"] = self.context.Process(
+            target=run_shard, args=(index, shard["commands"], self.results), name=f"session-shard-{index}", daemon=True,
+        )
+        shard["process"].start()
+        shard["started"] = time.monotonic()
+        return shard
+
+    def _assign_shard(self):
+        index = min(range(self.processes), key=lambda i: len(self.shards[i]["sessions"]) if i in self.shards else 0)
+        if index not in self.shards:
+            self._spawn(index)
+        return index
+
+    async def start(self, session):
+        self._ensure_started()
+        index = self._assign_shard()
+        session.is_running = True
+        session.frame_count = 0
+        session.worker_status = {"shard": index}
+        session.shared_pool = (None, None, None)
+        session.frame_bus.source_factory = lambda sink: SharedFrameSource(
+            lambda: session.shared_pool, sink, settings.SHARED_FRAME_FPS, session.device_name
+        )
+        self.shards[index]["sessions"].add(session.session_id)
+        self.sessions[session.session_id] = (session, index)
+        if self.shards[index].get("process") is not None:
+            await asyncio.to_thread(self.shards[index]["commands"].put, ("start", session.session_id, session.config()))
+        # else: the shard is waiting to restart and starts its sessions when it is back
+
+    async def stop(self, session):
+        entry = self.sessions.get(session.session_id)
+        if entry is None:
+            return
+        shard = self.shards.get(entry[1])
+        self._detach(session.session_id)
+        if shard is not None and shard.get("process") is not None:
+            await asyncio.to_thread(shard["commands"].put, ("stop", session.session_id))
+
+    async def shutdown(self, timeout: float = 10.0):
+        self.closing = True
+        if self.supervisor_task is not None:
+            self.supervisor_task.cancel()
+            await asyncio.gather(self.supervisor_task, return_exceptions=True)
+            self.supervisor_task = None
+        processes = [shard["process"] for shard in self.shards.values() if shard.get("process") is not None]
+        for shard in self.shards.values():
+            if shard.get("process") is not None:
+                await asyncio.to_thread(shard["commands"].put, ("shutdown",))
+        for process in processes:
+            await asyncio.to_thread(process.join, timeout)
+            if process.is_alive():
+                print(f"⚠️ Session worker {process.name} did not stop, terminating.")
+                process.terminate()
+        if self.pump_task is not None:
+            self.pump_task.cancel()
+            await asyncio.gather(self.pump_task, return_exceptions=True)
+            self.pump_task = None
+        if self.manager is not None:
+            self.manager.shutdown()
+            self.manager = None
+        self.shards.clear()
+        self.shard_metrics.clear()
+        self.closing = False
+
+    def metrics(self):
+        """Shared-service metrics per shard, plus the shard's restart count."""
+        return {
+            index: {**self.shard_metrics.get(index, {}), "restarts": shard["restarts"], "alive": shard.get("process") is not None}
+            for index, shard in self.shards.items()
+        }
+
+    def _detach(self, session_id, error: str = None):
+        entry = self.sessions.pop(session_id, None)
+        if entry is None:
+            return
+        session, index = entry
+        session.is_running = False
+        session.shared_pool = None
+        session.frame_bus.source_factory = None
+        if error:
+            session.worker_status = {**(session.worker_status or {}), "is_running": False, "error": error}
+        if index in self.shards:
+            self.shards[index]["sessions"].discard(session_id)
+
+    async def _supervise(self):
+        while True:
+            await asyncio.sleep(0.5)
+            for index, shard in list(self.shards.items()):
+                process = shard.get("process")
+                if process is not None and not process.is_alive():
+                    self._on_shard_exit(index, shard)
+
+    def _on_shard_exit(self, index, shard):
+        process, shard["process"] = shard["process"], None
+        self.shard_metrics.pop(index, None)
+        if self.closing:
+            return
+        if not shard["sessions"]:
+            del self.shards[index]  # idle shard; spawned again on demand
+            return
+        if time.monotonic() - shard["started"] >= self.restart.max_delay:
+            shard["crashes"] = 0
+        delay = self.restart.delay(shard["crashes"])
+        shard["crashes"] += 1
+        print(f"❌ Session worker shard {index} exited with code {process.exitcode}, restarting in {delay:.1f} s "
+              f"({len(shard['sessions'])} sessions).")
+        for session_id in shard["sessions"]:
+            session = self.sessions[session_id][0]
+            session.shared_pool = (None, None, None)  # the dead shard's frame pool is gone
+            session.worker_status = {**(session.worker_status or {}), "error": f"worker exited with code {process.exitcode}", "restarting": True}
+        asyncio.get_running_loop().create_task(self._restart(index, delay))
+
+    async def _restart(self, index, delay):
+        await asyncio.sleep(delay)
+        shard = self.shards.get(index)
+        if self.closing or shard is None or shard.get("process") is not None:
+            return
+        if not shard["sessions"]:
+            del self.shards[index]
+            return
+        shard = self._spawn(index)
+        shard["restarts"] += 1
+        for session_id in list(shard["sessions"]):
+            session = self.sessions[session_id][0]
+            session.worker_status = {"shard": index}
+            await asyncio.to_thread(shard["commands"].put, ("start", session_id, session.config()))
+
+    def _next_message(self):
+        try:
+            return self.results.get(timeout=0.5)
+        except queue.Empty:
+            return None
+
+    async def _pump(self):
+        while True:
+            try:
+                message = await asyncio.to_thread(self._next_message)
+            except (EOFError, OSError):
+                return  # manager went away (shutdown)
+            if message is None:
+                continue
+            kind, session_id = message[0], message[1]
+            if kind == "metrics":
+                if message[1] in self.shards:
+                    self.shard_metrics[message[1]] = message[2]
+                continue
+            entry = self.sessions.get(session_id)
+            if entry is None:
+                continue
+            session = entry[0]
+            try:
+                if kind == "status":
+                    session.worker_status = {**message[2], "shard": entry[1]}
+                    session.frame_count = message[2].get("frame_count", session.frame_count)
+                    websocket_manager.publish(session.topic, {
+                        "session_id": session.session_id,
+                        "frame_number": session.frame_count,
+                        "status": "Running"
+                    }, coalesce="progress")
+                elif kind == "crossing":
+                    await BoxmotTracking.report_crossing(message[2])
+                elif kind == "frame_pool":
+                    session.shared_pool = (message[2], tuple(message[3]), message[4])
+                elif kind == "stopped":
+                    self._detach(session_id)
+            except Exception as e:
+                print(f"❌ Failed to handle worker message {kind} for {session_id}: {e}")
+
+session_workers = SessionWorkerPool(
+    settings.SESSION_WORKER_PROCESSES,
+    ReconnectPolicy(settings.SESSION_WORKER_RESTART_DELAY, settings.SESSION_WORKER_RESTART_MAX_DELAY),
+)
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+from app.helpers.frame_pool import SharedFramePoolReader
+from app.helpers.stream_reader import DecodedFrame
+
+# -------------------------------------
+# 🧩 Shared-memory Frame Source
+# -------------------------------------
+
+class SharedFrameSource:
+    """
+    Frame-bus source that polls a worker's shared frame pool instead of decoding.
+    ``pool_info`` returns the current (name, shape, capacity) — (None, None,
+    None) until the worker published its first frame — or None once the worker
+    stopped. Same interface as ``StreamReader``.
+    """
+    def __init__(self, pool_info, sink, fps: float, name: str = None):
+        self.pool_info = pool_info
+        self.sink = sink
+        self.interval = 1 / fps if fps > 0 else 0.04
+        self.name = name
+        self.frame_count = 0
+        self.error = None
+        self.thread = None
+        self._stop = threading.Event()
+
+    @property
+    def is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run, name=f"shared-{self.name}", daemon=True)
+        self.thread.start()
+
+    async def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self.thread is not None:
+            await asyncio.to_thread(self.thread.join, timeout)
+
+    def _run(self):
+        pool, stamp = None, 0
+        try:
+            while not self._stop.is_set():
+                info = self.pool_info()
+                if info is None:
+                    break
+                if info[0] is None:
+                    time.sleep(self.interval)
+                    continue
+                if pool is None or pool.name != info[0]:
+                    if pool is not None:
+                        pool.close()
+                        pool = None
+                    try:
+                        pool, stamp = SharedFramePoolReader(*info), 0
+                    except FileNotFoundError:
+                        time.sleep(self.interval)  # already retired; wait for the next pool
+                        continue
+                result = pool.read_latest(stamp)
+                if result is not None:
+                    stamp, image = result
+                    self.frame_count += 1
+                    self.sink.put(DecodedFrame(image, stamp, None))
+                time.sleep(self.interval)
+        except Exception as e:
+            self.error = e
+            print(f"❌ Shared frame source {self.name} failed: {e}")
+        finally:
+            if pool is not None:
+                pool.close()
+            self.sink.close()
@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import time
+from app.config.settings import settings
+
+# -------------------------------------
+# 🖼️ Session Snapshot Cache
+# -------------------------------------
+
+class Snapshot:
+    """One encoded WEBP thumbnail; ``timestamp`` is when its frame was decoded."""
+    __slots__ = ("data", "timestamp", "etag")
+
+    def __init__(self, data: bytes, timestamp: float):
+        self.data = data
+        self.timestamp = timestamp
+        self.etag = '"' + hashlib.blake2b(data, digest_size=8).hexdigest() + '"'
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
+class SnapshotCache:
+    """
+    Latest thumbnail per session, served from memory.
+
+    Running sessions reuse a snapshot for ``max_age`` seconds before encoding
+    the frame bus' latest frame again (no new connection). Stopped sessions
+    are refreshed in the background every ``refresh_interval`` seconds, at
+    most ``concurrency`` streams at a time. A request for a stopped session
+    whose thumbnail is older than ``idle_max_age`` gets the stale thumbnail
+    and schedules a background refresh; it only opens the stream itself when
+    there is no thumbnail at all. Concurrent misses for one session share a
+    single capture.
+    """
+    def __init__(self, max_age: float, idle_max_age: float, refresh_interval: float, concurrency: int):
+        self.max_age = max_age
+        self.idle_max_age = idle_max_age
+        self.refresh_interval = refresh_interval
+        self.snapshots = {}  # session_id -> Snapshot
+        self.sessions = {}
+        self.task = None
+        self.hits = 0
+        self.captures = 0
+        self.failures = 0
+        self._attempted = {}  # session_id -> monotonic time of the last background refresh
+        self._locks = {}
+        self._refreshing = {}  # session_id -> background refresh task scheduled by a request
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    def start(self, sessions: dict):
+        """Refresh thumbnails of the stopped sessions in ``sessions`` (session_id -> VideoSession)."""
+        self.sessions = sessions
+        if self.task is None and self.refresh_interval > 0:
+            self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def shutdown(self):
+        tasks = list(self._refreshing.values())
+        self._refreshing.clear()
+        if self.task is not None:
+            tasks.append(self.task)
+            self.task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def discard(self, session_id: str):
+        """Forget a deleted session's thumbnail and refresh state."""
+        self.snapshots.pop(session_id, None)
+        self._attempted.pop(session_id, None)
+        self._locks.pop(session_id, None)
+        refresh = self._refreshing.pop(session_id, None)
+        if refresh is not None:
+            refresh.cancel()
+
+    async def get(self, session) -> Snapshot:
+        """Cached snapshot if it is fresh enough, else a new capture (stale one if that fails)."""
+        snapshot = self.snapshots.get(session.session_id)
+        if snapshot is not None and snapshot.age < self._max_age(session):
+            self.hits += 1
+            return snapshot
+        if snapshot is not None and not session.frame_bus.is_live:
+            # Opening a stopped stream can take STREAM_OPEN_TIMEOUT: serve the stale thumbnail meanwhile
+            self._schedule_refresh(session)
+            self.hits += 1
+            return snapshot
+        lock = self._locks.setdefault(session.session_id, asyncio.Lock())
+        async with lock:
+            snapshot = self.snapshots.get(session.session_id)
+            if snapshot is not None and snapshot.age < self._max_age(session):
+                self.hits += 1
+                return snapshot
+            try:
+                return await self._capture(session)
+            except Exception:
+                if snapshot is None:
+                    raise
+                return snapshot
+
+    def metrics(self):
+        return {
+            "cached": len(self.snapshots),
+            "hits": self.hits,
+            "captures": self.captures,
+            "failures": self.failures,
+        }
+
+    def _max_age(self, session):
+        return self.max_age if session.frame_bus.is_live else self.idle_max_age
+
+    async def _capture(self, session):
+        try:
+            snapshot = await session.get_single_frame()
+        except Exception:
+            self.failures += 1
+            raise
+        self.captures += 1
+        self.snapshots[session.session_id] = snapshot
+        return snapshot
+
+    def _schedule_refresh(self, session):
+        if session.session_id in self._refreshing:
+            return
+        task = asyncio.get_running_loop().create_task(self._refresh(session))
+        self._refreshing[session.session_id] = task
+
+        def done(_):
+            if self._refreshing.get(session.session_id) is task:
+                del self._refreshing[session.session_id]
+        task.add_done_callback(done)
+
+    async def _refresh(self, session):
+        async with self._semaphore:
+            if session.frame_bus.is_live:
+                return  # became live meanwhile; requests use the running stream
+            self._attempted[session.session_id] = time.monotonic()
+            lock = self._locks.setdefault(session.session_id, asyncio.Lock())
+            async with lock:
+                try:
+                    await self._capture(session)
+                except Exception as e:
+                    print(f"⚠️ Snapshot refresh failed for {session.device_name}: {e}")
+
+    def _due(self, session, now):
+        if session.frame_bus.is_live or now - self._attempted.get(session.session_id, -self.refresh_interval) < self.refresh_interval:
+            return False
+        snapshot = self.snapshots.get(session.session_id)
+        return snapshot is None or snapshot.age >= self.refresh_interval
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            due = [session for session in list(self.sessions.values()) if self._due(session, now)]
+            if due:
+                await asyncio.gather(*(self._refresh(session) for session in due))
+            await asyncio.sleep(min(self.refresh_interval, 5))
+
+snapshot_cache = SnapshotCache(
+    settings.SNAPSHOT_MAX_AGE,
+    settings.SNAPSHOT_IDLE_MAX_AGE,
+    settings.SNAPSHOT_REFRESH_INTERVAL,
+    settings.SNAPSHOT_REFRESH_CONCURRENCY,
+)
@@ -0,0 +1,341 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+import av
+import cv2
+import numpy as np
+from app.config.settings import settings
+from app.helpers.frame_pool import FramePool
+
+# -------------------------------------
+# 🎞️ Threaded PyAV Stream Reader
+# -------------------------------------
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+BLOCK = "block"  # offline replays: the decode thread waits instead of dropping
+
+class DecodedFrame:
+    """
+    One decoded BGR frame handed from the decode thread to the asyncio pipeline.
+    ``pool``/``slot`` identify the pooled buffer backing ``image`` (None when it
+    was allocated because the pool was exhausted). ``source_size`` is the
+    camera's native (width, height) when ``image`` was scaled at decode time.
+    """
+    __slots__ = ("image", "index", "pts_time", "timestamp", "pool", "slot", "source_size")
+
+    def __init__(self, image, index, pts_time, pool=None, slot=None, source_size=None):
+        self.image = image
+        self.index = index
+        self.pts_time = pts_time
+        self.timestamp = time.time()
+        self.pool = pool
+        self.slot = slot
+        self.source_size = source_size
+
+class FrameBuffer:
+    """
+    Bounded ring buffer filled from a decode thread and drained by asyncio.
+
+    When the consumer falls behind, ``drop_oldest`` discards the oldest queued
+    frame (stay close to live) and ``drop_newest`` discards the incoming one.
+    ``block`` makes the decode thread wait for room, for recorded files where
+    every frame must be analysed.
+    """
+    def __init__(self, maxsize: int, policy: str = DROP_OLDEST, loop=None):
+        if policy not in (DROP_OLDEST, DROP_NEWEST, BLOCK):
+            raise ValueError(f"Unknown frame drop policy: {policy}")
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.frames = deque()
+        self.dropped = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        self._room = threading.Condition(self._lock)
+        self._event = asyncio.Event()
+        self._loop = loop or asyncio.get_running_loop()
+
+    def __len__(self):
+        return len(self.frames)
+
+    def put(self, frame):
+        """Thread-safe; only blocks the decode thread with the ``block`` policy."""
+        with self._lock:
+            if self.policy == BLOCK:
+                self._room.wait_for(lambda: self.closed or len(self.frames) < self.maxsize)
+            if self.closed:
+                return
+            if len(self.frames) >= self.maxsize:
+                self.dropped += 1
+                if self.policy == DROP_NEWEST:
+                    return
+                self.frames.popleft()
+            self.frames.append(frame)
+        self._wakeup()
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            self._room.notify_all()
+        self._wakeup()
+
+    async def get(self):
+        """Return the next frame, or None once the buffer is closed and drained."""
+        while True:
+            with self._lock:
+                if self.frames:
+                    self._room.notify()
+                    return self.frames.popleft()
+                if self.closed:
+                    return None
+                self._event.clear()
+            await self._event.wait()
+
+    def _wakeup(self):
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            pass  # event loop already closed
+
+YUV420P = "yuv420p"
+
+class DecodeOptions:
+    """
+    Per-device decode settings applied by the ``StreamReader``:
+
+    - ``thread_type``/``thread_count``: codec threading (``AUTO`` = frame and
+      slice threads, count 0 = one per core).
+    - ``skip_frame``: frames the codec does not decode at all (``NONKEY`` =
+      keyframes only, for low-rate analytics).
+    - ``every``: hand on only every Nth decoded frame; the others are never
+      converted to BGR.
+    - ``width``/``height``: scale at decode time with PyAV's reformatter, which
+      resizes and converts to BGR in one pass. With one side 0 the aspect ratio
+      is kept; frames are never upscaled.
+    """
+    def __init__(self, thread_type: str = "AUTO", thread_count: int = 0, skip_frame: str = "NONE", every: int = 1, width: int = 0, height: int = 0):
+        self.thread_type = (thread_type or "NONE").upper()
+        self.thread_count = max(0, thread_count)
+        self.skip_frame = (skip_frame or "NONE").upper()
+        self.every = max(1, every)
+        self.width = max(0, width)
+        self.height = max(0, height)
+        self._sizes = {}
+
+    @classmethod
+    def from_device(cls, device: dict):
+        return cls(
+            device.get("decode_threads") or settings.DECODE_THREAD_TYPE,
+            int(device.get("decode_thread_count") or settings.DECODE_THREAD_COUNT),
+            device.get("decode_skip") or settings.DECODE_SKIP_FRAME,
+            int(device.get("decode_every") or settings.DECODE_EVERY),
+            int(device.get("decode_width") or settings.DECODE_WIDTH),
+            int(device.get("decode_height") or settings.DECODE_HEIGHT),
+        )
+
+    def apply(self, stream):
+        """Configure the codec of a freshly opened video stream."""
+        codec = stream.codec_context
+        codec.thread_type = self.thread_type
+        codec.thread_count = self.thread_count
+        if self.skip_frame != "NONE":
+            codec.skip_frame = self.skip_frame
+
+    def wanted(self, index: int) -> bool:
+        return self.every == 1 or index % self.every == 0
+
+    def size(self, width: int, height: int):
+        """Decode-time (width, height) for a native frame size, or None to keep it."""
+        key = (width, height)
+        if key not in self._sizes:
+            target_width, target_height = self.width, self.height
+            if target_width and not target_height:
+                target_height = round(height * target_width / width / 2) * 2
+            elif target_height and not target_width:
+                target_width = round(width * target_height / height / 2) * 2
+            scaled = (target_width, target_height) if target_width else None
+            self._sizes[key] = scaled if scaled and scaled[0] < width and scaled[1] < height else None
+        return self._sizes[key]
+
+    def snapshot(self):
+        return {
+            "thread_type": self.thread_type,
+            "thread_count": self.thread_count,
+            "skip_frame": self.skip_frame,
+            "every": self.every,
+            "width": self.width,
+            "height": self.height,
+        }
+
+class ReconnectPolicy:
+    """
+    When and how often a ``StreamReader`` reopens a stream that failed, stalled
+    or ended. Delays grow as ``base_delay * 2**attempt`` up to ``max_delay`` and
+    are scaled by a random factor in [1 - jitter, 1], so cameras that dropped
+    together do not all reconnect at the same moment. ``read_timeout`` makes a
+    stalled network read raise instead of blocking the decode thread forever.
+    """
+    def __init__(self, base_delay: float, max_delay: float, max_attempts: int = 0, open_timeout: float = None, read_timeout: float = None, jitter: float = 0.5):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.open_timeout = open_timeout
+        self.read_timeout = read_timeout
+        self.jitter = min(max(jitter, 0.0), 1.0)
+
+    def delay(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** min(attempt, 32))
+        return delay * random.uniform(1 - self.jitter, 1)
+
+    def exhausted(self, attempt: int) -> bool:
+        return self.max_attempts > 0 and attempt >= self.max_attempts
+
+    def open_options(self):
+        if self.open_timeout is None and self.read_timeout is None:
+            return {}
+        return {"timeout": (self.open_timeout, self.read_timeout)}
+
+class StreamReader:
+    """
+    Decode a PyAV container on its own worker thread and push frames into ``sink``.
+
+    Frames are converted straight into buffers from a ``FramePool`` (in shared
+    memory when ``shared`` is set), so steady-state decoding reuses the same
+    ``pool_size`` BGR arrays instead of allocating one per frame. ``decode``
+    (``DecodeOptions``) sets codec threading, frame skipping and decode-time
+    scaling.
+
+    With a ``reconnect`` policy, errors, stalls and end of stream reopen the
+    container on the same thread: the sink stays open, so subscribers (and
+    the tracker state behind them) simply see a gap in the frames. Each outage
+    is observed as a "reconnect" stage in ``metrics`` (count = reconnects,
+    sum = downtime).
+    """
+    def __init__(self, stream_url: str, sink, name: str = None, pool_size: int = 0, shared: bool = False, metrics=None, reconnect: ReconnectPolicy = None, decode: DecodeOptions = None):
+        self.stream_url = stream_url
+        self.sink = sink
+        self.name = name or stream_url
+        self.pool_size = pool_size
+        self.shared = shared
+        self.metrics = metrics
+        self.reconnect = reconnect
+        self.decode = decode
+        self.pool = None
+        self.frame_count = 0
+        self.error = None
+        self.connected = False
+        self.attempt = 0
+        self.reconnects = 0
+        self.downtime = 0.0
+        self.thread = None
+        self._down_since = None
+        self._stop = threading.Event()
+
+    @property
+    def is_alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    @property
+    def down_for(self) -> float:
+        """Seconds since the current outage started (0 while connected)."""
+        return time.monotonic() - self._down_since if self._down_since is not None else 0.0
+
+    def start(self):
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run, name=f"decode-{self.name}", daemon=True)
+        self.thread.start()
+
+    async def stop(self, timeout: float = 5.0):
+        """Signal the decode thread and wait (off-loop) for it to exit."""
+        self._stop.set()
+        if self.thread is not None:
+            await asyncio.to_thread(self.thread.join, timeout)
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                try:
+                    self._decode()
+                    if self.reconnect is not None and not self._stop.is_set():
+                        print(f"⚠️ Stream {self.name} ended")
+                except Exception as e:
+                    self.error = e
+                    print(f"❌ Stream reader {self.name} failed: {e}")
+                self.connected = False
+                if self.reconnect is None or self._stop.is_set() or self.reconnect.exhausted(self.attempt):
+                    break
+                if self._down_since is None:
+                    self._down_since = time.monotonic()
+                delay = self.reconnect.delay(self.attempt)
+                self.attempt += 1
+                print(f"🔁 Reconnecting {self.name} in {delay:.1f}s (attempt {self.attempt})")
+                self._stop.wait(delay)
+        finally:
+            if self.pool is not None:
+                self.pool.retire()
+            self.sink.close()
+
+    def _decode(self):
+        """Decode one connection until it ends, fails or stalls."""
+        container = av.open(self.stream_url, **(self.reconnect.open_options() if self.reconnect else {}))
+        try:
+            video_stream = next(s for s in container.streams if s.type == 'video')
+            if self.decode is not None:
+                self.decode.apply(video_stream)
+            frames = container.decode(video_stream)
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                frame = next(frames, None)  # includes waiting on the network for live streams
+                if frame is None or self._stop.is_set():
+                    break
+                decoded = time.perf_counter()
+                if not self.connected:
+                    self._connected()
+                self.frame_count += 1
+                if self.metrics is not None:
+                    self.metrics.observe("decode", decoded - started)
+                if self.decode is not None and not self.decode.wanted(self.frame_count):
+                    continue
+                self.sink.put(self._convert(frame))
+                if self.metrics is not None:
+                    self.metrics.observe("convert", time.perf_counter() - decoded)
+        finally:
+            container.close()
+
+    def _connected(self):
+        self.connected = True
+        self.attempt = 0
+        if self._down_since is None:
+            return
+        downtime = time.monotonic() - self._down_since
+        self._down_since = None
+        self.reconnects += 1
+        self.downtime += downtime
+        if self.metrics is not None:
+            self.metrics.observe("reconnect", downtime)
+        print(f"✅ Stream {self.name} reconnected after {downtime:.2f}s")
+
+    def _convert(self, frame):
+        """Convert a decoded frame to BGR into a pooled buffer (falls back to a fresh array)."""
+        source_size = None
+        scaled = self.decode.size(frame.width, frame.height) if self.decode is not None else None
+        if scaled is not None:
+            source_size = (frame.width, frame.height)
+            frame = frame.reformat(scaled[0], scaled[1], "bgr24", interpolation="AREA")
+        shape = (frame.height, frame.width, 3)
+        if self.pool_size and (self.pool is None or self.pool.shape != shape):
+            if self.pool is not None:
+                self.pool.retire()  # resolution changed mid-stream
+            self.pool = FramePool(shape, self.pool_size, self.shared)
+        slot, image = self.pool.acquire() if self.pool is not None else (None, None)
+        if image is None:
+            return DecodedFrame(frame.to_ndarray(format="bgr24"), self.frame_count, frame.time, source_size=source_size)
+
+        if frame.format.name == YUV420P and not frame.width % 2 and not frame.height % 2:
+            cv2.cvtColor(frame.to_ndarray(), cv2.COLOR_YUV2BGR_I420, dst=image)
+        else:
+            np.copyto(image, frame.to_ndarray(format="bgr24"))
+        self.pool.stamp(slot, self.frame_count)
+        return DecodedFrame(image, self.frame_count, frame.time, self.pool, slot, source_size)
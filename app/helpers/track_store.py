@@ -0,0 +1,127 @@
+import time
+import numpy as np
+
+# -------------------------------------
+# 🧭 Bounded Track State Store
+# -------------------------------------
+
+class TrackState:
+    """
+    Compact per-track state: a ring of recent centroids plus the best-confidence
+    sample and its evidence crop (``best_evidence``, filled by the session).
+    """
+    __slots__ = (
+        "track_id", "centroids", "head", "length", "hits",
+        "first_frame", "last_frame", "last_seen",
+        "best_confidence", "best_class_id", "best_bbox", "best_centroid", "best_frame_id", "best_evidence",
+    )
+
+    def __init__(self, track_id, history_size: int, frame_index: int):
+        self.track_id = track_id
+        self.centroids = np.empty((history_size, 2), dtype=np.float32)
+        self.head = 0
+        self.length = 0
+        self.hits = 0
+        self.first_frame = frame_index
+        self.last_frame = frame_index
+        self.last_seen = time.time()
+        self.best_confidence = -1.0
+        self.best_class_id = None
+        self.best_bbox = None
+        self.best_centroid = None
+        self.best_frame_id = None
+        self.best_evidence = None
+
+    def last_centroid(self):
+        if not self.length:
+            return None
+        return self.centroids[(self.head - 1) % len(self.centroids)]
+
+    def add(self, frame_index, bbox, centroid, confidence, class_id, frame_id):
+        self.centroids[self.head] = centroid
+        self.head = (self.head + 1) % len(self.centroids)
+        self.length = min(self.length + 1, len(self.centroids))
+        self.hits += 1
+        self.last_frame = frame_index
+        self.last_seen = time.time()
+        if confidence > self.best_confidence:
+            self.best_confidence = float(confidence)
+            self.best_class_id = int(class_id)
+            self.best_bbox = tuple(float(v) for v in bbox)
+            self.best_centroid = tuple(float(v) for v in centroid)
+            self.best_frame_id = frame_id
+            self.best_evidence = None  # the crop of the previous best no longer matches
+
+    def recent_centroids(self):
+        """Centroids in chronological order (oldest first)."""
+        if self.length < len(self.centroids):
+            return self.centroids[:self.length]
+        return np.roll(self.centroids, -self.head, axis=0)
+
+    def best_sample(self, names):
+        return {
+            "class_id": self.best_class_id,
+            "confidence": self.best_confidence,
+            "bounding_box": self.best_bbox,
+            "centroid": self.best_centroid,
+            "label": names[self.best_class_id],
+            "frame_id": self.best_frame_id,
+        }
+
+class TrackStore:
+    """
+    Track states for one session.
+
+    Tracks not seen for ``max_age`` frames are evicted. Which lines a track
+    already crossed is remembered per (track, line) until the track has been
+    out of sight for ``crossed_ttl`` frames, so a vehicle counts once on every
+    line it crosses and memory stays bounded on a 24/7 stream.
+    """
+    def __init__(self, history_size: int, max_age: int, crossed_ttl: int):
+        self.history_size = max(2, history_size)
+        self.max_age = max_age
+        self.crossed_ttl = crossed_ttl
+        self.tracks = {}
+        self.crossed = {}  # track_id -> [last frame index the track was seen, {crossed line indexes}]
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def is_crossed(self, track_id, line_index):
+        """True if the track already crossed line ``line_index``."""
+        entry = self.crossed.get(track_id)
+        return entry is not None and line_index in entry[1]
+
+    def update(self, track_id, frame_index, bbox, centroid, confidence, class_id, frame_id):
+        """Record a sighting and return the previous centroid (or the current one for a new track)."""
+        state = self.tracks.get(track_id)
+        if state is None:
+            state = self.tracks[track_id] = TrackState(track_id, self.history_size, frame_index)
+        entry = self.crossed.get(track_id)
+        if entry is not None:
+            entry[0] = frame_index  # still visible: keep its crossed lines
+        previous = state.last_centroid()
+        previous = centroid if previous is None else tuple(previous)
+        state.add(frame_index, bbox, centroid, confidence, class_id, frame_id)
+        return previous
+
+    def mark_crossed(self, track_id, line_index, frame_index):
+        """Remember that the track crossed ``line_index`` and return its state."""
+        entry = self.crossed.setdefault(track_id, [frame_index, set()])
+        entry[0] = frame_index
+        entry[1].add(line_index)
+        return self.tracks.get(track_id)
+
+    def evict_stale(self, frame_index):
+        """Drop tracks unseen for ``max_age`` frames; returns the evicted track IDs."""
+        stale = [track_id for track_id, state in self.tracks.items() if frame_index - state.last_frame > self.max_age]
+        for track_id in stale:
+            del self.tracks[track_id]
+        expired = [track_id for track_id, entry in self.crossed.items() if frame_index - entry[0] > self.crossed_ttl]
+        for track_id in expired:
+            del self.crossed[track_id]
+        return stale
+
+    def clear(self):
+        self.tracks.clear()
+        self.crossed.clear()
@@ -0,0 +1,129 @@
+from pathlib import Path
+import numpy as np
+import torch
+import boxmot
+from boxmot import BotSort, ByteTrack, OcSort
+from app.config.settings import settings
+from app.helpers.line_crossing import box_iou
+from app.helpers.reid_service import reid_service
+
+# -------------------------------------
+# 🧭 Pluggable Tracker Backends
+# -------------------------------------
+#
+# Every backend exposes ``update(dets, img)`` taking (N, 6) detections
+# (x1, y1, x2, y2, conf, cls) and returning (M, 8) tracks
+# (x1, y1, x2, y2, id, conf, cls, det_ind), like boxmot trackers.
+
+BOTSORT = "botsort"      # motion + shared ReID appearance features (most accurate, most CPU)
+BYTETRACK = "bytetrack"  # Kalman motion + two-stage IoU association
+OCSORT = "ocsort"        # observation-centric Kalman motion, no appearance
+IOU = "iou"              # greedy IoU / centroid matching, no motion model (cheapest)
+
+TRACKER_BACKENDS = (BOTSORT, BYTETRACK, OCSORT, IOU)
+
+class IouTracker:
+    """
+    Minimal tracker for plain line counting: each detection is matched greedily
+    to the live track it overlaps most (IoU >= ``iou_threshold``), falling back
+    to the nearest centroid within ``max_distance`` box diagonals for small,
+    fast objects. Tracks unseen for ``max_age`` updates are dropped.
+
+    On frames without detections (the scheduler's prediction-only frames) the
+    live tracks are returned at their last box, with ``det_ind`` -1.
+    """
+    def __init__(self, iou_threshold: float = 0.3, max_distance: float = 0.75, max_age: int = 30):
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.max_age = max_age
+        self.next_id = 1
+        self.ids = np.empty(0, dtype=int)
+        self.boxes = np.empty((0, 4))
+        self.ages = np.empty(0, dtype=int)
+        self.confs = np.empty(0)
+        self.classes = np.empty(0)
+
+    def update(self, dets, img=None):
+        dets = np.asarray(dets, dtype=float).reshape(-1, 6)
+        if not len(dets):
+            self.ages += 1
+            keep = self.ages <= self.max_age
+            self.ids, self.boxes, self.ages = self.ids[keep], self.boxes[keep], self.ages[keep]
+            self.confs, self.classes = self.confs[keep], self.classes[keep]
+            return np.column_stack([self.boxes, self.ids, self.confs, self.classes, np.full(len(self.ids), -1)])
+        assigned = np.full(len(dets), -1)
+        if len(dets) and len(self.ids):
+            score = box_iou(dets[:, 0:4], self.boxes)
+            centers = (dets[:, None, 0:2] + dets[:, None, 2:4]) / 2
+            track_centers = (self.boxes[None, :, 0:2] + self.boxes[None, :, 2:4]) / 2
+            diagonal = np.hypot(*(self.boxes[:, 2:4] - self.boxes[:, 0:2]).T)[None, :]
+            distance = np.linalg.norm(centers - track_centers, axis=2) / np.maximum(diagonal, 1)
+            # IoU matches rank above every centroid match: score in (0, 1] vs (-max_distance, 0]
+            score = np.where(score >= self.iou_threshold, score,
+                             np.where(distance <= self.max_distance, -distance, -np.inf))
+            used = np.zeros(len(self.ids), dtype=bool)
+            for flat in np.argsort(-score, axis=None):
+                det, track = np.unravel_index(flat, score.shape)
+                if not np.isfinite(score[det, track]):
+                    break
+                if assigned[det] >= 0 or used[track]:
+                    continue
+                assigned[det], used[track] = track, True
+
+        self.ages += 1
+        matched = assigned >= 0
+        ids = np.empty(len(dets), dtype=int)
+        ids[matched] = self.ids[assigned[matched]]
+        self.boxes[assigned[matched]] = dets[matched, 0:4]
+        self.confs[assigned[matched]] = dets[matched, 4]
+        self.classes[assigned[matched]] = dets[matched, 5]
+        self.ages[assigned[matched]] = 0
+
+        new = np.flatnonzero(~matched)
+        ids[new] = np.arange(self.next_id, self.next_id + len(new))
+        self.next_id += len(new)
+        keep = self.ages <= self.max_age
+        self.ids = np.concatenate([self.ids[keep], ids[new]])
+        self.boxes = np.concatenate([self.boxes[keep], dets[new, 0:4]])
+        self.ages = np.concatenate([self.ages[keep], np.zeros(len(new), dtype=int)])
+        self.confs = np.concatenate([self.confs[keep], dets[new, 4]])
+        self.classes = np.concatenate([self.classes[keep], dets[new, 5]])
+
+        return np.column_stack([dets[:, 0:4], ids, dets[:, 4], dets[:, 5], np.arange(len(dets))])
+
+def create_tracker(backend: str = None):
+    """Build a tracker by backend name (see ``TRACKER_BACKENDS``); unknown names fall back to the default."""
+    backend = (backend or settings.TRACKER_BACKEND).lower()
+    if backend not in TRACKER_BACKENDS:
+        print(f"⚠️ Unknown tracker backend {backend!r}, using {settings.TRACKER_BACKEND}")
+        backend = settings.TRACKER_BACKEND
+    if backend == IOU:
+        return IouTracker(settings.IOU_TRACKER_THRESHOLD, settings.IOU_TRACKER_MAX_DISTANCE, settings.IOU_TRACKER_MAX_AGE)
+    if backend == BYTETRACK:
+        return ByteTrack()
+    if backend == OCSORT:
+        return OcSort()
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    print(f"Using device: {device}")
+    # Build without a private ReID network, then plug in the shared, batched one
+    tracker = BotSort(reid_weights=Path(settings.REID_WEIGHTS), device=device, half=False, with_reid=False)
+    return attach_reid(tracker, reid_service.extractor())
+
+def attach_reid(tracker, extractor):
+    """
+    Make a BotSort built with ``with_reid=False`` use ``extractor``. This relies
+    on boxmot internals (``update`` calls ``self.model.get_features`` when
+    ``self.with_reid`` is set), verified against the boxmot version pinned in
+    requirements.txt; fail loudly instead of silently tracking without ReID.
+    """
+    if not hasattr(tracker, "with_reid") or hasattr(tracker, "model"):
+        raise RuntimeError(
+            f"boxmot {getattr(boxmot, '__version__', '?')} BotSort does not match the shared ReID hook "
+            "(expected a with_reid attribute and no private model); use the pinned boxmot version"
+        )
+    if not callable(getattr(extractor, "get_features", None)):
+        raise RuntimeError(f"{type(extractor).__name__} has no get_features(); it cannot replace BotSort's ReID model")
+    tracker.with_reid = True
+    tracker.model = extractor
+    return tracker
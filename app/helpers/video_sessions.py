@@ -1,131 +1,212 @@
-from collections import defaultdict
 from datetime import datetime, timezone
-import io
-import av
 import asyncio
+import time
 import uuid
-import cv2
-from app.helpers.minio_manager import MinioManager
-from concurrent.futures import ProcessPoolExecutor
-from ultralytics import YOLO
+from app.config.settings import settings
+from app.helpers.evidence_uploader import evidence_uploader
+from app.helpers.frame_bus import FrameBus
+from app.helpers.stream_reader import DecodeOptions, ReconnectPolicy
+from app.helpers.preview_encoder import PreviewEncoder, encode_webp
 from app.helpers.boxmot_tracking import BoxmotTracking
-
-process_pool = ProcessPoolExecutor()
+from app.helpers.track_store import TrackStore
+from app.helpers.zone_geometry import DetectionRegion, ZoneSet
+from app.helpers.inference_engine import inference_engine
+from app.helpers.inference_scheduler import InferenceScheduler
+from app.helpers.pipeline_metrics import StageMetrics
+from app.helpers.snapshot_cache import Snapshot, snapshot_cache
+from app.helpers.websocket_manager import session_topic, websocket_manager
 
 class VideoSession:
-    def __init__(self, stream_url: str, device_id: str, device_name: str, horizontal_line_points: any,vertical_line_points:any):
+    def __init__(self, stream_url: str, device_id: str, device_name: str, horizontal_line_points: any,vertical_line_points:any, options: dict = None):
         self.session_id = str(uuid.uuid4())
         self.device_id = device_id
         self.device_name = device_name
         self.stream_url = stream_url
         self.frame_count = 0
-        self.websocket = None
         self.task = None
         self.video_feeds = None
         self.is_running = False
         self.model = None
         self.tracker = None
-        self.track_histories = defaultdict(list)
-        self.crossed_ids = set()
+        self.track_store = TrackStore(settings.TRACK_HISTORY_SIZE, settings.TRACK_MAX_AGE_FRAMES, settings.TRACK_CROSSED_TTL_FRAMES)
         self.horizontal_line_points = horizontal_line_points
         self.vertical_line_points = vertical_line_points
-
-    async def get_single_frame(self):
-        """Ambil satu frame dari kamera"""
-        container = await asyncio.to_thread(av.open, self.stream_url)
-        video_stream = next(s for s in container.streams if s.type == 'video')
-
-        frame = next(await asyncio.to_thread(lambda: container.decode(video_stream)))
-        img = await asyncio.to_thread(frame.to_ndarray, format="bgr24")
-
-        _, buffer = await asyncio.to_thread(cv2.imencode, '.webp', img, [cv2.IMWRITE_WEBP_QUALITY, 80])
-
-        container.close()
-
-        return io.BytesIO(buffer.tobytes())
-    
-    async def video_feed(self):
+        self.options = options or {}
+        # Hooks replaced when the session runs inside a worker process
+        self.report_crossing = BoxmotTracking.report_crossing
+        self.frame_publisher = None
+        # Last status received from the worker process hosting this session (API side)
+        self.worker_status = None
+        self.shared_pool = None
+        self.zone_set = ZoneSet.from_device(self.options, horizontal_line_points, vertical_line_points, settings.ZONE_MASK_SCALE)
+        self.scheduler = InferenceScheduler.from_device(self.options, self.zone_set)
+        self.detection_region = DetectionRegion.from_device(self.options, self.zone_set, settings.DETECTION_ROI, settings.DETECTION_ROI_MARGIN)
+        self.imgsz = int(self.options.get("imgsz") or settings.INFERENCE_IMGSZ)
+        self.frame_buffer = None
+        self.metrics = StageMetrics()
+        self.frame_bus = FrameBus(stream_url, device_name, settings.FRAME_POOL_SIZE, self.metrics)
+        self.frame_bus.decode = DecodeOptions.from_device(self.options)
+        reconnect = self.options.get("reconnect")
+        if str(settings.STREAM_RECONNECT if reconnect is None else reconnect).lower() not in ("false", "0", "no"):
+            # Outages are handled under the frame bus: the session keeps its tracker and model
+            self.frame_bus.reconnect = ReconnectPolicy(
+                settings.STREAM_RECONNECT_BASE_DELAY,
+                settings.STREAM_RECONNECT_MAX_DELAY,
+                settings.STREAM_RECONNECT_MAX_ATTEMPTS,
+                settings.STREAM_OPEN_TIMEOUT,
+                settings.STREAM_READ_TIMEOUT,
+            )
+        self.preview_encoder = PreviewEncoder(
+            self.frame_bus,
+            int(self.options.get("preview_width") or settings.PREVIEW_WIDTH),
+            settings.PREVIEW_QUALITY,
+        )
+
+    @property
+    def topic(self):
+        """Websocket topic of this session (follows session_id, which worker processes overwrite)."""
+        return session_topic(self.session_id)
+
+    async def get_single_frame(self) -> Snapshot:
+        """Ambil satu frame dari kamera (dari frame bus, tanpa membuka koneksi baru jika sudah live)"""
+        frame = self.frame_bus.latest if self.frame_bus.is_live else None
+        if frame is None:
+            buffer = self.frame_bus.subscribe(1)
+            try:
+                frame = await asyncio.wait_for(buffer.get(), settings.STREAM_OPEN_TIMEOUT)
+            except asyncio.TimeoutError:
+                frame = None  # camera unreachable; the reader keeps retrying until we unsubscribe
+            finally:
+                await self.frame_bus.unsubscribe(buffer)
+        if frame is None:
+            raise RuntimeError(f"No frame received from {self.stream_url}")
+
+        data = await asyncio.to_thread(encode_webp, frame.image, settings.SNAPSHOT_WIDTH, settings.SNAPSHOT_QUALITY)
+        return Snapshot(data, frame.timestamp)
+
+    async def video_feed(self, fps: float = None):
         """
-        Process the video stream using asyncio task.
+        Stream the shared, pre-encoded preview as multipart WEBP, capped at ``fps`` for this viewer.
         """
-        # input_container = av.open(self.stream_url)
-        input_container = await asyncio.to_thread(av.open, self.stream_url)
-        video_stream = next(s for s in input_container.streams if s.type == 'video')
-        try:
-            for frame in await asyncio.to_thread(lambda: input_container.decode(video_stream)):
-                img = await asyncio.to_thread(frame.to_ndarray, format="bgr24")
-                # Encode frame as WEBP
-                _, buffer = await asyncio.to_thread(cv2.imencode, '.webp', img, [cv2.IMWRITE_WEBP_QUALITY, 80])
-
-                yield (b'--frame\r\n'
-                    b'Content-Type: image/webp\r\n\r\n' +
-                    buffer.tobytes() + b'\r\n')
-
-                await asyncio.sleep(0)  # ~80 FPS
-        finally:
-            print("✅ PyAV container closed.")
-            await asyncio.to_thread(input_container.close)  # Tutup PyAV dengan aman
+        async for encoded in self.preview_encoder.stream(settings.PREVIEW_FPS if fps is None else fps):
+            yield (b'--frame\r\n'
+                b'Content-Type: image/webp\r\n\r\n' +
+                encoded + b'\r\n')
 
     async def process_stream(self):
         """
         Process the video stream using asyncio task.
         """
-        input_container = await asyncio.to_thread(av.open, self.stream_url)
-        video_stream = next(s for s in input_container.streams if s.type == 'video')
+        self.frame_buffer = self.frame_bus.subscribe(
+            int(self.options.get("frame_buffer_size") or settings.STREAM_BUFFER_SIZE),
+            self.options.get("frame_drop_policy") or settings.STREAM_DROP_POLICY,
+        )
+        tracks = ()
         try:
-            for frame in await asyncio.to_thread(lambda: input_container.decode(video_stream)):
-            # for frame in await asyncio.to_thread(lambda: list(input_container.decode(video=0))):
-                if not self.is_running:
+            while self.is_running:
+                frame = await self.frame_buffer.get()
+                if frame is None:
                     break
 
                 self.frame_count += 1
-                img = await asyncio.to_thread(frame.to_ndarray, format="bgr24")
+                img = frame.image
+                self._fit_geometry(frame)
+                if self.frame_publisher:
+                    self.frame_publisher(frame)
                 frame_id = datetime.now(timezone.utc).strftime("%Y-%m-%d")+"/"+str(uuid.uuid4()) 
-                await MinioManager.save_frame_to_minio(img, frame_id)
-                # detect = BoxmotTracking.process_detections(img,self.model,0.5)
-                detect = await asyncio.to_thread(BoxmotTracking.process_detections, img, self.model, 0.5)
-                tracks = await asyncio.to_thread(self.tracker.update, detect, img)
-                # tracks = self.tracker.update(detect,img) # (x1, y1, x2, y2, obj_conf, class_conf, class_pred)
-                for track in tracks:
-                    x1=track[0]
-                    y1=track[1]
-                    x2=track[2]
-                    y2=track[3]
-                    track_id=track[4] 
-                    confidence=track[5]
-                    class_id=track[6]
-                    cx, cy = (x1 + x2) // 2, (y1 + y2) // 2  # Calculate center of the bounding box
-                    await BoxmotTracking.update_track_crossing(confidence, class_id, track_id, x1, y1, x2, y2, cx, cy, self.vertical_line_points, self.horizontal_line_points, self.track_histories, frame_id, self.crossed_ids, self.model, self.device_name, self.device_id)
-
-                # Send update to websocket if connected
-                if self.websocket:
-                    await self.websocket.send_json({
-                        "session_id": self.session_id,
-                        "frame_number": self.frame_count,
-                        "status": "Running"
-                    })
+                # Frame yang tidak dideteksi hanya menjalankan prediksi gerak tracker
+                started = time.perf_counter()
+                if await self.scheduler.should_detect(img, frame.timestamp, len(tracks)):
+                    with self.metrics.time("detection"):
+                        detect = await inference_engine.detect(img, 0.5, self.detection_region.window(img.shape), self.imgsz)
+                else:
+                    detect = BoxmotTracking.no_detections()
+                with self.metrics.time("tracking"):
+                    tracks = await asyncio.to_thread(self.tracker.update, detect, img)
+                # tracks: (x1, y1, x2, y2, track_id, confidence, class_id, det_ind)
+                with self.metrics.time("zones"):
+                    self.zone_set.prepare(img.shape)
+                    self.zone_set.update_polygons(tracks, self.model.names, self.frame_count, frame.timestamp)
+                with self.metrics.time("crossings"):
+                    # Crossing tracks upload their best crop first; the event follows the upload
+                    await BoxmotTracking.evaluate_crossings(tracks, self.zone_set, self.track_store, frame_id, self.frame_count, self.model, self.device_name, self.device_id, self.report_crossing, img, evidence_uploader)
+
+                # Lupakan track yang sudah lama tidak terlihat
+                self.track_store.evict_stale(self.frame_count)
+                self.zone_set.evict(self.frame_count, settings.TRACK_MAX_AGE_FRAMES, frame.timestamp)
+
+                # Progress for dashboards on this session's topic (queued, latest frame only)
+                if websocket_manager.has_subscribers(self.topic):
+                    with self.metrics.time("websocket"):
+                        websocket_manager.publish(self.topic, {
+                            "session_id": self.session_id,
+                            "frame_number": self.frame_count,
+                            "status": "Running"
+                        }, coalesce="progress")
+                self.metrics.observe("frame", time.perf_counter() - started)
+                self.metrics.observe("latency", time.time() - frame.timestamp)  # decode -> processed
+                self.metrics.frame()
                 
                 # print(session_manager.web_session_id[self.web_token])
                 await asyncio.sleep(0)
-
-            # input_container.close()
-            await asyncio.to_thread(input_container.close)
         finally:
-        # Tutup input_container jika masih terbuka
-            if input_container:
-                print("✅ Video stream closed.")
-                await asyncio.to_thread(input_container.close)
+            # Lepas dari frame bus (decode thread berhenti jika tidak ada subscriber lain)
+            await self.frame_bus.unsubscribe(self.frame_buffer)
+            print("✅ Video stream closed.")
             await VideoSession.stop(self)
 
+    def _fit_geometry(self, frame):
+        """Lines, zones and ROI are drawn on the native resolution; follow decode-time scaling."""
+        scale = (1.0, 1.0)
+        if frame.source_size is not None:
+            height, width = frame.image.shape[:2]
+            scale = (width / frame.source_size[0], height / frame.source_size[1])
+        if scale != self.zone_set.scale:
+            self.zone_set.set_scale(*scale)
+            self.detection_region.set_scale(*scale)
+            self.scheduler.reset()
+
+    def config(self):
+        """Constructor arguments, used to rebuild this session inside a worker process."""
+        return {
+            "stream_url": self.stream_url,
+            "device_id": self.device_id,
+            "device_name": self.device_name,
+            "horizontal_line_points": self.horizontal_line_points,
+            "vertical_line_points": self.vertical_line_points,
+            "options": self.options,
+        }
+
+    def stats(self):
+        """Runtime counters; for worker-hosted sessions, the last status the worker reported."""
+        if self.worker_status is not None:
+            return self.worker_status
+        return {
+            "frame_count": self.frame_count,
+            "is_running": self.is_running,
+            "tracker": self.options.get("tracker") or settings.TRACKER_BACKEND,
+            "inference": {**self.scheduler.stats(), "imgsz": self.imgsz, "roi": self.detection_region.cached},
+            "zones": self.zone_set.counters(),
+            "pipeline": self.metrics.snapshot(),
+            "stream": self.frame_bus.stats(),
+            "decode": {**self.frame_bus.decode.snapshot(), "scale": self.zone_set.scale},
+            "queues": {
+                "frame_buffer": len(self.frame_buffer) if self.frame_buffer else 0,
+                "frame_buffer_dropped": self.frame_buffer.dropped if self.frame_buffer else 0,
+            },
+        }
+
     async def start(self):
         """
         Start video stream processing.
         """
         
         self.is_running = True
-        self.tracker = BoxmotTracking.initial_tracker()
-        self.model = YOLO("yolo11n.pt")
+        self.tracker = BoxmotTracking.initial_tracker(self.options.get("tracker"))
+        await inference_engine.start()
+        self.model = inference_engine
         self.frame_count = 0
+        self.metrics.reset()
 
         loop = asyncio.get_running_loop()
         self.task = loop.create_task(self.process_stream())
@@ -137,9 +218,12 @@ class VideoSession:
         self.is_running = False
         self.tracker = None
         self.model = None
+        self.track_store.clear()
+        self.zone_set.reset()
+        self.scheduler.reset()
         
-        # Cancel any active asyncio task
-        if self.task and not self.task.done():
+        # Cancel any active asyncio task (unless stop() is called from inside it)
+        if self.task and not self.task.done() and self.task is not asyncio.current_task():
             self.task.cancel()
             try:
                 await self.task
@@ -151,6 +235,7 @@ class VideoSession:
         Delete session and clean up.
         """
         await self.stop()
+        snapshot_cache.discard(self.session_id)
 
     async def restart(self):
         """
@@ -1,29 +1,159 @@
 import asyncio
-from typing import Dict
+import itertools
+from collections import OrderedDict
+from typing import Dict, Set
 
 from fastapi import WebSocket
+from app.config.settings import settings
+
+# -------------------------------------
+# 📣 WebSocket Pub/Sub Hub
+# -------------------------------------
+
+RECENT_CAPTURED_DATA = "recent-captured-data"
+
+def session_topic(session_id: str) -> str:
+    """Topic carrying the per-frame progress of one video session."""
+    return f"session/{session_id}"
+
+class WebSocketClient:
+    """
+    One connected websocket with its own bounded send queue and sender task.
+
+    Messages published with the same ``coalesce`` key replace the one still
+    waiting in the queue (a dashboard only needs the latest frame count); when
+    the queue is full the oldest message is dropped. A send that takes longer
+    than ``send_timeout`` disconnects the client.
+    """
+    _sequence = itertools.count()
+
+    def __init__(self, websocket: WebSocket, topic: str, maxsize: int, send_timeout: float, on_close=None):
+        self.websocket = websocket
+        self.topic = topic
+        self.maxsize = max(1, maxsize)
+        self.send_timeout = send_timeout
+        self.on_close = on_close
+        self.queue = OrderedDict()  # key -> (kind, payload)
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    def offer(self, kind: str, payload, coalesce: str = None):
+        """Queue a message without waiting; never blocks the publisher."""
+        if self.closed:
+            return
+        if coalesce is not None and coalesce in self.queue:
+            self.queue[coalesce] = (kind, payload)
+            self.coalesced += 1
+            return
+        if len(self.queue) >= self.maxsize:
+            self.queue.popitem(last=False)
+            self.dropped += 1
+        self.queue[coalesce if coalesce is not None else next(self._sequence)] = (kind, payload)
+        self._ready.set()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.queue.clear()
+            if self.task is not asyncio.current_task():
+                self.task.cancel()
+
+    async def _run(self):
+        try:
+            while True:
+                await self._ready.wait()
+                while self.queue:
+                    _, (kind, payload) = self.queue.popitem(last=False)
+                    send = self.websocket.send_json if kind == "json" else self.websocket.send_text
+                    await asyncio.wait_for(send(payload), self.send_timeout)
+                    self.sent += 1
+                self._ready.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ WebSocket client on {self.topic} dropped: {e!r}")
+            if self.on_close is not None:
+                self.on_close(self)
 
 class WebSocketManager:
-    def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-    
-    async def connect(self, websocket: WebSocket, session: str):
+    """
+    Topic-based fan-out: publishers hand a message to every subscriber's queue
+    and return immediately, each client is drained by its own task, so one
+    slow dashboard never throttles the analytics loop or the other clients.
+    """
+    def __init__(self, queue_size: int = 64, send_timeout: float = 5.0):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.topics: Dict[str, Set[WebSocketClient]] = {}
+        self.dropped = 0
+        self.coalesced = 0
+        self.sent = 0
+
+    @property
+    def active_connections(self):
+        """Topic -> number of subscribed clients."""
+        return {topic: len(clients) for topic, clients in self.topics.items()}
+
+    def subscribe(self, topic: str, websocket: WebSocket) -> WebSocketClient:
+        client = WebSocketClient(websocket, topic, self.queue_size, self.send_timeout, self.unsubscribe)
+        self.topics.setdefault(topic, set()).add(client)
+        return client
+
+    def unsubscribe(self, client: WebSocketClient):
+        clients = self.topics.get(client.topic)
+        if clients is not None and client in clients:
+            clients.discard(client)
+            if not clients:
+                del self.topics[client.topic]
+            self.sent += client.sent
+            self.dropped += client.dropped
+            self.coalesced += client.coalesced
+        client.close()
+
+    def has_subscribers(self, topic: str) -> bool:
+        return topic in self.topics
+
+    def publish(self, topic: str, message, coalesce: str = None):
+        """Queue a JSON message for every client on ``topic``."""
+        for client in list(self.topics.get(topic, ())):
+            client.offer("json", message, coalesce)
+
+    def metrics(self):
+        clients = [client for subscribers in self.topics.values() for client in subscribers]
+        return {
+            "topics": len(self.topics),
+            "clients": len(clients),
+            "queued": sum(len(client.queue) for client in clients),
+            "sent": self.sent + sum(client.sent for client in clients),
+            "dropped": self.dropped + sum(client.dropped for client in clients),
+            "coalesced": self.coalesced + sum(client.coalesced for client in clients),
+        }
+
+    # --- original connection API ---
+
+    async def connect(self, websocket: WebSocket, session: str) -> WebSocketClient:
         """Menambahkan koneksi WebSocket baru"""
         await websocket.accept()
-        self.active_connections[session] = websocket
+        return self.subscribe(session, websocket)
 
-    def disconnect(self, session: str):
-        """Menghapus koneksi WebSocket ketika terputus"""
-        self.active_connections.pop(session, None)
+    def disconnect(self, session: str, websocket: WebSocket = None):
+        """Menghapus koneksi WebSocket ketika terputus (semua klien topik jika websocket kosong)"""
+        for client in list(self.topics.get(session, ())):
+            if websocket is None or client.websocket is websocket:
+                self.unsubscribe(client)
 
-    async def send_personal_message(self, message: str, session: str):
+    async def send_personal_message(self, message, session: str):
         """Mengirim pesan ke sesi tertentu"""
-        if session in self.active_connections:
-            await self.active_connections[session].send_json({"message": message})
+        self.publish(session, {"message": message})
 
     async def broadcast(self, message: str):
         """Mengirim pesan ke semua sesi yang terhubung"""
-        for ws in self.active_connections.values():
-            await ws.send_text(f"[Broadcast] {message}")
+        for clients in list(self.topics.values()):
+            for client in list(clients):
+                client.offer("text", f"[Broadcast] {message}")
 
-websocket_manager = WebSocketManager()
\ No newline at end of file
+websocket_manager = WebSocketManager(settings.WEBSOCKET_QUEUE_SIZE, settings.WEBSOCKET_SEND_TIMEOUT)
@@ -0,0 +1,275 @@
+import json
+from collections import defaultdict
+import cv2
+import numpy as np
+from app.helpers.line_crossing import CrossingEngine
+
+# -------------------------------------
+# 🗺️ Counting Lines & Zones per Device
+# -------------------------------------
+
+LINE = "line"
+POLYGON = "polygon"
+DWELL = "dwell"
+MAX_POLYGONS = 32  # one bit per polygon in the rasterized mask
+ENTER = 1
+EXIT = -1
+
+def parse_points(value):
+    """Accept a JSON string or a list of {"x", "y"} dicts / (x, y) pairs."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = json.loads(value)
+    return [(point["x"], point["y"]) if isinstance(point, dict) else (point[0], point[1]) for point in value]
+
+class Zone:
+    """One counting line or polygon with its in-memory counters."""
+    def __init__(self, name: str, kind: str, points, dwell_threshold: float = 0):
+        self.name = name
+        self.kind = kind
+        self.points = points
+        self.dwell_threshold = dwell_threshold
+        self.counts = defaultdict(lambda: defaultdict(int))  # direction/event -> label -> count
+        self.total = 0
+        self.occupancy = 0
+        self.dwell_total = 0.0
+        self.dwell_max = 0.0
+
+    def count(self, event: str, label: str):
+        self.counts[event][label] += 1
+        self.total += 1
+
+    def snapshot(self):
+        data = {
+            "type": self.kind,
+            "total": self.total,
+            "counts": {event: dict(labels) for event, labels in self.counts.items()},
+        }
+        if self.kind != LINE:
+            data.update({
+                "occupancy": self.occupancy,
+                "dwell_total_seconds": round(self.dwell_total, 2),
+                "dwell_max_seconds": round(self.dwell_max, 2),
+            })
+        return data
+
+class ZoneSet:
+    """
+    Compiled geometry for one device.
+
+    Lines are handed to a ``CrossingEngine`` (precomputed start/direction
+    vectors for the side-of-line test). Polygons are rasterized once per frame
+    size into a single bitmask image, so point-in-zone is one array lookup per
+    track regardless of polygon complexity.
+    """
+    def __init__(self, zones, mask_scale: int = 4):
+        self.zones = zones
+        self.lines = [zone for zone in zones if zone.kind == LINE]
+        self.polygons = [zone for zone in zones if zone.kind != LINE]
+        if len(self.polygons) > MAX_POLYGONS:
+            raise ValueError(f"At most {MAX_POLYGONS} polygon zones per device, got {len(self.polygons)}")
+        self.engine = CrossingEngine(lines=[zone.points for zone in self.lines])
+        # Points as configured (camera's native resolution) and the current frame scale
+        self.source_points = [zone.points for zone in zones]
+        self.scale = (1.0, 1.0)
+        self.mask_scale = max(1, mask_scale)
+        self.mask = None
+        self.mask_shape = None
+        self.membership = {}  # track_id -> [bits, last_frame, {polygon_index: entered_at}, label]
+
+    @classmethod
+    def from_device(cls, device: dict, horizontal_line_points=None, vertical_line_points=None, mask_scale: int = 4):
+        zones = []
+        horizontal = parse_points(horizontal_line_points or device.get("horizontal_line_points"))
+        vertical = parse_points(vertical_line_points or device.get("vertical_line_points"))
+        if len(horizontal) >= 2:
+            zones.append(Zone("horizontal", LINE, horizontal[:2]))
+        if len(vertical) >= 2:
+            zones.append(Zone("vertical", LINE, vertical[:2]))
+
+        extra = device.get("zones") or []
+        if isinstance(extra, str):
+            extra = json.loads(extra)
+        polygons = 0
+        for index, item in enumerate(extra):
+            kind = item.get("type", LINE)
+            points = parse_points(item.get("points"))
+            if (kind == LINE and len(points) < 2) or (kind != LINE and len(points) < 3):
+                print(f"⚠️ Skipping invalid zone {item.get('name', index)} for device {device.get('device_id')}")
+                continue
+            if kind != LINE:
+                polygons += 1
+                if polygons > MAX_POLYGONS:
+                    print(f"⚠️ Skipping zone {item.get('name', index)} for device {device.get('device_id')}: more than {MAX_POLYGONS} polygon zones")
+                    continue
+            zones.append(Zone(item.get("name") or f"{kind}-{index}", kind, points if kind != LINE else points[:2], float(item.get("dwell_threshold", 0))))
+        return cls(zones, mask_scale)
+
+    def __bool__(self):
+        return bool(self.zones)
+
+    def prepare(self, shape):
+        """(Re)rasterize polygon masks when the frame size changes."""
+        if not self.polygons or self.mask_shape == shape[:2]:
+            return
+        height, width = shape[:2]
+        scale = self.mask_scale
+        self.mask = np.zeros(((height + scale - 1) // scale, (width + scale - 1) // scale), dtype=np.uint32)
+        layer = np.zeros(self.mask.shape, dtype=np.uint8)
+        for index, zone in enumerate(self.polygons):
+            layer[:] = 0
+            points = (np.asarray(zone.points, dtype=np.float32) / scale).round().astype(np.int32)
+            cv2.fillPoly(layer, [points], 1)
+            self.mask |= layer.astype(np.uint32) << np.uint32(index)
+        self.mask_shape = shape[:2]
+
+    def lookup(self, points):
+        """Polygon membership bits for each (x, y) point."""
+        if self.mask is None or not len(points):
+            return np.zeros(len(points), dtype=np.uint32)
+        cells = (np.asarray(points) // self.mask_scale).astype(np.int64)
+        xs = np.clip(cells[:, 0], 0, self.mask.shape[1] - 1)
+        ys = np.clip(cells[:, 1], 0, self.mask.shape[0] - 1)
+        return self.mask[ys, xs]
+
+    def record_crossing(self, line_index: int, sign: int, label: str):
+        """Count a line crossing and return (zone name, direction label)."""
+        zone = self.lines[line_index]
+        direction = self.engine.direction(line_index, sign)
+        zone.count(direction, label)
+        return zone.name, direction
+
+    def update_polygons(self, tracks, names, frame_index: int, timestamp: float):
+        """Track polygon enter/exit and dwell for every track in the tracker output."""
+        if not self.polygons or not len(tracks):
+            return []
+        centroids = (tracks[:, 0:2] + tracks[:, 2:4]) // 2
+        bits = self.lookup(centroids)
+        events = []
+        for track, current in zip(tracks, bits.tolist()):
+            track_id = int(track[4])
+            member = self.membership.get(track_id)
+            if member is None:
+                member = self.membership[track_id] = [0, frame_index, {}, None]
+            member[1] = frame_index
+            member[3] = names[int(track[6])]
+            changed = member[0] ^ current
+            member[0] = current
+            index = 0
+            while changed:
+                if changed & 1:
+                    kind = ENTER if current >> index & 1 else EXIT
+                    events.append(self._transition(member, index, kind, timestamp))
+                changed >>= 1
+                index += 1
+        return events
+
+    def evict(self, frame_index: int, max_age: int, timestamp: float):
+        """Close out polygon membership of tracks unseen for ``max_age`` frames."""
+        stale = [track_id for track_id, member in self.membership.items() if frame_index - member[1] > max_age]
+        for track_id in stale:
+            member = self.membership.pop(track_id)
+            for index in list(member[2]):
+                self._transition(member, index, EXIT, timestamp)
+
+    def _transition(self, member, index, kind, timestamp):
+        zone = self.polygons[index]
+        label = member[3]
+        if kind == ENTER:
+            member[2][index] = timestamp
+            zone.occupancy += 1
+            zone.count("entered", label)
+            return zone.name, "entered"
+        entered_at = member[2].pop(index, None)
+        zone.occupancy = max(0, zone.occupancy - 1)
+        zone.counts["exited"][label] += 1
+        if entered_at is not None:
+            dwell = timestamp - entered_at
+            zone.dwell_total += dwell
+            zone.dwell_max = max(zone.dwell_max, dwell)
+            if zone.dwell_threshold and dwell >= zone.dwell_threshold:
+                zone.counts["dwelled"][label] += 1
+        return zone.name, "exited"
+
+    def counters(self):
+        return {zone.name: zone.snapshot() for zone in self.zones}
+
+    def reset(self):
+        self.membership.clear()
+        for zone in self.polygons:
+            zone.occupancy = 0
+
+    def set_scale(self, scale_x: float, scale_y: float):
+        """Map the configured points onto frames scaled at decode time by (scale_x, scale_y)."""
+        if (scale_x, scale_y) == self.scale:
+            return
+        for zone, points in zip(self.zones, self.source_points):
+            zone.points = [(x * scale_x, y * scale_y) for x, y in points]
+        self.engine = CrossingEngine(lines=[zone.points for zone in self.lines])
+        self.mask_shape = None
+        self.scale = (scale_x, scale_y)
+
+    def bounds(self):
+        """(x1, y1, x2, y2) around every line and polygon point, or None without zones."""
+        points = [point for zone in self.zones for point in zone.points]
+        if not points:
+            return None
+        points = np.asarray(points, dtype=np.float32)
+        return (*points.min(axis=0), *points.max(axis=0))
+
+FULL_FRAME = "full"
+AUTO = "auto"
+
+class DetectionRegion:
+    """
+    Part of the frame handed to the detector for one device: the whole frame,
+    an explicit [x1, y1, x2, y2] rectangle, or ``auto`` — the bounding box of
+    the device's lines and zones grown by ``margin`` of the frame size on each
+    side, so vehicles are tracked for a while before they reach a line.
+    """
+    def __init__(self, rectangle=None, margin: float = 0.15):
+        self.rectangle = rectangle
+        self.source_rectangle = rectangle
+        self.margin = margin
+        self.shape = None
+        self.cached = None
+
+    @classmethod
+    def from_device(cls, device: dict, zone_set: ZoneSet, default: str = FULL_FRAME, margin: float = 0.15):
+        roi = device.get("roi") or default
+        if isinstance(roi, str) and roi not in (FULL_FRAME, AUTO):
+            roi = json.loads(roi)
+        margin = float(device.get("roi_margin", margin))
+        if roi == FULL_FRAME:
+            return cls(None, margin)
+        if roi == AUTO:
+            return cls(zone_set.bounds(), margin)
+        if isinstance(roi, dict):
+            roi = (roi["x1"], roi["y1"], roi["x2"], roi["y2"])
+        return cls(tuple(float(value) for value in roi[:4]), 0)
+
+    def set_scale(self, scale_x: float, scale_y: float):
+        """Follow ``ZoneSet.set_scale`` for frames scaled at decode time."""
+        if self.source_rectangle is not None:
+            x1, y1, x2, y2 = self.source_rectangle
+            self.rectangle = (x1 * scale_x, y1 * scale_y, x2 * scale_x, y2 * scale_y)
+            self.shape = None
+
+    def window(self, shape):
+        """Integer (x1, y1, x2, y2) crop for a frame of ``shape``, or None for the whole frame."""
+        if self.rectangle is None:
+            return None
+        if self.shape != shape[:2]:
+            height, width = shape[:2]
+            x1, y1, x2, y2 = self.rectangle
+            pad_x, pad_y = self.margin * width, self.margin * height
+            window = (
+                max(0, int(x1 - pad_x)), max(0, int(y1 - pad_y)),
+                min(width, int(np.ceil(x2 + pad_x))), min(height, int(np.ceil(y2 + pad_y))),
+            )
+            covers_all = window == (0, 0, width, height)
+            valid = window[2] - window[0] >= 32 and window[3] - window[1] >= 32
+            self.cached = window if valid and not covers_all else None
+            self.shape = shape[:2]
+        return self.cached
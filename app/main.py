@@ -7,9 +7,16 @@ from fastapi.responses import JSONResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from app.helpers.minio_manager import MinioManager
 from app.helpers.mongodb_manager import MongoDBClient
-from app.routers import video,settings
+from app.routers import video,settings,metrics,counts,events
 from app.config import security
 from app.helpers.session_manager import session_manager
+from app.helpers.inference_engine import inference_engine
+from app.helpers.reid_service import reid_service
+from app.helpers.evidence_uploader import evidence_uploader
+from app.helpers.event_sink import crossing_sink
+from app.helpers.crossing_aggregator import crossing_aggregator
+from app.helpers.session_workers import session_workers
+from app.helpers.snapshot_cache import snapshot_cache
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from contextlib import asynccontextmanager
@@ -32,14 +39,29 @@ async def lifespan(app: FastAPI):
     await MinioManager.initialize_minio()
     MongoDBClient().get_database()
     print("✅ MongoDB connection established.")
+    crossing_sink.start()
+    try:
+        await crossing_sink.ensure_indexes()
+        await crossing_aggregator.ensure_indexes()
+    except Exception as e:
+        print(f"⚠️ Could not create crossing indexes: {e}")
+    crossing_aggregator.start()
     security.security.init()
     credentials = security.security.load_config()
     web_token = security.security.load_access_token()
     print(credentials.get('devices',[]))
     await session_manager.initialize_sessions(credentials.get('devices',[]))
+    snapshot_cache.start(session_manager.sessions)
     yield
     print("Application shutdown.")
+    await snapshot_cache.shutdown()
     await session_manager.clear_sesions()
+    await session_workers.shutdown()
+    await inference_engine.shutdown()
+    reid_service.shutdown()
+    await evidence_uploader.shutdown()
+    await crossing_sink.shutdown()
+    await crossing_aggregator.shutdown()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -56,6 +78,9 @@ templates = Jinja2Templates(directory="templates")
 # Registrasi router
 app.include_router(video.router)
 app.include_router(settings.router)
+app.include_router(metrics.router)
+app.include_router(counts.router)
+app.include_router(events.router)
 
 @app.get("/monitoring")
 async def home(request: Request):
@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.helpers.crossing_aggregator import KEY_FIELDS, crossing_aggregator, parse_range
+
+router = APIRouter()
+
+# -------------------------------
+# 🧮 Crossing Count Endpoints
+# -------------------------------
+
+@router.get("/crossing-counts")
+async def crossing_counts(resolution: str = "1h", start: str = None, end: str = None, device_id: str = None, group_by: str = None):
+    """
+    Bucketed crossing counts from the rollup collection. ``start``/``end`` are
+    ISO timestamps (default: last 24 hours); ``group_by`` is a comma separated
+    subset of device_id, zone, direction, label (default: all of them).
+    """
+    try:
+        start_time, end_time = parse_range(start, end)
+        fields = [field.strip() for field in group_by.split(",")] if group_by else KEY_FIELDS
+        buckets = await crossing_aggregator.query(resolution, start_time, end_time, device_id, fields)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse({
+        "resolution": resolution,
+        "start": start_time.isoformat(),
+        "end": end_time.isoformat(),
+        "buckets": buckets,
+    })
+
+@router.get("/crossing-counts/live")
+async def live_crossing_counts(device_id: str = None):
+    """In-memory counters since the service started."""
+    return JSONResponse(crossing_aggregator.live_counts(device_id))
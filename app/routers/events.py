@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.config.settings import settings
+from app.helpers.crossing_aggregator import parse_time
+from app.helpers.mongodb_manager import MongoDBManager
+
+router = APIRouter()
+
+# -------------------------------
+# 🗃️ Crossing Event History
+# -------------------------------
+
+@router.get("/crossing-events")
+async def crossing_events(device_id: str = None, start: str = None, end: str = None, limit: int = 100, cursor: str = None):
+    """
+    Crossing events in [start, end) (ISO timestamps, both optional), newest
+    first. Pass the returned ``next_cursor`` to get the following page.
+    """
+    try:
+        events, next_cursor = await MongoDBManager().find_events(
+            device_id,
+            parse_time(start) if start else None,
+            parse_time(end) if end else None,
+            max(1, min(limit, settings.EVENT_PAGE_SIZE_MAX)),
+            cursor,
+        )
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse({"events": events, "next_cursor": next_cursor})
@@ -0,0 +1,92 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.helpers.crossing_aggregator import crossing_aggregator
+from app.helpers.event_sink import crossing_sink
+from app.helpers.pipeline_metrics import PrometheusWriter
+from app.helpers.session_manager import session_manager
+from app.helpers.session_workers import service_metrics, session_workers
+from app.helpers.snapshot_cache import snapshot_cache
+from app.helpers.websocket_manager import websocket_manager
+
+router = APIRouter()
+
+# -------------------------------
+# 📈 Prometheus Metrics Endpoint
+# -------------------------------
+
+def write_services(writer, services, labels):
+    """Detector, ReID and evidence uploader metrics of one process (``service_metrics()``)."""
+    engine = services["inference"]
+    writer.gauge("inference_queue_depth", engine["queue_depth"], labels, "Frames waiting for the shared detector")
+    writer.counter("inference_batches_total", engine["batches"], labels, "Detector micro-batches")
+    writer.counter("inference_frames_total", engine["frames"], labels, "Frames run through the detector")
+    writer.histogram("inference_batch_seconds", engine["predict"], labels, "Detector forward pass per micro-batch")
+
+    reid = services["reid"]
+    writer.counter("reid_crops_total", reid["crops"], labels, "Crops embedded by the shared ReID service")
+    writer.counter("reid_cache_hits_total", reid["cache_hits"], labels, "Embeddings reused for stationary boxes")
+
+    evidence = services["evidence"]
+    writer.gauge("evidence_queue_depth", evidence["queue_depth"], labels, "Evidence crops waiting for upload")
+    for key in ("uploaded", "dropped", "failed"):
+        writer.counter(f"evidence_{key}_total", evidence[key], labels, f"Evidence crops {key}")
+    writer.histogram("evidence_upload_seconds", evidence["upload"], labels, "Evidence encode + MinIO upload")
+
+def collect_metrics() -> str:
+    writer = PrometheusWriter()
+    for session in list(session_manager.sessions.values()):
+        stats = session.stats()
+        labels = {"session_id": session.session_id, "device_id": session.device_id, "device_name": session.device_name}
+        pipeline = stats.get("pipeline") or {}
+        queues = stats.get("queues") or {}
+        inference = stats.get("inference") or {}
+        stream = stats.get("stream") or {}
+        writer.gauge("session_running", bool(stats.get("is_running", session.is_running)), labels, "Session is processing frames")
+        writer.counter("session_frames_total", stats.get("frame_count", 0), labels, "Frames processed by the session")
+        writer.gauge("session_fps", pipeline.get("fps"), labels, "Processed frames per second (10 s window)")
+        writer.gauge("session_frame_buffer_depth", queues.get("frame_buffer"), labels, "Decoded frames waiting for analytics")
+        writer.counter("session_frames_dropped_total", queues.get("frame_buffer_dropped"), labels, "Frames dropped because analytics fell behind")
+        writer.counter("session_detections_total", inference.get("detected"), labels, "Frames sent to the detector")
+        writer.counter("session_inferences_saved_total", inference.get("inferences_saved"), labels, "Detections skipped by the motion gate")
+        writer.gauge("session_stream_connected", stream.get("connected"), labels, "Decoder is receiving frames from the camera")
+        writer.counter("session_stream_reconnects_total", stream.get("reconnects"), labels, "Stream outages recovered by reconnecting")
+        writer.counter("session_stream_downtime_seconds_total", stream.get("downtime"), labels, "Time spent reconnecting")
+        writer.stages(pipeline, labels)
+
+    # Shared services of the API process, then those of each worker shard
+    write_services(writer, service_metrics(), None)
+    for index, shard in sorted(session_workers.metrics().items()):
+        labels = {"shard": index}
+        writer.gauge("session_worker_alive", shard["alive"], labels, "Worker shard process is running")
+        writer.counter("session_worker_restarts_total", shard["restarts"], labels, "Worker shard restarts after a crash")
+        if "inference" in shard:
+            write_services(writer, shard, labels)
+
+    events = crossing_sink.metrics()
+    writer.gauge("events_buffered", events["buffered"], None, "Crossing events waiting for MongoDB")
+    writer.counter("events_written_total", events["written"], None, "Crossing events written to MongoDB")
+    writer.counter("events_spilled_total", events["spilled"], None, "Crossing events spilled to the journal")
+    writer.gauge("events_journal_bytes", events["journal_bytes"], None, "Size of the crossing event journal")
+    writer.histogram("events_write_seconds", events["write"], None, "MongoDB insert_many round trip")
+    rollups = crossing_aggregator.metrics()
+    writer.gauge("rollups_pending", rollups["pending"], None, "Rollup bucket increments waiting for MongoDB")
+    writer.counter("rollups_flushed_total", rollups["flushed"], None, "Rollup bucket upserts written")
+    writer.counter("rollups_failures_total", rollups["failures"], None, "Failed rollup flushes")
+    writer.histogram("rollups_write_seconds", rollups["write"], None, "MongoDB rollup bulk_write round trip")
+
+    sockets = websocket_manager.metrics()
+    writer.gauge("websocket_clients", sockets["clients"], None, "Connected dashboard websockets")
+    writer.gauge("websocket_queued", sockets["queued"], None, "Messages waiting in client send queues")
+    for key in ("sent", "dropped", "coalesced"):
+        writer.counter(f"websocket_{key}_total", sockets[key], None, f"Websocket messages {key}")
+
+    snapshots = snapshot_cache.metrics()
+    writer.gauge("snapshots_cached", snapshots["cached"], None, "Session thumbnails held in memory")
+    writer.counter("snapshot_hits_total", snapshots["hits"], None, "Snapshot requests answered from memory")
+    writer.counter("snapshot_captures_total", snapshots["captures"], None, "Snapshots encoded from a stream")
+    writer.counter("snapshot_failures_total", snapshots["failures"], None, "Snapshot captures that got no frame")
+    return writer.render()
+
+@router.get("/metrics")
+async def metrics():
+    return PlainTextResponse(collect_metrics(), media_type="text/plain; version=0.0.4")
@@ -1,7 +1,7 @@
 import asyncio
 import uuid
 from fastapi import APIRouter, Form, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from app.controllers.video_controller import video_processor
 from app.controllers.video_session import videoSessionsController
 from app.helpers.websocket_manager import websocket_manager
@@ -21,27 +21,28 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
         await websocket.send_json({"error": "Session not found"})
         await websocket.close()
         return
-    session.websocket = websocket
+    client = websocket_manager.subscribe(session.topic, websocket)
 
     try:
         while True:
             await websocket.receive_text()
             # await asyncio.sleep(0)
     except WebSocketDisconnect:
-        session.websocket = None
         print(f"WebSocket disconnected for session {session_id}")
     finally:
+        websocket_manager.unsubscribe(client)
         await websocket.close()
 
 @router.websocket("/socket/{session}")
 async def sockets_endpoint(websocket: WebSocket, session: str):
-    await websocket_manager.connect(websocket, session)
+    client = await websocket_manager.connect(websocket, session)
     try:
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
-        websocket_manager.disconnect(session)
+        pass
     finally:
+        websocket_manager.unsubscribe(client)
         await websocket.close()
 
 @router.get("/test-socket/{session}")
@@ -75,14 +76,40 @@ async def stop_video_session(request: Request):
     return JSONResponse(responses)
 
 @router.get("/feed-video-session/{session_id}")
-async def feed_video_session(session_id: str):
-    responses = await session_manager.video_feed(session_id)
+async def feed_video_session(session_id: str, fps: float = None):
+    responses = await session_manager.video_feed(session_id, fps)
     return StreamingResponse(responses,media_type="multipart/x-mixed-replace; boundary=frame")
 
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
 @router.get("/single-feed-video-session/{session_id}")
-async def feed_video_session(session_id: str):
-    responses = await session_manager.single_video_feed(session_id)
-    return StreamingResponse(responses,media_type="image/webp")
+async def single_feed_video_session(session_id: str, request: Request):
+    try:
+        snapshot = await session_manager.single_video_feed(session_id)
+    except RuntimeError as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+    if snapshot is None:
+        return JSONResponse({"error": "Session not found"}, status_code=404)
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": "no-cache",  # revalidate; unchanged thumbnails cost a 304
+        "X-Frame-Age": f"{snapshot.age:.3f}",
+    }
+    if etag_matches(request, snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(snapshot.data, media_type="image/webp", headers=headers)
+
+@router.get("/zone-counts/{session_id}")
+async def zone_counts(session_id: str):
+    responses = session_manager.zone_counts(session_id)
+    if responses is None:
+        return JSONResponse({"error": "Session not found"}, status_code=404)
+    return JSONResponse(responses)
 
 @router.post("/start/")
 async def start_video(process_id: str = Form(...), video_path: str = Form(...)):
@@ -0,0 +1,92 @@
+"""
+Measure the decode CPU cost per camera for each decode configuration.
+
+    python benchmarks/decode_benchmark.py clips/hls_1080p.mp4 --width 640 --every 5
+
+Every clip is decoded as fast as possible by the real ``StreamReader`` under
+each configuration. The report shows the frames handed to analytics, the
+process CPU time (including codec threads) and the share of one core that a
+camera would need at the clip's native frame rate.
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+import av
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from app.config.settings import settings
+from app.helpers.stream_reader import DecodeOptions, StreamReader
+
+def configurations(width, every):
+    return {
+        "native": DecodeOptions("NONE"),
+        "threads": DecodeOptions("AUTO"),
+        f"every-{every}": DecodeOptions("AUTO", every=every),
+        "keyframes": DecodeOptions("AUTO", skip_frame="NONKEY"),
+        f"scaled-{width}": DecodeOptions("AUTO", width=width),
+        f"scaled-{width}+every-{every}": DecodeOptions("AUTO", every=every, width=width),
+    }
+
+class CountingSink:
+    """Frame bus stand-in: keeps the shape of the last frame and releases it immediately."""
+    def __init__(self):
+        self.frames = 0
+        self.shape = None
+
+    def put(self, frame):
+        self.frames += 1
+        self.shape = frame.image.shape
+
+    def close(self):
+        pass
+
+def clip_seconds(path):
+    container = av.open(path)
+    try:
+        stream = next(s for s in container.streams if s.type == 'video')
+        if stream.duration is not None:
+            return float(stream.duration * stream.time_base)
+        return container.duration / av.time_base if container.duration else 0.0
+    finally:
+        container.close()
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+def run(path, options, pool_size):
+    sink = CountingSink()
+    reader = StreamReader(path, sink, os.path.basename(path), pool_size, decode=options)
+    cpu, wall = cpu_seconds(), time.perf_counter()
+    reader.start()
+    reader.thread.join()
+    return sink, cpu_seconds() - cpu, time.perf_counter() - wall, reader.frame_count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("clips", nargs="+", help="recorded video files")
+    parser.add_argument("--width", type=int, default=settings.INFERENCE_IMGSZ, help="decode-time width for the scaled runs")
+    parser.add_argument("--every", type=int, default=5, help="N for the every-Nth-frame runs")
+    parser.add_argument("--configs", help="comma separated subset of the configurations")
+    args = parser.parse_args()
+
+    configs = configurations(args.width, args.every)
+    if args.configs:
+        configs = {name: configs[name] for name in args.configs.split(",")}
+
+    print(f"{'clip':<24}{'config':<26}{'decoded':>9}{'handed':>8}{'size':>11}{'cpu s':>8}{'wall s':>8}{'cpu ms/f':>10}{'core %':>8}")
+    for path in args.clips:
+        seconds = clip_seconds(path)
+        for name, options in configs.items():
+            sink, cpu, wall, decoded = run(path, options, settings.FRAME_POOL_SIZE)
+            size = f"{sink.shape[1]}x{sink.shape[0]}" if sink.shape else "-"
+            per_frame = cpu / sink.frames * 1000 if sink.frames else 0
+            core = cpu / seconds * 100 if seconds else 0  # one core = 100 %, at the clip's real-time rate
+            print(f"{os.path.basename(path)[:23]:<24}{name:<26}{decoded:>9}{sink.frames:>8}{size:>11}"
+                  f"{cpu:>8.2f}{wall:>8.2f}{per_frame:>10.2f}{core:>8.1f}")
+
+if __name__ == "__main__":
+    main()
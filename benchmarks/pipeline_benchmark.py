@@ -0,0 +1,206 @@
+"""
+Replay recorded clips through the full analytics pipeline (frame bus ->
+scheduler -> detector -> tracker -> zones/crossings -> evidence/events) with
+local stand-ins for MinIO, MongoDB and websockets.
+
+    python benchmarks/pipeline_benchmark.py clips/highway.mp4 clips/gate.mp4 \
+        --cameras 8 --device clips/devices.json --ground-truth clips/counts.json
+
+Camera ``i`` replays clip ``i % len(clips)``. ``--device`` is a JSON object
+mapping clip file names to device settings (horizontal_line_points,
+vertical_line_points, zones, tracker, roi, imgsz, ...), the same keys as the
+credentials payload; ``--ground-truth`` maps clip file names to the expected
+number of line crossings. Frames are never dropped unless ``--realtime`` paces
+the clips at their native rate with the live drop policy.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+from collections import Counter
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from app.config.settings import settings
+from app.helpers.event_sink import CrossingEventSink, crossing_sink
+from app.helpers.evidence_uploader import evidence_uploader
+from app.helpers.inference_engine import inference_engine
+from app.helpers.minio_manager import MinioManager
+from app.helpers.pipeline_metrics import BUCKETS, Histogram
+from app.helpers.reid_service import reid_service
+from app.helpers.stream_reader import BLOCK, StreamReader
+from app.helpers.video_sessions import VideoSession
+from app.helpers.websocket_manager import RECENT_CAPTURED_DATA, websocket_manager
+
+# --- local stand-ins ---
+
+class LocalCollection:
+    """Just enough of a Motor collection for the crossing event sink."""
+    def __init__(self):
+        self.documents = []
+
+    async def insert_many(self, documents, ordered=True):
+        self.documents.extend(documents)
+
+class LocalWebSocket:
+    def __init__(self):
+        self.messages = 0
+
+    async def send_json(self, data):
+        self.messages += 1
+
+class LocalObjectStore:
+    def __init__(self):
+        self.objects = 0
+        self.bytes = 0
+
+    def put_frame(self, frame_id, data, extension, content_type):
+        self.objects += 1
+        self.bytes += len(data)
+        return frame_id + extension
+
+class PacedReader(StreamReader):
+    """StreamReader that releases frames at the clip's own timestamps, like a live camera."""
+    def _convert(self, frame):
+        if frame.time is not None:
+            if not hasattr(self, "_started"):
+                self._started = time.monotonic() - frame.time
+            delay = self._started + frame.time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return super()._convert(frame)
+
+def install_stand_ins():
+    collection, store, socket = LocalCollection(), LocalObjectStore(), LocalWebSocket()
+    CrossingEventSink.collection = property(lambda self: collection)
+    MinioManager.put_frame = staticmethod(store.put_frame)
+    websocket_manager.subscribe(RECENT_CAPTURED_DATA, socket)
+    return collection, store, socket
+
+# --- reporting ---
+
+def merge_stages(snapshots):
+    """Merge per-session stage snapshots into one Histogram per stage."""
+    merged = {}
+    for snapshot in snapshots:
+        for stage, data in snapshot.get("stages", {}).items():
+            histogram = merged.setdefault(stage, Histogram())
+            previous = 0
+            for index, cumulative in enumerate(data["buckets"]):
+                histogram.counts[index] += cumulative - previous
+                previous = cumulative
+            histogram.count += data["count"]
+            histogram.sum += data["sum"]
+    return merged
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB on Linux
+
+async def run(args):
+    collection, store, socket = install_stand_ins()
+    devices = {}
+    if args.device:
+        with open(args.device) as file:
+            devices = json.load(file)
+    truth = {}
+    if args.ground_truth:
+        with open(args.ground_truth) as file:
+            truth = json.load(file)
+
+    sessions = []
+    for index in range(args.cameras):
+        path = args.clips[index % len(args.clips)]
+        clip = os.path.basename(path)
+        options = {
+            "source": path,
+            "device_id": f"bench-{index}",
+            "device_name": f"{clip}#{index}",
+            "frame_drop_policy": settings.STREAM_DROP_POLICY if args.realtime else BLOCK,
+            "reconnect": False,
+            **devices.get(clip, {}),
+        }
+        if args.tracker:
+            options["tracker"] = args.tracker
+        session = VideoSession(path, options["device_id"], options["device_name"],
+                               options.get("horizontal_line_points"), options.get("vertical_line_points"), options)
+        websocket_manager.subscribe(session.topic, socket)
+        if args.realtime:
+            session.frame_bus.source_factory = lambda sink, session=session: PacedReader(
+                session.stream_url, sink, session.device_name, settings.FRAME_POOL_SIZE, False, session.metrics,
+                session.frame_bus.reconnect, session.frame_bus.decode)
+        sessions.append((clip, session))
+
+    crossing_sink.start()
+    await inference_engine.start()  # load the detector before the clock starts
+    started = time.perf_counter()
+    for _, session in sessions:
+        await session.start()
+    await asyncio.gather(*(session.task for _, session in sessions), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    await evidence_uploader.shutdown()
+    await crossing_sink.flush()
+
+    crossings = Counter(document["device_id"] for document in collection.documents)
+    frames = sum(session.metrics.frames for _, session in sessions)
+    stages = merge_stages(session.metrics.snapshot() for _, session in sessions)
+
+    print(f"\n{args.cameras} cameras, {frames} frames in {elapsed:.1f} s -> {frames / elapsed:.1f} fps total, "
+          f"{frames / elapsed / args.cameras:.1f} fps per camera, peak RSS {peak_rss_mb():.0f} MB")
+    print(f"\n{'stage':<12}{'count':>9}{'mean ms':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for stage, histogram in stages.items():
+        mean = histogram.sum / histogram.count * 1000 if histogram.count else 0
+        print(f"{stage:<12}{histogram.count:>9}{mean:>10.2f}{histogram.percentile(0.5) * 1000:>9.1f}"
+              f"{histogram.percentile(0.95) * 1000:>9.1f}{histogram.percentile(0.99) * 1000:>9.1f}")
+    print(f"(percentiles are bucket upper bounds: {', '.join(f'{bound * 1000:g}' for bound in BUCKETS)} ms)")
+
+    print(f"\n{'camera':<28}{'frames':>8}{'dropped':>9}{'crossings':>11}{'truth':>7}{'error':>7}")
+    errors = []
+    for clip, session in sessions:
+        count = crossings[session.device_id]
+        expected = truth.get(clip)
+        error = None if expected is None else count - expected
+        if error is not None:
+            errors.append(abs(error))
+        dropped = session.frame_buffer.dropped if session.frame_buffer else 0
+        print(f"{session.device_name[:27]:<28}{session.metrics.frames:>8}{dropped:>9}{count:>11}"
+              f"{'-' if expected is None else expected:>7}{'-' if error is None else error:>7}")
+    if errors:
+        print(f"mean absolute count error: {sum(errors) / len(errors):.2f}")
+
+    engine = inference_engine.metrics()
+    print(f"\ndetector: {engine['batches']} batches, {engine['avg_batch_size']} frames/batch; "
+          f"reid: {reid_service.metrics()}; evidence: {store.objects} uploads, {store.bytes / 1024:.0f} KiB")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({
+                "cameras": args.cameras,
+                "frames": frames,
+                "seconds": elapsed,
+                "fps": frames / elapsed,
+                "peak_rss_mb": peak_rss_mb(),
+                "stages": {stage: histogram.snapshot() for stage, histogram in stages.items()},
+                "crossings": {session.device_name: crossings[session.device_id] for _, session in sessions},
+            }, file, indent=2)
+
+    await inference_engine.shutdown()
+    reid_service.shutdown()
+    await crossing_sink.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("clips", nargs="+", help="recorded video files")
+    parser.add_argument("--cameras", type=int, default=1, help="simulated cameras (clips are reused round-robin)")
+    parser.add_argument("--device", help="JSON file {clip file name: device settings}")
+    parser.add_argument("--ground-truth", help="JSON file {clip file name: expected crossings}")
+    parser.add_argument("--tracker", help="override the tracker backend for every camera")
+    parser.add_argument("--realtime", action="store_true", help="pace clips at their native frame rate")
+    parser.add_argument("--json", help="also write the results to this file")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
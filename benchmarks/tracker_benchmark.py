@@ -0,0 +1,100 @@
+"""
+Compare tracker backends on recorded clips: tracker FPS and line-count accuracy.
+
+    python benchmarks/tracker_benchmark.py clips/highway.mp4 clips/gate.mp4 \
+        --line 0,360,1280,360 --ground-truth clips/counts.json
+
+``--ground-truth`` is a JSON object mapping clip file names to the number of
+vehicles that cross the line. Detections are computed once per clip and
+replayed to every backend, so only tracker time is measured.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import av
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from ultralytics import YOLO
+from app.config.settings import settings
+from app.helpers.boxmot_tracking import BoxmotTracking
+from app.helpers.line_crossing import CrossingEngine
+from app.helpers.tracker_backends import TRACKER_BACKENDS, create_tracker
+
+def decode(path, max_frames):
+    container = av.open(path)
+    try:
+        stream = next(s for s in container.streams if s.type == 'video')
+        for index, frame in enumerate(container.decode(stream)):
+            if max_frames and index >= max_frames:
+                break
+            yield frame.to_ndarray(format="bgr24")
+    finally:
+        container.close()
+
+def detect_clip(model, path, confidence, max_frames):
+    return [BoxmotTracking.process_detections(image, model, confidence) for image in decode(path, max_frames)]
+
+def count_crossings(backend, path, detections, engine, max_frames):
+    """Run one backend over a clip; returns (crossing count, tracker seconds, frames)."""
+    tracker = create_tracker(backend)
+    previous, counted = {}, set()
+    elapsed = 0.0
+    for image, detect in zip(decode(path, max_frames), detections):
+        started = time.perf_counter()
+        tracks = tracker.update(detect, image)
+        elapsed += time.perf_counter() - started
+        if not len(tracks):
+            continue
+        ids = tracks[:, 4].astype(int)
+        centroids = (tracks[:, 0:2] + tracks[:, 2:4]) / 2
+        known = [index for index, track_id in enumerate(ids) if track_id in previous]
+        if known:
+            hits = engine.crossings([previous[ids[index]] for index in known], centroids[known])
+            counted.update(int(ids[known[track_index]]) for track_index, _, _ in hits)
+        previous.update(zip(ids.tolist(), centroids))
+    return len(counted), elapsed, len(detections)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("clips", nargs="+", help="recorded video files")
+    parser.add_argument("--line", required=True, help="counting line as x1,y1,x2,y2")
+    parser.add_argument("--ground-truth", help="JSON file {clip file name: expected count}")
+    parser.add_argument("--trackers", default=",".join(TRACKER_BACKENDS), help="comma separated backends")
+    parser.add_argument("--weights", default=settings.YOLO_WEIGHTS)
+    parser.add_argument("--confidence", type=float, default=0.5)
+    parser.add_argument("--max-frames", type=int, default=0, help="limit frames per clip (0 = all)")
+    args = parser.parse_args()
+
+    x1, y1, x2, y2 = (float(value) for value in args.line.split(","))
+    engine = CrossingEngine(lines=[((x1, y1), (x2, y2))])
+    truth = {}
+    if args.ground_truth:
+        with open(args.ground_truth) as file:
+            truth = json.load(file)
+    backends = [name.strip().lower() for name in args.trackers.split(",") if name.strip()]
+
+    model = YOLO(args.weights)
+    rows = []
+    for path in args.clips:
+        detections = detect_clip(model, path, args.confidence, args.max_frames)
+        expected = truth.get(os.path.basename(path))
+        for backend in backends:
+            count, elapsed, frames = count_crossings(backend, path, detections, engine, args.max_frames)
+            fps = frames / elapsed if elapsed else float("inf")
+            error = None if expected is None else count - expected
+            accuracy = None if not expected else max(0.0, 1 - abs(error) / expected)
+            rows.append((os.path.basename(path), backend, frames, fps, count, expected, error, accuracy))
+
+    print(f"{'clip':<24}{'tracker':<11}{'frames':>8}{'fps':>10}{'count':>7}{'truth':>7}{'error':>7}{'accuracy':>10}")
+    for clip, backend, frames, fps, count, expected, error, accuracy in rows:
+        print(
+            f"{clip[:23]:<24}{backend:<11}{frames:>8}{fps:>10.1f}{count:>7}"
+            f"{'-' if expected is None else expected:>7}{'-' if error is None else error:>7}"
+            f"{'-' if accuracy is None else f'{accuracy:.1%}':>10}"
+        )
+
+if __name__ == "__main__":
+    main()
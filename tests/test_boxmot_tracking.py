@@ -0,0 +1,47 @@
+import asyncio
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("boxmot")
+pytest.importorskip("motor")
+pytest.importorskip("fastapi")
+from app.helpers.boxmot_tracking import BoxmotTracking
+from app.helpers.track_store import TrackStore
+from app.helpers.zone_geometry import LINE, Zone, ZoneSet
+
+MODEL = SimpleNamespace(names={2: "car"})
+
+def track(track_id, x, y):
+    return [x - 5, y - 5, x + 5, y + 5, track_id, 0.9, 2]
+
+def run(zone_set, store, frames):
+    """Feed one list of (track_id, x, y) per frame; returns the reported events."""
+    events = []
+    async def report(event):
+        events.append(event)
+    async def feed():
+        for index, rows in enumerate(frames):
+            tracks = np.array([track(*row) for row in rows], dtype=np.float32)
+            await BoxmotTracking.evaluate_crossings(tracks, zone_set, store, f"f{index}", index, MODEL, "cam", "d1", report)
+    asyncio.run(feed())
+    return events
+
+def test_a_track_counts_once_on_every_line():
+    zone_set = ZoneSet([Zone("upper", LINE, [(0, 100), (400, 100)]), Zone("lower", LINE, [(0, 200), (400, 200)])])
+    store = TrackStore(history_size=8, max_age=30, crossed_ttl=900)
+    events = run(zone_set, store, [[(1, 50, 50)], [(1, 50, 150)], [(1, 50, 90)], [(1, 50, 250)]])
+    # Crossing back over "upper" is not counted again
+    assert [(event["zone"], event["direction"]) for event in events] == [
+        ("upper", "crossed UP to DOWN."),
+        ("lower", "crossed UP to DOWN."),
+    ]
+    assert zone_set.counters()["upper"]["total"] == 1
+    assert zone_set.counters()["lower"]["total"] == 1
+
+def test_both_lines_crossed_in_one_frame():
+    zone_set = ZoneSet([Zone("upper", LINE, [(0, 100), (400, 100)]), Zone("lower", LINE, [(0, 200), (400, 200)])])
+    store = TrackStore(history_size=8, max_age=30, crossed_ttl=900)
+    events = run(zone_set, store, [[(1, 50, 50)], [(1, 50, 250)]])
+    assert sorted(event["zone"] for event in events) == ["lower", "upper"]
@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+
+pytest.importorskip("motor")
+pytest.importorskip("dotenv")
+from pymongo.errors import BulkWriteError
+from app.helpers import crossing_aggregator
+from app.helpers.crossing_aggregator import CrossingAggregator, bucket_start
+
+EVENT = {"device_id": "cam", "zone": "horizontal", "direction": "crossed UP to DOWN.", "label": "car", "timestamp": "2024-05-01 12:30:15"}
+
+class FakeRollups:
+    """
+    Applies the aggregator's per-writer update pipelines: writer fields are
+    set to absolute counts and ``count`` is their sum.
+    """
+    def __init__(self):
+        self.documents = {}
+        self.mode = "ok"
+
+    def apply(self, operations):
+        for operation in operations:
+            query, pipeline = operation
+            key = tuple(sorted((name, str(value)) for name, value in query.items()))
+            document = self.documents.setdefault(key, dict(query))
+            writers = document.setdefault("writers", {"legacy": document.get("count", 0)})
+            for field, value in pipeline[1]["$set"].items():
+                writers[field.split(".", 1)[1]] = value
+            document["count"] = sum(writers.values())
+
+    async def bulk_write(self, operations, ordered=True):
+        if self.mode == "lost":
+            raise ConnectionError("no reply")
+        self.apply(operations)
+        if self.mode == "timeout":
+            await asyncio.sleep(10)  # written, but the reply never arrives in time
+        if self.mode == "reject-first":
+            raise BulkWriteError({"writeErrors": [{"index": 0, "errmsg": "rejected"}]})
+
+    def counts(self, resolution):
+        return sorted(document["count"] for document in self.documents.values() if document["resolution"] == resolution)
+
+@pytest.fixture
+def rollups(monkeypatch):
+    rollups = FakeRollups()
+    monkeypatch.setattr(CrossingAggregator, "collection", property(lambda self: rollups))
+    monkeypatch.setattr(crossing_aggregator, "UpdateOne", lambda query, update, upsert: (query, update))
+    return rollups
+
+def test_every_event_counts_in_each_resolution(rollups):
+    aggregator = CrossingAggregator("rollups", 10, 1)
+    for _ in range(3):
+        aggregator.record(EVENT)
+    aggregator.record({**EVENT, "label": "truck"})
+    asyncio.run(aggregator.flush())
+    assert rollups.counts("1m") == rollups.counts("1h") == [1, 3]
+    assert aggregator.live_counts("cam")[0]["count"] == 3
+    assert not aggregator.pending
+
+def test_retrying_a_timed_out_write_does_not_double_count(rollups):
+    async def run():
+        aggregator = CrossingAggregator("rollups", 10, 0.05)
+        aggregator.record(EVENT)
+        aggregator.record(EVENT)
+        rollups.mode = "timeout"
+        await aggregator.flush()
+        assert aggregator.failures == 1 and aggregator.pending
+        rollups.mode = "ok"
+        aggregator.record(EVENT)
+        await aggregator.flush()
+        assert rollups.counts("15m") == [3]
+    asyncio.run(run())
+
+def test_failed_writes_stay_pending(rollups):
+    async def run():
+        aggregator = CrossingAggregator("rollups", 10, 1)
+        aggregator.record(EVENT)
+        rollups.mode = "lost"
+        await aggregator.flush()
+        assert rollups.documents == {} and len(aggregator.pending) == 3
+        rollups.mode = "reject-first"
+        await aggregator.flush()
+        assert len(aggregator.pending) == 1  # only the rejected upsert
+        rollups.mode = "ok"
+        await aggregator.flush()
+        assert not aggregator.pending and rollups.counts("1m") == [1]
+    asyncio.run(run())
+
+def test_restarts_add_to_existing_counts(rollups):
+    async def run():
+        for _ in range(2):  # e.g. the API process restarted
+            aggregator = CrossingAggregator("rollups", 10, 1)
+            aggregator.record(EVENT)
+            await aggregator.flush()
+        assert rollups.counts("1h") == [2]
+    asyncio.run(run())
+
+def test_query_includes_unflushed_counts(rollups):
+    async def run():
+        aggregator = CrossingAggregator("rollups", 10, 1)
+        aggregator.record(EVENT)
+        rows = []
+
+        async def aggregate(pipeline):
+            for row in rows:
+                yield row
+        rollups.aggregate = aggregate
+        bucket = bucket_start(datetime(2024, 5, 1, 12, 30, 15, tzinfo=timezone.utc).timestamp(), 900)
+        counts = await aggregator.query("15m", bucket, bucket + timedelta(hours=1), "cam", ("direction",))
+        assert counts == [{"bucket": bucket.isoformat(), "direction": "crossed UP to DOWN.", "count": 1}]
+        with pytest.raises(ValueError):
+            await aggregator.query("5m", bucket, bucket)
+    asyncio.run(run())
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import pytest
+
+pytest.importorskip("motor")
+pytest.importorskip("dotenv")
+from app.helpers.event_sink import CrossingEventSink
+
+class FakeCollection:
+    """insert_many that fails while ``down`` is set and otherwise stores documents by ``_id``."""
+    def __init__(self):
+        self.down = False
+        self.documents = {}
+
+    async def insert_many(self, documents, ordered=True):
+        if self.down:
+            raise ConnectionError("MongoDB unreachable")
+        for document in documents:
+            self.documents[document["_id"]] = document
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(CrossingEventSink, "collection", property(lambda self: collection))
+    return collection
+
+def make_sink(tmp_path, flush_size=2, max_buffer=4):
+    return CrossingEventSink("events", flush_size, 60, max_buffer, 1, str(tmp_path / "events.journal"))
+
+def events(count, start=0):
+    return [{"device_id": "cam", "sequence": index} for index in range(start, start + count)]
+
+def test_failed_batches_spill_and_replay(tmp_path, collection):
+    async def run():
+        sink = make_sink(tmp_path)
+        collection.down = True
+        for event in events(3):
+            sink.submit(event)
+        await sink.flush()
+        assert sink.buffer == [] and sink.spilled == 3
+        assert os.path.exists(sink.journal_path)
+
+        collection.down = False
+        sink.submit(events(1, start=3)[0])
+        await sink.flush()
+        assert sink.replayed == 3 and sink.written == 1
+        assert not os.path.exists(sink.journal_path)
+        assert sorted(document["sequence"] for document in collection.documents.values()) == [0, 1, 2, 3]
+    asyncio.run(run())
+
+def test_replay_keeps_ids(tmp_path, collection):
+    async def run():
+        sink = make_sink(tmp_path)
+        collection.down = True
+        for event in events(2):
+            sink.submit(event)
+        pending = list(sink.buffer)
+        await sink.flush()
+        ids = [document["_id"] for document in pending]  # assigned before the failed attempt
+        collection.down = False
+        await sink.flush()
+        # A batch that did reach MongoDB only produces duplicate keys when replayed
+        assert sorted(map(str, collection.documents)) == sorted(map(str, ids))
+    asyncio.run(run())
+
+def test_overflow_spills_the_oldest_events(tmp_path, collection):
+    async def run():
+        sink = make_sink(tmp_path, flush_size=2, max_buffer=4)
+        for event in events(5):
+            sink.submit(event)
+        assert [event["sequence"] for event in sink.buffer] == [2, 3, 4]
+        await asyncio.gather(*sink._spills)
+        assert sink.spilled == 2
+
+        await sink.shutdown()
+        assert sorted(document["sequence"] for document in collection.documents.values()) == [0, 1, 2, 3, 4]
+        assert not os.path.exists(sink.journal_path)
+    asyncio.run(run())
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import pytest
+
+pytest.importorskip("av")
+pytest.importorskip("cv2")
+pytest.importorskip("dotenv")
+from app.helpers.frame_bus import FrameBus
+from app.helpers.stream_reader import DROP_NEWEST, DROP_OLDEST, FrameBuffer
+
+class FakeReader:
+    """Decode thread stand-in: puts ``frames`` into the bus, then waits to be stopped."""
+    def __init__(self, sink, frames):
+        self.sink = sink
+        self.frames = frames
+        self.released = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def is_alive(self):
+        return self.thread.is_alive()
+
+    def start(self):
+        self.thread.start()
+
+    def _run(self):
+        self.released.wait(5)
+        for frame in self.frames if not self.stopped.is_set() else ():
+            self.sink.put(frame)
+        self.stopped.wait(5)
+
+    async def stop(self):
+        self.stopped.set()
+        self.released.set()
+        await asyncio.to_thread(self.thread.join)
+
+def make_bus(frames):
+    bus = FrameBus("rtsp://camera")
+    readers = []
+    def factory(sink):
+        readers.append(FakeReader(sink, frames))
+        return readers[-1]
+    bus.source_factory = factory
+    return bus, readers
+
+async def drain(buffer, count):
+    return [await asyncio.wait_for(buffer.get(), 5) for _ in range(count)]
+
+def test_one_decoder_fans_out_to_every_subscriber():
+    async def run():
+        bus, readers = make_bus(["a", "b"])
+        first = bus.subscribe(maxsize=4)
+        second = bus.subscribe(maxsize=4)
+        assert len(readers) == 1 and bus.is_live
+        readers[0].released.set()
+        assert await drain(first, 2) == ["a", "b"]
+        assert await drain(second, 2) == ["a", "b"]
+        assert bus.latest == "b"
+        await bus.unsubscribe(first)
+        assert bus.is_live  # still one subscriber
+        await bus.unsubscribe(second)
+        assert not bus.is_live and bus.reader is None
+    asyncio.run(run())
+
+def test_resubscribing_starts_a_new_decoder_and_ignores_the_old_one():
+    async def run():
+        bus, readers = make_bus(["x"])
+        await bus.unsubscribe(bus.subscribe())
+        buffer = bus.subscribe(maxsize=4)
+        assert len(readers) == 2
+        bus.put("from the event loop")  # not the current decode thread: ignored
+        readers[1].released.set()
+        assert await drain(buffer, 1) == ["x"]
+        await bus.unsubscribe(buffer)
+    asyncio.run(run())
+
+def test_frame_buffer_policies():
+    async def run():
+        oldest = FrameBuffer(2, DROP_OLDEST)
+        newest = FrameBuffer(2, DROP_NEWEST)
+        for frame in (1, 2, 3):
+            oldest.put(frame)
+            newest.put(frame)
+        assert await drain(oldest, 2) == [2, 3] and oldest.dropped == 1
+        assert await drain(newest, 2) == [1, 2] and newest.dropped == 1
+        oldest.close()
+        assert await oldest.get() is None
+        with pytest.raises(ValueError):
+            FrameBuffer(1, "latest")
+    asyncio.run(run())
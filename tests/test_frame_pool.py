@@ -0,0 +1,66 @@
+import gc
+import threading
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from app.helpers import frame_pool
+from app.helpers.frame_pool import FramePool, SharedFramePoolReader
+
+SHAPE = (4, 6, 3)
+
+def publish(pool, slot, image, index):
+    pool.stamp(slot, index)
+    pool.publish(SimpleNamespace(slot=slot, image=image))
+
+def test_buffers_return_when_views_are_dropped():
+    pool = FramePool(SHAPE, 2)
+    slot, image = pool.acquire()
+    _, other = pool.acquire()
+    assert pool.in_use == 2
+    assert pool.acquire() == (None, None) and pool.misses == 1
+    del image
+    gc.collect()
+    assert pool.in_use == 1
+    assert pool.acquire()[0] == slot
+
+def test_published_frames_stay_pinned():
+    pool = FramePool(SHAPE, 3)
+    for index in (1, 2, 3):
+        slot, image = pool.acquire()
+        publish(pool, slot, image, index)
+        del image
+    gc.collect()
+    assert pool.in_use == 2  # the last two published frames
+
+@pytest.mark.parametrize("shared", [False, True])
+def test_retire_with_pinned_frames_does_not_deadlock(shared):
+    pool = FramePool(SHAPE, 2, shared=shared)
+    slot, image = pool.acquire()
+    publish(pool, slot, image, 1)
+    del image
+    retire = threading.Thread(target=pool.retire, daemon=True)
+    retire.start()
+    retire.join(timeout=5)
+    assert not retire.is_alive(), "retire() deadlocked releasing a pinned frame"
+    assert pool.in_use == 0
+    if shared:
+        assert pool.buffers is None  # last frame returned: shared memory closed
+
+def test_shared_reader_sees_the_latest_frame(monkeypatch):
+    # The reader normally attaches from another process; here it must not
+    # unregister the segment the pool registered with the same resource tracker.
+    monkeypatch.setattr(frame_pool.resource_tracker, "unregister", lambda name, rtype: None)
+    pool = FramePool(SHAPE, 2, shared=True)
+    try:
+        reader = SharedFramePoolReader(pool.name, SHAPE, 2)
+        assert reader.read_latest() is None
+        slot, image = pool.acquire()
+        image[:] = 7
+        publish(pool, slot, image, 5)
+        stamp, copy = reader.read_latest()
+        assert stamp == 5 and np.all(copy == 7)
+        assert reader.read_latest(last_stamp=5) is None
+        reader.close()
+    finally:
+        del image
+        pool.retire()
@@ -0,0 +1,97 @@
+import asyncio
+import numpy as np
+import pytest
+
+pytest.importorskip("ultralytics")
+pytest.importorskip("cv2")
+pytest.importorskip("boxmot")
+pytest.importorskip("motor")
+pytest.importorskip("fastapi")
+from app.helpers.inference_engine import InferenceEngine
+
+class Tensor:
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+class Boxes:
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy, self.conf, self.cls = Tensor(xyxy), Tensor(conf), Tensor(cls)
+
+    def __len__(self):
+        return len(self.conf.values)
+
+class FakeModel:
+    """One 10x10 box at the image origin per image, with ``confidence``; records each forward pass."""
+    names = {2: "car"}
+
+    def __init__(self, confidence=0.9, error=None):
+        self.confidence = confidence
+        self.error = error
+        self.calls = []
+
+    def predict(self, images, conf, imgsz, classes, verbose):
+        self.calls.append({"shapes": [image.shape for image in images], "conf": conf, "imgsz": imgsz})
+        if self.error:
+            raise self.error
+        return [type("Result", (), {"boxes": Boxes([[0, 0, 10, 10]], [self.confidence], [2])})() for _ in images]
+
+def make_engine(model, max_batch_size=8, max_wait_ms=50):
+    engine = InferenceEngine("weights.pt", 1, max_batch_size, max_wait_ms)
+    engine.models = [model]  # start() only spawns the workers
+    return engine
+
+def frame(height=100, width=200):
+    return np.zeros((height, width, 3), dtype=np.uint8)
+
+def run(engine, *requests):
+    async def main():
+        try:
+            return await asyncio.gather(*(engine.detect(*args, **kwargs) for args, kwargs in requests), return_exceptions=True)
+        finally:
+            await engine.shutdown()
+    return asyncio.run(main())
+
+def test_concurrent_sessions_share_one_forward_pass():
+    model = FakeModel()
+    engine = make_engine(model)
+    results = run(engine, *[((frame(), 0.5), {}) for _ in range(3)])
+    assert len(model.calls) == 1 and len(model.calls[0]["shapes"]) == 3
+    assert all(result.shape == (1, 6) for result in results)
+    assert engine.metrics()["batches"] == 1 and engine.metrics()["frames"] == 3
+
+def test_batches_are_capped():
+    model = FakeModel()
+    engine = make_engine(model, max_batch_size=2)
+    run(engine, *[((frame(), 0.5), {}) for _ in range(3)])
+    assert [len(call["shapes"]) for call in model.calls] == [2, 1]
+
+def test_one_pass_per_input_size():
+    model = FakeModel()
+    engine = make_engine(model)
+    run(engine, ((frame(), 0.5), {"imgsz": 320}), ((frame(), 0.5), {"imgsz": 640}), ((frame(), 0.5), {"imgsz": 320}))
+    assert sorted((call["imgsz"], len(call["shapes"])) for call in model.calls) == [(320, 2), (640, 1)]
+
+def test_each_session_keeps_its_own_threshold():
+    model = FakeModel(confidence=0.6)
+    engine = make_engine(model)
+    low, high = run(engine, ((frame(), 0.5), {}), ((frame(), 0.7), {}))
+    assert model.calls[0]["conf"] == 0.5  # lowest requested threshold
+    assert len(low) == 1 and len(high) == 0
+
+def test_roi_is_cropped_and_boxes_return_in_frame_coordinates():
+    model = FakeModel()
+    engine = make_engine(model)
+    (detection,) = run(engine, ((frame(), 0.5), {"roi": (40, 20, 140, 80)}))
+    assert model.calls[0]["shapes"] == [(60, 100, 3)]
+    assert detection[0, :4].tolist() == [40, 20, 50, 30]
+
+def test_predict_errors_reach_every_caller():
+    engine = make_engine(FakeModel(error=RuntimeError("CUDA out of memory")))
+    results = run(engine, ((frame(), 0.5), {}), ((frame(), 0.5), {}))
+    assert all(isinstance(result, RuntimeError) for result in results)
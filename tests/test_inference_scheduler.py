@@ -0,0 +1,66 @@
+import asyncio
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("dotenv")
+from app.helpers.inference_scheduler import InferenceScheduler
+
+class FakeGate:
+    method = "diff"
+    motion = 0.0
+
+    def __init__(self, moving=False):
+        self.moving = moving
+        self.frames = 0
+
+    def update(self, image):
+        self.frames += 1
+        return self.moving
+
+    def reset(self):
+        pass
+
+def decisions(scheduler, timestamps, active_tracks=0, image=None):
+    async def run():
+        return [await scheduler.should_detect(image, timestamp, active_tracks) for timestamp in timestamps]
+    return asyncio.run(run())
+
+def frames(count, fps=30):
+    return [index / fps for index in range(count)]
+
+def test_detect_every_nth_frame():
+    scheduler = InferenceScheduler(detect_every=3)
+    assert decisions(scheduler, frames(7)) == [True, False, False, True, False, False, True]
+    assert scheduler.stats()["detect_ratio"] == round(3 / 7, 3)
+
+def test_target_fps_on_a_faster_feed():
+    scheduler = InferenceScheduler(target_fps=10)
+    assert decisions(scheduler, frames(9)) == [True, False, False] * 3
+
+def test_still_zones_skip_detection_until_the_idle_interval():
+    gate = FakeGate(moving=False)
+    scheduler = InferenceScheduler(motion_gate=gate, idle_interval=1.0)
+    result = decisions(scheduler, [0, 0.1, 0.5, 0.9, 1.0, 1.1])
+    assert result == [True, False, False, False, True, False]
+    assert gate.frames == 6  # the gate sees every frame
+    assert scheduler.stats()["inferences_saved"] == 4
+
+def test_motion_or_active_tracks_keep_detecting():
+    assert decisions(InferenceScheduler(motion_gate=FakeGate(moving=True)), frames(3)) == [True] * 3
+    assert decisions(InferenceScheduler(motion_gate=FakeGate()), frames(3), active_tracks=2) == [True] * 3
+
+def test_adaptive_interval_stretches_on_a_still_scene():
+    scheduler = InferenceScheduler(detect_every=1, adaptive=True, max_interval=4, motion_threshold=2.0, max_load=100)
+    still = np.full((72, 128, 3), 80, dtype=np.uint8)
+    decisions(scheduler, frames(3), image=still)
+    assert scheduler.interval == 2
+
+    busy = [np.random.default_rng(seed).integers(0, 255, (72, 128, 3), dtype=np.uint8) for seed in range(2)]
+    for index, image in enumerate(busy):
+        decisions(scheduler, [1 + index / 30], image=image)
+    assert scheduler.interval == 1
+
+@pytest.mark.parametrize("value, expected", [("false", False), ("0", False), ("No", False), ("true", True), (True, True), (False, False)])
+def test_adaptive_device_setting(value, expected):
+    assert InferenceScheduler.from_device({"adaptive_inference": value, "motion_gate": "off"}).adaptive is expected
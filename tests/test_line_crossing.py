@@ -0,0 +1,52 @@
+import numpy as np
+from app.helpers.line_crossing import CrossingEngine, box_iou
+
+HORIZONTAL = ((0, 100), (200, 100))
+VERTICAL = ((100, 0), (100, 200))
+
+def crossings(engine, previous, current):
+    return engine.crossings(np.array(previous, dtype=np.float32), np.array(current, dtype=np.float32))
+
+def test_moving_down_crosses_up_to_down():
+    engine = CrossingEngine([HORIZONTAL])
+    hits = crossings(engine, [(50, 50)], [(50, 150)])
+    assert hits.tolist() == [[0, 0, 1]]
+    assert engine.direction(0, 1) == "crossed UP to DOWN."
+
+def test_moving_up_crosses_down_to_up():
+    engine = CrossingEngine([HORIZONTAL])
+    track, line, sign = crossings(engine, [(50, 150)], [(50, 50)])[0]
+    assert engine.direction(line, sign) == "crossed DOWN to UP."
+
+def test_vertical_line_directions():
+    engine = CrossingEngine([VERTICAL])
+    track, line, sign = crossings(engine, [(50, 20)], [(150, 20)])[0]
+    assert engine.direction(line, sign) == "crossed LEFT to RIGHT."
+    track, line, sign = crossings(engine, [(150, 20)], [(50, 20)])[0]
+    assert engine.direction(line, sign) == "crossed RIGHT to LEFT."
+
+def test_segment_drawn_backwards_keeps_labels():
+    forward = CrossingEngine([HORIZONTAL])
+    backward = CrossingEngine([(HORIZONTAL[1], HORIZONTAL[0])])
+    assert crossings(backward, [(50, 50)], [(50, 150)]).tolist() == crossings(forward, [(50, 50)], [(50, 150)]).tolist()
+    assert backward.labels == forward.labels
+
+def test_crossing_outside_the_segment_is_ignored():
+    engine = CrossingEngine([HORIZONTAL])
+    assert len(crossings(engine, [(300, 50)], [(300, 150)])) == 0
+
+def test_no_crossing_without_movement_across():
+    engine = CrossingEngine([HORIZONTAL, VERTICAL])
+    assert len(crossings(engine, [(20, 20)], [(30, 40)])) == 0
+    assert crossings(CrossingEngine(), [(50, 50)], [(50, 150)]).shape == (0, 3)
+    assert crossings(engine, np.empty((0, 2)), np.empty((0, 2))).shape == (0, 3)
+
+def test_several_tracks_and_lines_in_one_pass():
+    engine = CrossingEngine([HORIZONTAL, VERTICAL])
+    hits = crossings(engine, [(50, 50), (150, 20), (10, 10)], [(50, 150), (50, 20), (12, 12)])
+    assert sorted(map(tuple, hits.tolist())) == [(0, 0, 1), (1, 1, 1)]
+
+def test_box_iou():
+    a = np.array([[0, 0, 10, 10]], dtype=np.float32)
+    b = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]], dtype=np.float32)
+    np.testing.assert_allclose(box_iou(a, b), [[1.0, 1 / 3, 0.0]], rtol=1e-6)
@@ -0,0 +1,21 @@
+from datetime import datetime, timezone
+import pytest
+
+pytest.importorskip("motor")
+from bson import ObjectId
+from app.helpers.mongodb_manager import decode_cursor, encode_cursor
+
+def test_cursor_round_trip():
+    document = {"_id": ObjectId(), "timestamp": datetime(2024, 5, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)}
+    assert decode_cursor(encode_cursor(document)) == (document["timestamp"], document["_id"])
+
+def test_naive_timestamps_are_utc():
+    object_id = ObjectId()
+    naive = encode_cursor({"_id": object_id, "timestamp": datetime(2024, 5, 1, 12, 30)})
+    aware = encode_cursor({"_id": object_id, "timestamp": datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)})
+    assert naive == aware
+
+@pytest.mark.parametrize("cursor", ["", "123", "abc_def", f"x_{ObjectId()}"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
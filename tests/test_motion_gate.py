@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+from app.helpers.motion_gate import FRAME_DIFF, MOG2, MotionGate
+from app.helpers.zone_geometry import LINE, POLYGON, Zone, ZoneSet
+
+HEIGHT, WIDTH = 360, 640
+
+def background():
+    return np.full((HEIGHT, WIDTH, 3), 80, dtype=np.uint8)
+
+def with_square(x, y, size=60):
+    image = background()
+    image[y:y + size, x:x + size] = 255
+    return image
+
+def test_frame_diff_detects_a_moving_object():
+    gate = MotionGate(FRAME_DIFF, width=160, min_area=0.002)
+    assert gate.update(background())  # nothing to compare with yet
+    assert not gate.update(background())
+    assert gate.motion == 0
+    assert gate.update(with_square(300, 150))
+
+def test_motion_outside_the_zones_is_ignored():
+    zone_set = ZoneSet([Zone("gate", POLYGON, [(0, 0), (200, 0), (200, 200), (0, 200)])])
+    gate = MotionGate(FRAME_DIFF, width=160, min_area=0.01, zone_set=zone_set)
+    gate.update(background())
+    assert not gate.update(with_square(450, 250))  # far from the polygon
+    gate.update(background())
+    assert gate.update(with_square(50, 50))
+
+def test_lines_watch_a_band_around_them():
+    zone_set = ZoneSet([Zone("horizontal", LINE, [(0, 180), (640, 180)])])
+    gate = MotionGate(FRAME_DIFF, width=160, min_area=0.01, line_band=0.08, zone_set=zone_set)
+    gate.update(background())
+    assert not gate.update(with_square(300, 10))  # top of the frame, outside the band
+    gate.update(background())
+    assert gate.update(with_square(300, 160))
+
+def test_mog2_learns_the_background():
+    gate = MotionGate(MOG2, width=160, min_area=0.002)
+    for _ in range(30):
+        gate.update(background())
+    assert not gate.update(background())
+    assert gate.update(with_square(300, 150))
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        MotionGate("optical-flow")
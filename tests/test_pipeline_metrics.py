@@ -0,0 +1,67 @@
+import threading
+from app.helpers.pipeline_metrics import BUCKETS, Histogram, PrometheusWriter
+
+def samples(text):
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+
+def test_large_counters_keep_full_precision():
+    writer = PrometheusWriter()
+    writer.counter("session_frames_total", 1234567)
+    writer.gauge("fps", 29.97)
+    writer.gauge("ratio", 1 / 3)
+    values = samples(writer.render())
+    assert values["cv_session_frames_total"] == "1234567"
+    assert values["cv_fps"] == "29.97"
+    assert float(values["cv_ratio"]) == 1 / 3
+
+def test_histogram_exposition():
+    histogram = Histogram()
+    for seconds in (0.0004, 0.003, 0.003, 20):
+        histogram.observe(seconds)
+    writer = PrometheusWriter()
+    writer.histogram("stage_seconds", histogram.snapshot(), {"stage": "decode"})
+    values = samples(writer.render())
+    assert values['cv_stage_seconds_bucket{stage="decode",le="0.0005"}'] == "1"
+    assert values['cv_stage_seconds_bucket{stage="decode",le="0.005"}'] == "3"
+    assert values['cv_stage_seconds_bucket{stage="decode",le="+Inf"}'] == "4"
+    assert values['cv_stage_seconds_count{stage="decode"}'] == "4"
+    assert float(values['cv_stage_seconds_sum{stage="decode"}']) == 20.0064
+
+def test_snapshot_percentiles():
+    histogram = Histogram()
+    for _ in range(98):
+        histogram.observe(0.004)
+    histogram.observe(0.2)
+    histogram.observe(0.2)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert snapshot["p50_ms"] == 5.0
+    assert snapshot["p99_ms"] == 250.0
+    assert snapshot["buckets"][-1] == 100
+    assert len(snapshot["buckets"]) == len(BUCKETS) + 1
+
+def test_snapshot_percentiles_match_its_buckets_under_concurrent_observes():
+    histogram = Histogram()
+    stop = threading.Event()
+
+    def observe():
+        while not stop.is_set():
+            histogram.observe(0.0004)
+            histogram.observe(3.0)
+
+    threads = [threading.Thread(target=observe) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(200):
+            snapshot = histogram.snapshot()
+            if not snapshot["count"]:
+                continue
+            # p50 from the snapshot's own buckets
+            rank = 0.5 * snapshot["count"]
+            expected = next((bound for bound, seen in zip(BUCKETS, snapshot["buckets"]) if seen >= rank), BUCKETS[-1])
+            assert snapshot["p50_ms"] == expected * 1000
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
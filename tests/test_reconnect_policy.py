@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip("av")
+pytest.importorskip("cv2")
+pytest.importorskip("dotenv")
+from app.helpers.stream_reader import ReconnectPolicy
+
+def test_delay_doubles_up_to_the_cap():
+    policy = ReconnectPolicy(base_delay=1, max_delay=10, jitter=0)
+    assert [policy.delay(attempt) for attempt in range(6)] == [1, 2, 4, 8, 10, 10]
+    assert policy.delay(10_000) == 10
+
+def test_jitter_only_shortens_the_delay():
+    policy = ReconnectPolicy(base_delay=2, max_delay=60, jitter=0.5)
+    delays = [policy.delay(3) for _ in range(200)]
+    assert all(8 <= delay <= 16 for delay in delays)
+    assert len(set(delays)) > 1
+
+def test_attempt_limit():
+    assert not ReconnectPolicy(1, 10).exhausted(1_000)  # 0 = retry forever
+    limited = ReconnectPolicy(1, 10, max_attempts=3)
+    assert not limited.exhausted(2)
+    assert limited.exhausted(3)
+
+def test_open_options():
+    assert ReconnectPolicy(1, 10).open_options() == {}
+    assert ReconnectPolicy(1, 10, open_timeout=5, read_timeout=2).open_options() == {"timeout": (5, 2)}
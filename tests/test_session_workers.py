@@ -0,0 +1,102 @@
+import asyncio
+import os
+import time
+import pytest
+
+pytest.importorskip("av")
+pytest.importorskip("cv2")
+pytest.importorskip("boxmot")
+pytest.importorskip("ultralytics")
+pytest.importorskip("motor")
+pytest.importorskip("fastapi")
+from app.helpers import session_workers
+from app.helpers.session_workers import SessionWorkerPool
+from app.helpers.stream_reader import ReconnectPolicy
+
+def fake_shard(index, commands, results):
+    """
+    Worker process stand-in: reports its pid and a status per started session.
+    A session ID "crash:<marker>" makes the shard exit once (until the marker exists).
+    """
+    while True:
+        command = commands.get()
+        if command[0] == "start":
+            session_id = command[1]
+            results.put(("metrics", index, {"pid": os.getpid()}))
+            results.put(("status", session_id, {"frame_count": 5, "is_running": True}))
+            if session_id.startswith("crash:") and not os.path.exists(session_id[6:]):
+                open(session_id[6:], "w").close()
+                os._exit(3)
+        elif command[0] == "stop":
+            results.put(("stopped", command[1]))
+        elif command[0] == "shutdown":
+            return
+
+class FakeFrameBus:
+    source_factory = None
+
+class FakeSession:
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.device_name = session_id
+        self.topic = f"session/{session_id}"
+        self.frame_bus = FakeFrameBus()
+        self.worker_status = None
+        self.is_running = False
+        self.frame_count = 0
+
+    def config(self):
+        return {}
+
+async def wait_for(condition, timeout=60):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the worker pool"
+        await asyncio.sleep(0.1)
+
+def pids(pool):
+    return {index: metrics.get("pid") for index, metrics in pool.shard_metrics.items()}
+
+def test_a_crashed_shard_restarts_alone(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_workers, "run_shard", fake_shard)
+
+    async def run():
+        pool = SessionWorkerPool(2, ReconnectPolicy(0.1, 5))
+        crashing, healthy = FakeSession(f"crash:{tmp_path / 'crashed'}"), FakeSession("healthy")
+        try:
+            await pool.start(crashing)
+            await pool.start(healthy)
+            assert pool.sessions[crashing.session_id][1] != pool.sessions[healthy.session_id][1]
+            crash_shard, healthy_shard = pool.sessions[crashing.session_id][1], pool.sessions[healthy.session_id][1]
+
+            await wait_for(lambda: pool.shards[crash_shard]["restarts"] == 1 and crash_shard in pool.shard_metrics)
+            await wait_for(lambda: healthy_shard in pool.shard_metrics)
+            before = pids(pool)[healthy_shard]
+            assert pool.shards[healthy_shard]["process"].is_alive()
+            assert pool.shards[healthy_shard]["restarts"] == 0
+            assert pids(pool)[healthy_shard] == before
+
+            # The session was started again on the new process and keeps reporting
+            await wait_for(lambda: (crashing.worker_status or {}).get("frame_count") == 5)
+            assert crashing.is_running and crashing.frame_count == 5
+            assert pool.metrics()[crash_shard]["alive"]
+        finally:
+            await pool.shutdown()
+        assert not pool.shards
+    asyncio.run(run())
+
+def test_stopped_sessions_are_detached(monkeypatch):
+    monkeypatch.setattr(session_workers, "run_shard", fake_shard)
+
+    async def run():
+        pool = SessionWorkerPool(1, ReconnectPolicy(0.1, 5))
+        session = FakeSession("camera")
+        try:
+            await pool.start(session)
+            await wait_for(lambda: session.frame_count == 5)
+            await pool.stop(session)
+            assert not session.is_running and session.frame_bus.source_factory is None
+            assert "camera" not in pool.sessions
+        finally:
+            await pool.shutdown()
+    asyncio.run(run())
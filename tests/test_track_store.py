@@ -0,0 +1,66 @@
+from app.helpers.track_store import TrackStore
+
+BOX = (0, 0, 10, 10)
+
+def test_update_returns_previous_centroid():
+    store = TrackStore(history_size=4, max_age=5, crossed_ttl=10)
+    assert store.update(1, 0, BOX, (5, 5), 0.5, 2, "f0") == (5, 5)
+    assert store.update(1, 1, BOX, (7, 9), 0.5, 2, "f1") == (5, 5)
+    assert len(store) == 1
+
+def test_history_is_a_bounded_ring():
+    store = TrackStore(history_size=3, max_age=5, crossed_ttl=10)
+    for frame in range(5):
+        store.update(1, frame, BOX, (frame, frame), 0.5, 2, f"f{frame}")
+    state = store.tracks[1]
+    assert state.recent_centroids().tolist() == [[2, 2], [3, 3], [4, 4]]
+    assert state.hits == 5
+    assert TrackStore(history_size=1, max_age=5, crossed_ttl=10).history_size == 2
+
+def test_best_sample_keeps_highest_confidence():
+    store = TrackStore(history_size=4, max_age=5, crossed_ttl=10)
+    store.update(1, 0, BOX, (5, 5), 0.4, 2, "f0")
+    store.update(1, 1, (1, 1, 11, 11), (6, 6), 0.9, 3, "f1")
+    store.tracks[1].best_evidence = b"crop"
+    store.update(1, 2, BOX, (7, 7), 0.6, 2, "f2")
+    best = store.tracks[1].best_sample({2: "car", 3: "motorcycle"})
+    assert (best["label"], best["confidence"], best["frame_id"]) == ("motorcycle", 0.9, "f1")
+    assert store.tracks[1].best_evidence == b"crop"
+
+    store.update(1, 3, BOX, (8, 8), 0.95, 2, "f3")
+    assert store.tracks[1].best_evidence is None  # the crop belonged to the previous best
+
+def test_evict_stale_tracks():
+    store = TrackStore(history_size=4, max_age=2, crossed_ttl=10)
+    store.update(1, 0, BOX, (5, 5), 0.5, 2, "f0")
+    store.update(2, 2, BOX, (5, 5), 0.5, 2, "f2")
+    assert store.evict_stale(2) == []
+    assert store.evict_stale(3) == [1]
+    assert list(store.tracks) == [2]
+
+def test_crossed_state_is_per_line():
+    store = TrackStore(history_size=4, max_age=2, crossed_ttl=3)
+    store.update(1, 0, BOX, (5, 5), 0.5, 2, "f0")
+    assert store.mark_crossed(1, 0, 0).track_id == 1
+    assert len(store) == 1  # still tracked: it may cross other lines
+    assert store.is_crossed(1, 0)
+    assert not store.is_crossed(1, 1)
+    store.mark_crossed(1, 1, 0)
+    assert store.is_crossed(1, 1)
+
+def test_crossed_lines_expire_after_ttl():
+    store = TrackStore(history_size=4, max_age=2, crossed_ttl=3)
+    store.update(1, 0, BOX, (5, 5), 0.5, 2, "f0")
+    store.mark_crossed(1, 0, 5)
+    store.update(1, 8, BOX, (6, 6), 0.5, 2, "f8")  # seen again: TTL restarts
+    store.evict_stale(11)
+    assert store.is_crossed(1, 0)
+    store.evict_stale(12)
+    assert not store.is_crossed(1, 0)
+
+def test_clear():
+    store = TrackStore(history_size=4, max_age=2, crossed_ttl=3)
+    store.update(1, 0, BOX, (5, 5), 0.5, 2, "f0")
+    store.mark_crossed(2, 0, 0)
+    store.clear()
+    assert not store.tracks and not store.crossed
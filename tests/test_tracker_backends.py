@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("boxmot")
+pytest.importorskip("dotenv")
+from app.helpers.tracker_backends import IOU, IouTracker, attach_reid, create_tracker
+
+def dets(*boxes, conf=0.9, cls=2):
+    return np.array([[*box, conf, cls] for box in boxes], dtype=float).reshape(-1, 6)
+
+def ids(tracks):
+    return tracks[:, 4].astype(int).tolist()
+
+def test_overlapping_boxes_keep_their_ids():
+    tracker = IouTracker(iou_threshold=0.3)
+    first = tracker.update(dets((0, 0, 50, 50), (200, 200, 260, 260)))
+    second = tracker.update(dets((205, 205, 265, 265), (5, 5, 55, 55)))
+    assert ids(first) == [1, 2]
+    assert ids(second) == [2, 1]
+    assert second[:, 7].tolist() == [0, 1]  # det_ind
+
+def test_small_fast_objects_match_by_centroid():
+    tracker = IouTracker(iou_threshold=0.3, max_distance=0.75)
+    tracker.update(dets((100, 100, 110, 110)))
+    moved = tracker.update(dets((106, 104, 116, 114)))  # IoU below threshold, centroid within reach
+    assert ids(moved) == [1]
+    far = tracker.update(dets((300, 300, 310, 310)))
+    assert ids(far) == [2]
+
+def test_frames_without_detections_return_live_tracks():
+    tracker = IouTracker(max_age=2)
+    tracker.update(dets((0, 0, 50, 50), conf=0.8, cls=3))
+    for _ in range(2):
+        coasting = tracker.update(np.empty((0, 6)))
+        assert coasting.tolist() == [[0, 0, 50, 50, 1, 0.8, 3, -1]]
+    assert len(tracker.update(np.empty((0, 6)))) == 0  # older than max_age
+
+def test_unmatched_tracks_expire():
+    tracker = IouTracker(max_age=1)
+    tracker.update(dets((0, 0, 50, 50)))
+    tracker.update(dets((300, 300, 350, 350)))
+    tracker.update(dets((300, 300, 350, 350)))
+    assert tracker.ids.tolist() == [2]
+
+def test_create_tracker_by_name():
+    assert isinstance(create_tracker(IOU), IouTracker)
+    assert isinstance(create_tracker("IOU"), IouTracker)
+
+def test_attach_reid_guards_boxmot_internals():
+    extractor = SimpleNamespace(get_features=lambda boxes, image: None)
+    tracker = attach_reid(SimpleNamespace(with_reid=False), extractor)
+    assert tracker.with_reid and tracker.model is extractor
+    with pytest.raises(RuntimeError):
+        attach_reid(SimpleNamespace(with_reid=False, model=object()), extractor)
+    with pytest.raises(RuntimeError):
+        attach_reid(SimpleNamespace(), extractor)
+    with pytest.raises(RuntimeError):
+        attach_reid(SimpleNamespace(with_reid=False), object())
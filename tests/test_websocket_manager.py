@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("dotenv")
+from app.helpers.websocket_manager import WebSocketManager
+
+class FakeWebSocket:
+    """Records sent messages; sends wait while ``gate`` is closed."""
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.messages = []
+
+    async def send_json(self, payload):
+        await self.gate.wait()
+        await asyncio.sleep(self.delay)
+        self.messages.append(payload)
+
+    async def send_text(self, payload):
+        await self.send_json(payload)
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+def test_coalesced_updates_keep_only_the_latest():
+    async def run():
+        manager = WebSocketManager(queue_size=8, send_timeout=5)
+        websocket = FakeWebSocket()
+        websocket.gate.clear()
+        client = manager.subscribe("session/1", websocket)
+        manager.publish("session/1", {"frame": 0}, coalesce="progress")
+        await settle()  # frame 0 is being sent
+        for index in range(1, 5):
+            manager.publish("session/1", {"frame": index}, coalesce="progress")
+        manager.publish("session/1", {"event": "crossing"})
+        assert len(client.queue) == 2 and client.coalesced == 3
+        websocket.gate.set()
+        await settle()
+        assert websocket.messages == [{"frame": 0}, {"frame": 4}, {"event": "crossing"}]
+        manager.unsubscribe(client)
+    asyncio.run(run())
+
+def test_full_queue_drops_the_oldest_message():
+    async def run():
+        manager = WebSocketManager(queue_size=2, send_timeout=5)
+        websocket = FakeWebSocket()
+        websocket.gate.clear()
+        client = manager.subscribe("topic", websocket)
+        for index in range(4):
+            manager.publish("topic", index)
+        # The sender has not run yet: 0 and 1 made room for 2 and 3
+        websocket.gate.set()
+        await settle()
+        assert websocket.messages == [2, 3]
+        assert client.dropped == 2
+        manager.unsubscribe(client)
+        assert manager.metrics()["dropped"] == client.dropped
+    asyncio.run(run())
+
+def test_slow_client_is_disconnected_without_blocking_others():
+    async def run():
+        manager = WebSocketManager(queue_size=8, send_timeout=0.05)
+        slow, fast = FakeWebSocket(delay=1), FakeWebSocket()
+        manager.subscribe("topic", slow)
+        manager.subscribe("topic", fast)
+        manager.publish("topic", "hello")
+        await asyncio.sleep(0.2)
+        assert fast.messages == ["hello"] and slow.messages == []
+        assert manager.active_connections == {"topic": 1}
+        manager.disconnect("topic")
+        assert not manager.has_subscribers("topic")
+    asyncio.run(run())
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+from app.helpers.zone_geometry import LINE, MAX_POLYGONS, POLYGON, Zone, ZoneSet, parse_points
+
+NAMES = {2: "car"}
+SQUARE = [(100, 100), (200, 100), (200, 200), (100, 200)]
+
+def tracks(*rows):
+    """Tracker rows [x1, y1, x2, y2, track_id, confidence, class_id] around each (track_id, x, y) centroid."""
+    return np.array([[x - 5, y - 5, x + 5, y + 5, track_id, 0.9, 2] for track_id, x, y in rows], dtype=np.float32)
+
+def test_parse_points():
+    assert parse_points('[{"x": 1, "y": 2}, {"x": 3, "y": 4}]') == [(1, 2), (3, 4)]
+    assert parse_points([[1, 2], (3, 4)]) == [(1, 2), (3, 4)]
+    assert parse_points(None) == []
+
+def test_from_device_builds_lines_and_zones():
+    zone_set = ZoneSet.from_device({
+        "horizontal_line_points": [(0, 100), (200, 100)],
+        "zones": [
+            {"name": "gate", "type": POLYGON, "points": SQUARE},
+            {"name": "broken", "type": POLYGON, "points": SQUARE[:2]},
+        ],
+    })
+    assert [(zone.name, zone.kind) for zone in zone_set.zones] == [("horizontal", LINE), ("gate", POLYGON)]
+
+def test_record_crossing_counts_per_direction_and_label():
+    zone_set = ZoneSet([Zone("horizontal", LINE, [(0, 100), (200, 100)])])
+    assert zone_set.record_crossing(0, 1, "car") == ("horizontal", "crossed UP to DOWN.")
+    zone_set.record_crossing(0, 1, "car")
+    zone_set.record_crossing(0, -1, "truck")
+    counters = zone_set.counters()["horizontal"]
+    assert counters["total"] == 3
+    assert counters["counts"] == {"crossed UP to DOWN.": {"car": 2}, "crossed DOWN to UP.": {"truck": 1}}
+
+def test_mask_lookup_sets_one_bit_per_polygon():
+    zone_set = ZoneSet([Zone("a", POLYGON, SQUARE), Zone("b", POLYGON, [(150, 150), (300, 150), (300, 300), (150, 300)])])
+    zone_set.prepare((400, 400, 3))
+    assert zone_set.lookup(np.array([[50, 50], [120, 120], [175, 175], [250, 250]])).tolist() == [0, 1, 3, 2]
+
+def test_enter_exit_and_dwell():
+    zone_set = ZoneSet([Zone("gate", POLYGON, SQUARE, dwell_threshold=2)])
+    zone_set.prepare((400, 400, 3))
+    assert zone_set.update_polygons(tracks((1, 50, 50)), NAMES, 0, 10.0) == []
+    assert zone_set.update_polygons(tracks((1, 150, 150)), NAMES, 1, 11.0) == [("gate", "entered")]
+    assert zone_set.counters()["gate"]["occupancy"] == 1
+    assert zone_set.update_polygons(tracks((1, 300, 300)), NAMES, 2, 14.0) == [("gate", "exited")]
+
+    gate = zone_set.counters()["gate"]
+    assert gate["occupancy"] == 0
+    assert gate["counts"] == {"entered": {"car": 1}, "exited": {"car": 1}, "dwelled": {"car": 1}}
+    assert gate["dwell_max_seconds"] == 3.0
+
+def test_evict_closes_membership_of_lost_tracks():
+    zone_set = ZoneSet([Zone("gate", POLYGON, SQUARE)])
+    zone_set.prepare((400, 400, 3))
+    zone_set.update_polygons(tracks((1, 150, 150)), NAMES, 0, 10.0)
+    zone_set.evict(5, max_age=3, timestamp=12.0)
+    gate = zone_set.counters()["gate"]
+    assert gate["occupancy"] == 0 and gate["counts"]["exited"] == {"car": 1}
+    assert not zone_set.membership
+
+def test_polygon_limit():
+    polygons = [Zone(f"p{index}", POLYGON, SQUARE) for index in range(MAX_POLYGONS + 1)]
+    with pytest.raises(ValueError):
+        ZoneSet(polygons)
+    zone_set = ZoneSet.from_device({"zones": [{"type": POLYGON, "points": SQUARE}] * (MAX_POLYGONS + 1)})
+    assert len(zone_set.polygons) == MAX_POLYGONS